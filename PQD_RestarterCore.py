@@ -0,0 +1,2290 @@
+# ==============================================================================
+# PQD_RestarterCore
+# Componentes sem dependência de Tk usados pelo PQD_ScheduledRestart: leitura
+# incremental de arquivos de log, motor de gatilhos, reator de E/S único (inotify
+# + timers) que acompanha os logs de todos os servidores, persistência atômica da
+# configuração e demais peças do motor de monitoramento.
+# ==============================================================================
+import bisect
+import ctypes
+import ctypes.util
+import errno
+import heapq
+import io
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import re
+import selectors
+import socket
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+try:
+    from jeepney import DBusAddress, Properties, new_method_call
+    from jeepney.io.blocking import open_dbus_connection
+    from jeepney.wrappers import DBusErrorResponse, unwrap_msg
+
+    JEEPNEY_AVAILABLE = True
+except ImportError:
+    JEEPNEY_AVAILABLE = False
+
+DEFAULT_TRIGGER_MESSAGE = "ServerAdminTools | Event serveradmintools_game_ended"
+
+TRIGGER_ACTION_RESTART = "restart"
+TRIGGER_ACTION_DELAYED_RESTART = "delayed_restart"
+TRIGGER_ACTION_NOTIFY = "notify"
+TRIGGER_ACTIONS = (TRIGGER_ACTION_RESTART, TRIGGER_ACTION_DELAYED_RESTART, TRIGGER_ACTION_NOTIFY)
+
+LOG_FOLDER_PATTERN = re.compile(r"^logs_\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}$")
+CONSOLE_LOG_FILENAME = 'console.log'
+
+
+def find_latest_log_folder(pasta_raiz_logs):
+    # O nome logs_AAAA-MM-DD_HH-MM-SS já ordena cronologicamente, então basta o maior nome
+    # entre as subpastas válidas: nenhum stat/getmtime por entrada (scandir usa o tipo já
+    # retornado pelo sistema de arquivos para is_dir).
+    mais_recente = None
+    with os.scandir(pasta_raiz_logs) as entradas:
+        for entrada in entradas:
+            nome = entrada.name
+            if (mais_recente is None or nome > mais_recente) and LOG_FOLDER_PATTERN.match(nome) \
+                    and entrada.is_dir():
+                mais_recente = nome
+    return os.path.join(pasta_raiz_logs, mais_recente) if mais_recente else None
+
+
+# ==============================================================================
+# CLASSE IncrementalFileReader
+# ==============================================================================
+class IncrementalFileReader:
+    # Lê apenas os bytes acrescentados a um arquivo de log desde a última leitura.
+    # Guarda o offset e a identidade do arquivo (dispositivo + inode) para detectar
+    # truncamento (tamanho menor que o offset) e rotação (arquivo substituído).
+    # Linhas incompletas ficam retidas até que o '\n' correspondente seja escrito.
+    def __init__(self, path, encoding='utf-8', initial_tail_bytes=None):
+        self.path = path
+        self.encoding = encoding
+        self.initial_tail_bytes = initial_tail_bytes
+        self.file_missing = False
+        self._offset = None
+        self._file_id = None
+        self._carry = b""
+
+    def reset(self):
+        self._offset = None
+        self._file_id = None
+        self._carry = b""
+
+    def read_new_lines(self):
+        # Retorna (linhas, reiniciado). 'reiniciado' indica que o conteúdo já exibido
+        # não corresponde mais ao arquivo (truncado, rotacionado ou removido).
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            was_present = not self.file_missing and self._file_id is not None
+            self.file_missing = True
+            self._offset = 0  # Quando reaparecer, lê desde o início
+            self._file_id = None
+            self._carry = b""
+            return [], was_present
+        self.file_missing = False
+
+        file_id = (st.st_dev, st.st_ino)
+        reiniciado = False
+        skip_partial_first_line = False
+        if self._offset is None:
+            self._offset = 0
+            if self.initial_tail_bytes and st.st_size > self.initial_tail_bytes:
+                self._offset = st.st_size - self.initial_tail_bytes
+                skip_partial_first_line = True
+        elif (self._file_id is not None and file_id != self._file_id) or st.st_size < self._offset:
+            reiniciado = True
+            self._offset = 0
+            self._carry = b""
+        self._file_id = file_id
+
+        if st.st_size == self._offset:
+            return [], reiniciado
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        self._offset += len(data)
+
+        if skip_partial_first_line:
+            nl = data.find(b'\n')
+            data = data[nl + 1:] if nl != -1 else b""
+
+        partes = (self._carry + data).split(b'\n')
+        self._carry = partes.pop()
+        linhas = [p.rstrip(b'\r').decode(self.encoding, errors='replace') + '\n' for p in partes]
+        return linhas, reiniciado
+
+
+# ==============================================================================
+# CLASSE ChunkedLineReader
+# ==============================================================================
+class ChunkedLineReader:
+    # Tail por blocos de bytes sobre um arquivo aberto em modo binário: cada read_lines() lê em
+    # blocos de CHUNK_SIZE (no máximo max_bytes por chamada) e devolve só as linhas completas.
+    # A linha do fim ainda sem '\n' (o servidor está no meio da escrita) fica guardada em bytes e
+    # é completada na leitura seguinte, então um gatilho nunca chega partido em dois pedaços.
+    # Só as linhas completas são decodificadas, numa única passada por leitura, com as mesmas
+    # quebras de linha do modo texto ('\n', '\r\n' e '\r' viram '\n').
+    CHUNK_SIZE = 64 * 1024
+    MAX_BYTES_PER_READ = 1024 * 1024
+    MAX_PARTIAL_BYTES = 1024 * 1024  # Linha sem '\n' maior que isso é entregue como está
+
+    def __init__(self, fh, encoding='latin-1', chunk_size=CHUNK_SIZE, max_bytes=MAX_BYTES_PER_READ):
+        self._fh = fh
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.max_bytes = max(chunk_size, max_bytes)
+        self.at_eof = True  # False quando a última leitura parou em max_bytes com mais dados no arquivo
+        self._carry = b""
+
+    @property
+    def pending_bytes(self):
+        return len(self._carry)
+
+    def read_lines(self):
+        # Cada bloco é separado e decodificado sozinho (sem juntar tudo num buffer grande)
+        linhas = []
+        lidos = 0
+        self.at_eof = False
+        while lidos < self.max_bytes:
+            bloco = self._fh.read(self.chunk_size)
+            if not bloco:
+                self.at_eof = True
+                break
+            lidos += len(bloco)
+            curto = len(bloco) < self.chunk_size  # Leitura curta: chegou ao fim do que já foi escrito
+            if self._carry:
+                bloco = self._carry + bloco
+            fim = bloco.rfind(b'\n')
+            if fim == -1:
+                self._carry = bloco
+            elif fim == len(bloco) - 1:
+                self._carry = b""
+                linhas.extend(self._decode(bloco))
+            else:
+                self._carry = bloco[fim + 1:]
+                linhas.extend(self._decode(bloco[:fim + 1]))
+            if len(self._carry) > self.MAX_PARTIAL_BYTES:
+                linhas.extend(self.flush())
+            if curto:
+                self.at_eof = True
+                break
+        return linhas
+
+    def flush(self):
+        # Entrega a linha incompleta guardada (ex.: o arquivo deixou de ser seguido)
+        if not self._carry:
+            return []
+        dados, self._carry = self._carry, b""
+        return self._decode(dados + b'\n')
+
+    def _decode(self, dados):
+        # TextIOWrapper sobre os bytes já completos: decodificação e separação de linhas em C
+        return io.TextIOWrapper(io.BytesIO(dados), encoding=self.encoding, errors='replace').readlines()
+
+
+# ==============================================================================
+# CLASSE AhoCorasickAutomaton
+# ==============================================================================
+class AhoCorasickAutomaton:
+    # Autômato de Aho-Corasick para um conjunto de padrões literais. As transições de falha
+    # são pré-resolvidas (DFA completo sobre os caracteres dos padrões), então a varredura de
+    # uma linha é um único passo de dicionário por caractere, independente de quantos padrões
+    # existam. Transições ausentes voltam para a raiz (estado 0).
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        goto = [{}]
+        saidas = [set()]
+        for idx, padrao in enumerate(self.patterns):
+            if not padrao:
+                continue
+            estado = 0
+            for ch in padrao:
+                proximo = goto[estado].get(ch)
+                if proximo is None:
+                    goto.append({})
+                    saidas.append(set())
+                    proximo = len(goto) - 1
+                    goto[estado][ch] = proximo
+                estado = proximo
+            saidas[estado].add(idx)
+
+        falha = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        fila = deque(goto[0].values())
+        while fila:
+            estado = fila.popleft()
+            # delta do estado = transições do seu estado de falha + suas próprias arestas
+            delta[estado] = dict(delta[falha[estado]])
+            delta[estado].update(goto[estado])
+            saidas[estado] |= saidas[falha[estado]]
+            for ch, filho in goto[estado].items():
+                falha[filho] = delta[falha[estado]].get(ch, 0) if estado else 0
+                fila.append(filho)
+        for ch, filho in goto[0].items():
+            falha[filho] = 0
+
+        self._delta = delta
+        self._saidas = [frozenset(o) for o in saidas]
+
+    def find_all(self, text):
+        # Retorna o conjunto de índices dos padrões presentes em 'text' (vazio se nenhum).
+        delta = self._delta
+        saidas = self._saidas
+        estado = 0
+        encontrados = None
+        for ch in text:
+            estado = delta[estado].get(ch, 0)
+            if saidas[estado]:
+                if encontrados is None:
+                    encontrados = set(saidas[estado])
+                else:
+                    encontrados |= saidas[estado]
+        return encontrados or set()
+
+
+# ==============================================================================
+# CLASSE TriggerRule
+# ==============================================================================
+class TriggerRule:
+    def __init__(self, pattern, action=TRIGGER_ACTION_DELAYED_RESTART, regex=False):
+        self.pattern = pattern
+        self.action = action if action in TRIGGER_ACTIONS else TRIGGER_ACTION_DELAYED_RESTART
+        self.regex = bool(regex)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("pattern", ""), data.get("action", TRIGGER_ACTION_DELAYED_RESTART),
+                   data.get("regex", False))
+
+    def to_dict(self):
+        return {"pattern": self.pattern, "action": self.action, "regex": self.regex}
+
+    @staticmethod
+    def list_from_config(config_dict):
+        # Lê a lista 'triggers'; configurações antigas só têm 'trigger_log_message', que vira
+        # um gatilho de reinício com delay (comportamento original).
+        if "triggers" in config_dict:
+            return [TriggerRule.from_dict(t) for t in config_dict.get("triggers") or [] if t.get("pattern")]
+        legacy = config_dict.get("trigger_log_message", DEFAULT_TRIGGER_MESSAGE)
+        return [TriggerRule(legacy)] if legacy else []
+
+
+def _alternation_member(padrao, flags=0):
+    # Retorna "(?:padrão)" se o regex pode entrar numa alternação compartilhada, ou None.
+    # Ficam de fora: flags globais inline ("(?i)...", só valem no início do padrão) e qualquer
+    # grupo de captura, porque nomes repetidos quebram a compilação da alternação e as
+    # referências (\1, (?P=nome)) seriam renumeradas e passariam a apontar para outro grupo.
+    membro = f"(?:{padrao})"
+    try:
+        rx = re.compile(membro, flags)
+    except re.error:
+        return None
+    return membro if rx.groups == 0 else None
+
+
+# ==============================================================================
+# CLASSE TriggerEngine
+# ==============================================================================
+class TriggerEngine:
+    # Compila todos os gatilhos de um servidor de uma vez. Uma alternação única com todos os
+    # padrões (literais escapados + regex) funciona como pré-filtro: a imensa maioria das linhas
+    # não dispara nada e sai após uma única varredura em C, qualquer que seja o número de
+    # padrões. Só quando o pré-filtro acerta, o autômato de Aho-Corasick identifica em uma
+    # passada todos os literais presentes e os regex são conferidos um a um. Regex com flags
+    # globais inline ("(?i)...") ou grupos de captura não podem entrar na alternação (ver
+    # _alternation_member): ficam fora do pré-filtro e são conferidos em toda linha, sem
+    # desligar o pré-filtro dos demais.
+    # Medições em benchmarks/bench_triggers.py.
+    def __init__(self, rules):
+        self.rules = [r for r in rules if r.pattern]
+        self._literais = [r for r in self.rules if not r.regex]
+        self._regexes = [(re.compile(r.pattern), r) for r in self.rules if r.regex]  # re.error propaga
+
+        self._automato = None
+        if self._literais:
+            self._automato = AhoCorasickAutomaton([r.pattern for r in self._literais])
+
+        self._prefiltro = None
+        self._fora_do_prefiltro = []
+        partes = [re.escape(r.pattern) for r in self._literais]
+        for rx, regra in self._regexes:
+            membro = _alternation_member(rx.pattern)
+            if membro is None:
+                self._fora_do_prefiltro.append((rx, regra))
+            else:
+                partes.append(membro)
+        if partes:
+            try:
+                self._prefiltro = re.compile("|".join(partes))
+            except re.error:  # Sem pré-filtro: toda linha passa pelo caminho completo
+                self._prefiltro = None
+                self._fora_do_prefiltro = []
+
+    @staticmethod
+    def validate_regex(pattern):
+        try:
+            re.compile(pattern)
+            return None
+        except re.error as e:
+            return str(e)
+
+    def match(self, line):
+        # Retorna as regras disparadas por 'line': literais primeiro, depois regex, cada grupo
+        # na ordem em que foi configurado.
+        if not self.rules:
+            return []
+        if self._prefiltro is not None and not self._prefiltro.search(line):
+            return [regra for rx, regra in self._fora_do_prefiltro if rx.search(line)]
+        disparadas = []
+        if self._automato is not None:
+            indices = self._automato.find_all(line)
+            if indices:
+                disparadas.extend(self._literais[i] for i in sorted(indices))
+        for rx, regra in self._regexes:
+            if rx.search(line):
+                disparadas.append(regra)
+        return disparadas
+
+
+# ==============================================================================
+# FILTRO DE EXIBIÇÃO DE LOG
+# ==============================================================================
+# Categoria e nível de uma linha do console.log, ex.: "12:00:01.123 SCRIPT    (E): ..."
+_CONSOLE_LINE_HEADER = re.compile(r"^\s*(?:\d{1,2}:\d{2}:\d{2}(?:\.\d+)?\s+)?([A-Z][A-Z0-9_]*)\s*(?:\((\w)\))?\s*:")
+_FILTER_TOKEN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+CONSOLE_LEVELS = {"E": "ERROR", "W": "WARNING", "F": "FATAL", "I": "INFO", "D": "DEBUG", "V": "VERBOSE"}
+
+
+def parse_console_line_header(linha):
+    # Retorna (categoria, nível) ou (None, None); linha sem "(X)" é INFO
+    m = _CONSOLE_LINE_HEADER.match(linha)
+    if not m:
+        return None, None
+    return m.group(1), CONSOLE_LEVELS.get(m.group(2), m.group(2)) if m.group(2) else "INFO"
+
+
+class DisplayFilter:
+    # Filtro das linhas exibidas numa aba, compilado uma vez a partir do texto digitado:
+    #   termo / "frase com espaços"   mostra linhas com qualquer um dos termos (sem diferenciar maiúsculas)
+    #   -termo / -"frase"             esconde linhas com o termo
+    #   re:padrão / -re:padrão        idem, com expressão regular (sem diferenciar maiúsculas)
+    #   level:error,warning / -level:  só / exceto esses níveis ((E), (W), ...; sem marcador = info)
+    #   cat:script / -cat:script      só / exceto essas categorias (SCRIPT, ENGINE, NETWORK, ...)
+    # Termos de texto são comparados com a linha em minúsculas (um lower() por linha, e só se
+    # houver termo de texto); vários termos viram uma alternação única, varrida em C. Os regex
+    # também viram uma alternação por grupo (os que têm flags globais, ex. "(?i)...", ou grupos
+    # de captura ficam separados). Entrada inválida (regex, aspas) gera ValueError.
+    def __init__(self, texto=""):
+        self.text = texto or ""
+        if self.text.count('"') % 2:
+            raise ValueError("Filtro inválido: aspas sem fechamento")
+
+        termos = {False: [], True: []}  # negado -> literais em minúsculas
+        regexes = {False: [], True: []}
+        self.levels, self.excluded_levels = set(), set()
+        self.categories, self.excluded_categories = set(), set()
+        for sinal, frase, token in _FILTER_TOKEN.findall(self.text):
+            if not token:  # Frase entre aspas: sempre texto literal
+                if frase:
+                    termos[bool(sinal)].append(frase.lower())
+                continue
+            negado = token.startswith("-") and len(token) > 1
+            corpo = token[1:] if negado else token
+            prefixo, _, valor = corpo.partition(":")
+            prefixo = prefixo.lower()
+            if valor and prefixo in ("level", "cat"):
+                nomes = {v.strip().upper() for v in valor.split(",") if v.strip()}
+                if prefixo == "cat":
+                    (self.excluded_categories if negado else self.categories).update(nomes)
+                else:
+                    (self.excluded_levels if negado else self.levels).update(nomes)
+            elif valor and prefixo == "re":
+                try:
+                    re.compile(valor)
+                except re.error as e:
+                    raise ValueError(f"Regex inválida '{valor}': {e}")
+                regexes[negado].append(valor)
+            else:
+                termos[negado].append(corpo.lower())
+
+        self._termo_unico = termos[False][0] if len(termos[False]) == 1 else None
+        self._incluir_texto = self._literal_matcher(termos[False])
+        self._excluir_texto = self._literal_matcher(termos[True])
+        try:
+            self._incluir_regex = self._regex_matcher(regexes[False])
+            self._excluir_regex = self._regex_matcher(regexes[True])
+        except re.error as e:
+            raise ValueError(f"Regex inválida: {e}")
+        self._tem_inclusao = bool(self._incluir_texto or self._incluir_regex)
+        self._usa_texto = bool(self._incluir_texto or self._excluir_texto)
+        self._usa_cabecalho = bool(self.levels or self.excluded_levels or self.categories or
+                                   self.excluded_categories)
+        self.empty = not (self._tem_inclusao or self._excluir_texto or self._excluir_regex or self._usa_cabecalho)
+
+    @staticmethod
+    def _literal_matcher(termos):
+        if not termos:
+            return None
+        if len(termos) == 1:
+            termo = termos[0]
+            return lambda linha_minuscula: termo in linha_minuscula
+        return re.compile("|".join(re.escape(t) for t in termos)).search
+
+    @staticmethod
+    def _regex_matcher(partes):
+        if not partes:
+            return None
+        agrupaveis, isolados = [], []
+        for parte in partes:
+            membro = _alternation_member(parte, re.IGNORECASE)
+            if membro is None:
+                isolados.append(re.compile(parte, re.IGNORECASE).search)
+            else:
+                agrupaveis.append(membro)
+        if agrupaveis:
+            isolados.insert(0, re.compile("|".join(agrupaveis), re.IGNORECASE).search)
+        if len(isolados) == 1:
+            return isolados[0]
+        return lambda linha: any(search(linha) for search in isolados)
+
+    def matches(self, linha):
+        if self.empty:
+            return True
+        if self._usa_cabecalho:
+            categoria, nivel = parse_console_line_header(linha)
+            if (self.levels and nivel not in self.levels) or nivel in self.excluded_levels:
+                return False
+            if self.categories and categoria not in self.categories:
+                return False
+            if categoria in self.excluded_categories:
+                return False
+        minuscula = linha.lower() if self._usa_texto else None
+        if (self._excluir_texto and self._excluir_texto(minuscula)) or \
+                (self._excluir_regex and self._excluir_regex(linha)):
+            return False
+        if not self._tem_inclusao:
+            return True
+        return bool((self._incluir_texto and self._incluir_texto(minuscula)) or
+                    (self._incluir_regex and self._incluir_regex(linha)))
+
+    def filter(self, linhas):
+        if self.empty:
+            return list(linhas)
+        if self._incluir_texto and not (self._usa_cabecalho or self._excluir_texto or self._excluir_regex
+                                        or self._incluir_regex):
+            # Caso mais comum (só termos de texto): sem passar por matches() a cada linha
+            if self._termo_unico is not None:
+                termo = self._termo_unico
+                return [linha for linha in linhas if termo in linha.lower()]
+            incluir = self._incluir_texto
+            return [linha for linha in linhas if incluir(linha.lower())]
+        return [linha for linha in linhas if self.matches(linha)]
+
+
+# ==============================================================================
+# CLASSE Inotify
+# ==============================================================================
+def _load_libc_inotify():
+    if platform.system() != "Linux":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_LIBC = _load_libc_inotify()
+INOTIFY_AVAILABLE = _LIBC is not None
+
+
+class Inotify:
+    # Wrapper mínimo (ctypes) sobre a API inotify do Linux, sem dependências externas.
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_MASK_ADD = 0x20000000
+    IN_ISDIR = 0x40000000
+
+    _IN_NONBLOCK = 0o4000
+    _IN_CLOEXEC = 0o2000000
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        if not INOTIFY_AVAILABLE:
+            raise OSError(errno.ENOSYS, "inotify indisponível neste sistema")
+        self._fd = _LIBC.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def fileno(self):
+        return self._fd
+
+    def add_watch(self, path, mask):
+        wd = _LIBC.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def remove_watch(self, wd):
+        _LIBC.inotify_rm_watch(self._fd, wd)  # Falha (watch já removido pelo kernel) é irrelevante
+
+    def read_events(self):
+        # Leitura não bloqueante; retorna lista de (wd, mask, nome).
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        eventos = []
+        pos = 0
+        header = self._EVENT_HEADER
+        while pos + header.size <= len(data):
+            wd, mask, _cookie, tamanho_nome = header.unpack_from(data, pos)
+            pos += header.size
+            nome = data[pos:pos + tamanho_nome].rstrip(b'\0')
+            pos += tamanho_nome
+            eventos.append((wd, mask, os.fsdecode(nome)))
+        return eventos
+
+    def close(self):
+        if self._fd >= 0:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = -1
+
+
+# ==============================================================================
+# CLASSE LogReactor
+# ==============================================================================
+class _TimerHandle:
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class LogReactor:
+    # Reator de E/S único da aplicação (uma thread): multiplexa, para todas as abas, os eventos de
+    # uma única instância inotify (pastas e arquivos de log) e uma fila de timers (polling de
+    # fallback, revarreduras de segurança e agendamentos). Callbacks rodam sempre na thread do
+    # reator e não devem bloquear. Sem inotify (Windows, ou falha ao iniciar), tudo funciona
+    # por timers. O "wake" usa socketpair, que o selectors aceita em qualquer sistema.
+    MAX_SELECT_TIMEOUT_S = 60
+
+    def __init__(self, name="LogReactor"):
+        self.name = name
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._inotify = None
+        if INOTIFY_AVAILABLE:
+            try:
+                self._inotify = Inotify()
+                self._selector.register(self._inotify.fileno(), selectors.EVENT_READ, None)
+            except OSError as e:
+                logging.warning(f"{name}: inotify indisponível ({e}). Usando polling por timers.")
+                self._inotify = None
+        self._lock = threading.Lock()
+        self._timers = []
+        self._timer_seq = itertools.count()
+        self._pending = deque()
+        self._watches = {}  # wd -> lista de callbacks(mask, nome)
+        self._running = False
+        self._thread = None
+
+    @property
+    def event_driven(self):
+        return self._inotify is not None
+
+    def is_reactor_thread(self):
+        return threading.current_thread() is self._thread
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+        self._thread.start()
+        logging.info(f"{self.name}: iniciado ({'inotify' if self.event_driven else 'polling'}).")
+
+    def stop(self, timeout=2.0):
+        self._running = False
+        self._wake()
+        if self._thread and self._thread.is_alive() and not self.is_reactor_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        for sock in (self._wake_r, self._wake_w):
+            try:
+                sock.close()
+            except OSError:
+                pass
+        logging.info(f"{self.name}: encerrado.")
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"x")
+        except OSError:  # Buffer cheio (já há um wake pendente) ou socket fechado
+            pass
+
+    # --- API thread-safe ---
+    def call_soon_threadsafe(self, callback, *args):
+        self._pending.append((callback, args))
+        if not self.is_reactor_thread():
+            self._wake()
+
+    def call_later(self, delay, callback, *args):
+        handle = _TimerHandle(time.monotonic() + max(0.0, delay), callback, args)
+        with self._lock:
+            heapq.heappush(self._timers, (handle.when, next(self._timer_seq), handle))
+            primeiro = self._timers[0][2] is handle
+        if primeiro and not self.is_reactor_thread():
+            self._wake()  # O novo timer é o mais próximo: recalcula o timeout do select
+        return handle
+
+    def add_watch(self, path, mask, callback):
+        # O mesmo caminho observado por dois callbacks compartilha o wd (IN_MASK_ADD une as máscaras).
+        wd = self._inotify.add_watch(path, mask | Inotify.IN_MASK_ADD)
+        with self._lock:
+            self._watches.setdefault(wd, []).append(callback)
+        return wd
+
+    def remove_watch(self, wd, callback):
+        with self._lock:
+            callbacks = self._watches.get(wd)
+            if not callbacks:
+                return
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if callbacks:
+                return
+            del self._watches[wd]
+        if self._inotify is not None:
+            self._inotify.remove_watch(wd)
+
+    # --- Loop ---
+    def _next_timeout(self):
+        with self._lock:
+            while self._timers and self._timers[0][2].cancelled:
+                heapq.heappop(self._timers)
+            if not self._timers:
+                return self.MAX_SELECT_TIMEOUT_S
+            return min(self.MAX_SELECT_TIMEOUT_S, max(0.0, self._timers[0][0] - time.monotonic()))
+
+    def _run(self):
+        while self._running:
+            timeout = 0 if self._pending else self._next_timeout()
+            try:
+                eventos = self._selector.select(timeout)
+            except OSError as e:
+                logging.error(f"{self.name}: erro no select: {e}", exc_info=True)
+                time.sleep(0.1)
+                continue
+            for key, _mask in eventos:
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                elif self._inotify is not None:
+                    self._dispatch_inotify(self._inotify.read_events())
+            self._run_pending()
+            self._run_due_timers()
+
+    def _safe_call(self, callback, args):
+        try:
+            callback(*args)
+        except Exception as e:
+            logging.error(f"{self.name}: erro em callback {getattr(callback, '__qualname__', callback)}: {e}",
+                          exc_info=True)
+
+    def _run_pending(self):
+        for _ in range(len(self._pending)):
+            callback, args = self._pending.popleft()
+            self._safe_call(callback, args)
+
+    def _run_due_timers(self):
+        agora = time.monotonic()
+        vencidos = []
+        with self._lock:
+            while self._timers and self._timers[0][0] <= agora:
+                vencidos.append(heapq.heappop(self._timers)[2])
+        for handle in vencidos:
+            if not handle.cancelled:
+                self._safe_call(handle.callback, handle.args)
+
+    def _dispatch_inotify(self, eventos):
+        for wd, mask, nome in eventos:
+            with self._lock:
+                if mask & Inotify.IN_Q_OVERFLOW:  # Eventos perdidos: todos precisam revarrer
+                    callbacks = [cb for cbs in self._watches.values() for cb in cbs]
+                else:
+                    callbacks = list(self._watches.get(wd, ()))
+                if mask & Inotify.IN_IGNORED:
+                    self._watches.pop(wd, None)  # O kernel já removeu o watch
+            for cb in callbacks:
+                self._safe_call(cb, (mask, nome))
+
+
+# ==============================================================================
+# CLASSE ServerLogFollower
+# ==============================================================================
+class ServerLogFollower:
+    # Acompanha os logs de um servidor dentro do LogReactor: detecta a subpasta logs_* mais
+    # recente, segue o seu console.log a partir do fim e entrega as linhas novas em lote a
+    # on_lines(linhas, caminho). Toda a lógica roda na thread do reator; start/stop/set_paused
+    # podem ser chamados de qualquer thread.
+    FILE_POLL_INTERVAL_S = 0.2
+    FOLDER_POLL_INTERVAL_S = 5
+    SAFETY_RESCAN_INTERVAL_S = 30
+    INVALID_FOLDER_RETRY_S = 10
+
+    def __init__(self, reactor, pasta_raiz, on_lines, on_new_log=None, on_log_missing=None, name=""):
+        self.reactor = reactor
+        self.pasta_raiz = pasta_raiz
+        self.name = name or pasta_raiz
+        self.on_lines = on_lines
+        self.on_new_log = on_new_log
+        self.on_log_missing = on_log_missing
+        self.paused = False
+        self.current_path = None
+        self._stopped = False
+        self._started = False
+        self._fh = None
+        self._tail = None
+        self._drain_timer = None
+        self._first_log_seen = False
+        self._latest_folder = None
+        self._root_wd = self._sub_wd = self._file_wd = None
+        self._sub_path = None
+        self._rescan_timer = None
+        self._file_poll_timer = None
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    def start(self):
+        self.reactor.call_soon_threadsafe(self._start)
+
+    def stop(self):
+        self._stopped = True
+        self.reactor.call_soon_threadsafe(self._teardown)
+
+    def set_paused(self, paused):
+        self.paused = paused
+        if not paused:
+            self.reactor.call_soon_threadsafe(self._read_available)
+
+    # --- Thread do reator ---
+    def _start(self):
+        if self._stopped or self._started:
+            return
+        if not self.pasta_raiz or not os.path.isdir(self.pasta_raiz):
+            logging.warning(f"{self.name}: Pasta de logs '{self.pasta_raiz}' inválida ou inacessível.")
+            self._rescan_timer = self.reactor.call_later(self.INVALID_FOLDER_RETRY_S, self._start)
+            return
+        self._started = True
+        if self.reactor.event_driven:
+            try:
+                self._root_wd = self.reactor.add_watch(
+                    self.pasta_raiz, Inotify.IN_CREATE | Inotify.IN_MOVED_TO | Inotify.IN_DELETE_SELF |
+                    Inotify.IN_MOVE_SELF | Inotify.IN_ONLYDIR, self._on_root_event)
+            except OSError as e:
+                logging.warning(f"{self.name}: inotify falhou para '{self.pasta_raiz}' ({e}). Usando polling.")
+                self._root_wd = None
+        modo = "inotify" if self._root_wd is not None else "polling"
+        logging.info(f"{self.name}: Observando '{self.pasta_raiz}' via {modo}.")
+        self._periodic_rescan()
+
+    def _event_driven(self):
+        return self._root_wd is not None
+
+    def _teardown(self):
+        for timer in (self._rescan_timer, self._file_poll_timer):
+            if timer:
+                timer.cancel()
+        self._rescan_timer = self._file_poll_timer = None
+        if self._root_wd is not None:
+            self.reactor.remove_watch(self._root_wd, self._on_root_event)
+            self._root_wd = None
+        self._unwatch_subfolder()
+        self._close_file()
+        self.current_path = None
+
+    def _periodic_rescan(self):
+        if self._stopped:
+            return
+        self._rescan()
+        intervalo = self.SAFETY_RESCAN_INTERVAL_S if self._event_driven() else self.FOLDER_POLL_INTERVAL_S
+        self._rescan_timer = self.reactor.call_later(intervalo, self._periodic_rescan)
+
+    def _rescan(self):
+        if not os.path.isdir(self.pasta_raiz):
+            logging.warning(f"{self.name}: Pasta de logs '{self.pasta_raiz}' inválida ou inacessível no loop.")
+            return
+        try:
+            self._latest_folder = find_latest_log_folder(self.pasta_raiz)
+        except Exception as e:
+            logging.error(f"{self.name}: Erro ao obter subpasta em '{self.pasta_raiz}': {e}", exc_info=True)
+            return
+        self._watch_subfolder(self._latest_folder)
+        self._check_current_log()
+
+    def _check_current_log(self):
+        novo_arquivo_log = None
+        if self._latest_folder:
+            novo_arquivo_log = os.path.join(self._latest_folder, CONSOLE_LOG_FILENAME)
+        if novo_arquivo_log and novo_arquivo_log != self.current_path and os.path.exists(novo_arquivo_log):
+            self._follow(novo_arquivo_log)
+        elif self.current_path and not os.path.exists(self.current_path):
+            caminho_perdido = self.current_path
+            logging.warning(f"{self.name}: Arquivo de log monitorado {caminho_perdido} não existe mais.")
+            self._close_file()
+            self.current_path = None
+            if self.on_log_missing:
+                self.on_log_missing(caminho_perdido)
+
+    def _follow(self, caminho):
+        logging.info(f"{self.name}: Novo arquivo de log detectado: {caminho}")
+        self._flush_partial_line()  # A última linha sem '\n' do log anterior não chegará mais
+        self._close_file()
+        # O log já existente ao iniciar o monitoramento é seguido a partir do fim; logs criados depois
+        # (servidor reiniciado) são lidos desde o início, para não perder as linhas de inicialização.
+        desde_inicio = self._first_log_seen
+        self._first_log_seen = True
+        try:
+            self._fh = open(caminho, 'rb', buffering=0)  # Sem buffer: cada bloco é um único read()
+            if not desde_inicio:
+                self._fh.seek(0, os.SEEK_END)  # Vai para o fim do arquivo
+        except OSError as e:
+            logging.error(f"{self.name}: Erro ao abrir {caminho} para tail: {e}", exc_info=True)
+            self._fh = None
+            return
+        self._tail = ChunkedLineReader(self._fh)
+        self.current_path = caminho
+        if self.on_new_log:
+            self.on_new_log(caminho)
+        if self._event_driven():
+            try:
+                self._file_wd = self.reactor.add_watch(
+                    caminho, Inotify.IN_MODIFY | Inotify.IN_DELETE_SELF | Inotify.IN_MOVE_SELF, self._on_file_event)
+            except OSError:
+                self._file_wd = None
+        if self._file_wd is None:
+            self._file_poll_timer = self.reactor.call_later(self.FILE_POLL_INTERVAL_S, self._poll_file)
+        if desde_inicio:
+            self._read_available()
+
+    def _close_file(self):
+        if self._file_wd is not None:
+            self.reactor.remove_watch(self._file_wd, self._on_file_event)
+            self._file_wd = None
+        if self._file_poll_timer:
+            self._file_poll_timer.cancel()
+            self._file_poll_timer = None
+        if self._drain_timer:
+            self._drain_timer.cancel()
+            self._drain_timer = None
+        self._tail = None
+        if self._fh:
+            try:
+                self._fh.close()
+            except Exception:
+                pass
+            self._fh = None
+
+    def _poll_file(self):
+        self._file_poll_timer = None
+        if self._stopped or not self._fh:
+            return
+        self._read_available()
+        self._file_poll_timer = self.reactor.call_later(self.FILE_POLL_INTERVAL_S, self._poll_file)
+
+    def _read_available(self):
+        if self.paused or self._stopped or not self._tail:
+            return
+        try:
+            linhas = self._tail.read_lines()  # Só linhas completas; o resto fica para a próxima leitura
+        except (OSError, ValueError) as e:
+            logging.warning(f"{self.name}: Erro ao ler {self.current_path}: {e}")
+            return
+        if not self._tail.at_eof and self._drain_timer is None:
+            # Ainda há dados (ex.: log grande lido desde o início): continua na próxima volta do reator,
+            # sem segurar os outros servidores nem entregar um lote gigante de uma vez
+            self._drain_timer = self.reactor.call_later(0, self._drain)
+        if linhas:
+            self.on_lines(linhas, self.current_path)
+
+    def _drain(self):
+        self._drain_timer = None
+        self._read_available()
+
+    def _flush_partial_line(self):
+        if self.paused or self._stopped or not self._tail:
+            return
+        try:
+            while True:
+                linhas = self._tail.read_lines()
+                if self._tail.at_eof:
+                    break
+                if linhas:
+                    self.on_lines(linhas, self.current_path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"{self.name}: Erro ao ler {self.current_path}: {e}")
+            linhas = []
+        linhas.extend(self._tail.flush())
+        if linhas:
+            self.on_lines(linhas, self.current_path)
+
+    def _watch_subfolder(self, subpasta):
+        if not self._event_driven() or subpasta == self._sub_path:
+            return
+        self._unwatch_subfolder()
+        self._sub_path = subpasta
+        if subpasta:
+            try:
+                self._sub_wd = self.reactor.add_watch(subpasta, Inotify.IN_CREATE | Inotify.IN_MOVED_TO |
+                                                      Inotify.IN_DELETE, self._on_sub_event)
+            except OSError:  # Subpasta removida entre a varredura e o watch
+                self._sub_wd = None
+
+    def _unwatch_subfolder(self):
+        if self._sub_wd is not None:
+            self.reactor.remove_watch(self._sub_wd, self._on_sub_event)
+        self._sub_wd = None
+        self._sub_path = None
+
+    def _on_root_event(self, mask, nome):
+        if self._stopped:
+            return
+        if mask & Inotify.IN_Q_OVERFLOW:
+            self._rescan()
+        elif mask & (Inotify.IN_DELETE_SELF | Inotify.IN_MOVE_SELF | Inotify.IN_IGNORED):
+            logging.warning(f"{self.name}: Pasta de logs '{self.pasta_raiz}' removida/movida. Usando polling.")
+            self._root_wd = None
+            self._unwatch_subfolder()
+        elif mask & Inotify.IN_ISDIR and LOG_FOLDER_PATTERN.match(nome):
+            caminho = os.path.join(self.pasta_raiz, nome)
+            if self._latest_folder is None or caminho > self._latest_folder:
+                self._latest_folder = caminho
+                self._watch_subfolder(caminho)
+                self._check_current_log()
+
+    def _on_sub_event(self, mask, nome):
+        if self._stopped:
+            return
+        if mask & Inotify.IN_IGNORED:
+            self._sub_wd = None
+            self._sub_path = None
+        if nome == CONSOLE_LOG_FILENAME or mask & (Inotify.IN_Q_OVERFLOW | Inotify.IN_IGNORED):
+            self._check_current_log()
+
+    def _on_file_event(self, mask, _nome):
+        if self._stopped:
+            return
+        if mask & (Inotify.IN_DELETE_SELF | Inotify.IN_MOVE_SELF | Inotify.IN_IGNORED):
+            self._file_wd = None
+            self._check_current_log()
+        else:
+            self._read_available()
+
+
+# ==============================================================================
+# CLASSE ReadinessProbe
+# ==============================================================================
+class ReadinessProbe:
+    # Espera, durante um reinício, pela linha do log que indica que o servidor está pronto.
+    # Linhas do arquivo de log anterior ao reinício (ignore_path) são descartadas: só conta a linha
+    # escrita no console.log da nova pasta logs_*. feed() é chamado pelo follower (thread do reator).
+    def __init__(self, pattern, regex=False, ignore_path=None):
+        self.pattern = pattern
+        self._regex = re.compile(pattern) if regex else None
+        self.ignore_path = ignore_path
+        self.matched_line = None
+        self.matched_at = None
+        self._event = threading.Event()
+
+    def feed(self, linhas, caminho):
+        if self._event.is_set() or (self.ignore_path and caminho == self.ignore_path):
+            return
+        for linha in linhas:
+            if (self._regex.search(linha) if self._regex else self.pattern in linha):
+                self.matched_line = linha.strip()
+                self.matched_at = time.monotonic()
+                self._event.set()
+                return
+
+    def wait(self, timeout, cancelado=None, poll_s=0.5):
+        # True quando a linha apareceu; False em timeout ou se cancelado() ficar verdadeiro
+        deadline = time.monotonic() + timeout
+        while not self._event.is_set():
+            restante = deadline - time.monotonic()
+            if restante <= 0 or (cancelado is not None and cancelado()):
+                return False
+            self._event.wait(min(poll_s, restante))
+        return True
+
+
+# ==============================================================================
+# AGENDAMENTO DE REINÍCIOS
+# ==============================================================================
+def parse_hhmm(texto):
+    m = re.fullmatch(r"([01]\d|2[0-3]):([0-5]\d)", texto.strip())
+    if not m:
+        raise ValueError(f"Horário '{texto}' inválido. Use o formato HH:MM.")
+    return int(m.group(1)), int(m.group(2))
+
+
+def local_to_epoch(dt_local):
+    # timetuple() de um datetime "naive" tem isdst=-1: o mktime decide o horário de verão, então
+    # um horário inexistente (adiantamento do relógio) é normalizado para depois do salto.
+    return time.mktime(dt_local.timetuple())
+
+
+# Dias aceitos nas regras compactas (PT e EN); valores no padrão do datetime.weekday() (seg=0)
+WEEKDAY_NAMES = {
+    "seg": 0, "ter": 1, "qua": 2, "qui": 3, "sex": 4, "sab": 5, "sáb": 5, "dom": 6,
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6,
+}
+CRON_ALIASES = {"@daily": "0 0 * * *", "@midnight": "0 0 * * *", "@hourly": "0 * * * *",
+                "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+MAX_SCHEDULE_LOOKAHEAD_DAYS = 4 * 366 + 1  # Cobre "29 de fevereiro" em cron
+
+
+def _parse_weekdays(texto):
+    dias = set()
+    for parte in re.split(r"[,/]", texto.lower()):
+        if "-" in parte:
+            ini, fim = parte.split("-", 1)
+            if ini not in WEEKDAY_NAMES or fim not in WEEKDAY_NAMES:
+                raise ValueError(f"Dia da semana inválido em '{parte}'.")
+            d = WEEKDAY_NAMES[ini]
+            while True:
+                dias.add(d)
+                if d == WEEKDAY_NAMES[fim]:
+                    break
+                d = (d + 1) % 7
+        elif parte in WEEKDAY_NAMES:
+            dias.add(WEEKDAY_NAMES[parte])
+        else:
+            raise ValueError(f"Dia da semana inválido: '{parte}'.")
+    return frozenset(dias)
+
+
+def _parse_cron_field(campo, minimo, maximo, nome):
+    valores = set()
+    for parte in campo.split(","):
+        passo = 1
+        if "/" in parte:
+            parte, passo_txt = parte.split("/", 1)
+            if not passo_txt.isdigit() or int(passo_txt) == 0:
+                raise ValueError(f"Passo inválido no campo {nome}: '{passo_txt}'.")
+            passo = int(passo_txt)
+        if parte == "*":
+            ini, fim = minimo, maximo
+        elif "-" in parte:
+            ini_txt, fim_txt = parte.split("-", 1)
+            if not (ini_txt.isdigit() and fim_txt.isdigit()):
+                raise ValueError(f"Intervalo inválido no campo {nome}: '{parte}'.")
+            ini, fim = int(ini_txt), int(fim_txt)
+        elif parte.isdigit():
+            ini = int(parte)
+            fim = maximo if passo > 1 else ini  # "5/15" = de 5 em diante, a cada 15
+        else:
+            raise ValueError(f"Valor inválido no campo {nome}: '{parte}'.")
+        if ini < minimo or fim > maximo or ini > fim:
+            raise ValueError(f"Campo {nome} fora do intervalo {minimo}-{maximo}: '{parte}'.")
+        valores.update(range(ini, fim + 1, passo))
+    return frozenset(valores)
+
+
+def _parse_duration_minutes(texto):
+    m = re.fullmatch(r"(?:(\d+)h)?(?:(\d+)m(?:in)?)?", texto.lower())
+    if not m or not any(m.groups()):
+        raise ValueError(f"Intervalo '{texto}' inválido. Use por exemplo 90m, 4h ou 1h30m.")
+    minutos = int(m.group(1) or 0) * 60 + int(m.group(2) or 0)
+    if not 1 <= minutos <= 1440:
+        raise ValueError(f"Intervalo '{texto}' deve ficar entre 1 minuto e 24 horas.")
+    return minutos
+
+
+class ScheduleRule:
+    # Regra compilada: horários do dia (minutos desde 00:00, ordenados) + filtros de dia.
+    # Todas as sintaxes aceitas (HH:MM, dias + horários, @every, cron) viram esta forma.
+    def __init__(self, texto, minutos_do_dia, weekdays=None, dias_mes=None, meses=None):
+        self.texto = texto
+        self.minutos_do_dia = sorted(minutos_do_dia)
+        self.weekdays = weekdays
+        self.dias_mes = dias_mes
+        self.meses = meses
+
+    def matches_day(self, data):
+        if self.meses is not None and data.month not in self.meses:
+            return False
+        if self.dias_mes is not None and self.weekdays is not None:  # Semântica do cron: um OU outro
+            return data.day in self.dias_mes or data.weekday() in self.weekdays
+        if self.dias_mes is not None:
+            return data.day in self.dias_mes
+        if self.weekdays is not None:
+            return data.weekday() in self.weekdays
+        return True
+
+
+class ScheduleExclusion:
+    # "!<dias> HH:MM-HH:MM": janela em que nenhum disparo acontece (fim inclusivo)
+    def __init__(self, texto, inicio, fim, weekdays=None):
+        self.texto = texto
+        self.inicio = inicio
+        self.fim = fim
+        self.weekdays = weekdays
+
+    def excludes(self, data, minuto):
+        if self.weekdays is not None and data.weekday() not in self.weekdays:
+            return False
+        if self.inicio <= self.fim:
+            return self.inicio <= minuto <= self.fim
+        return minuto >= self.inicio or minuto <= self.fim  # Janela que atravessa a meia-noite
+
+
+def _parse_hhmm_minutes(texto):
+    hora, minuto = parse_hhmm(texto)
+    return hora * 60 + minuto
+
+
+def parse_schedule_rule(texto):
+    # Retorna ScheduleRule ou ScheduleExclusion. Formatos aceitos:
+    #   "05:30"                  todo dia
+    #   "seg,qui 05:30,17:30"    dias da semana (PT/EN, listas com , ou /, intervalos seg-sex)
+    #   "@every 90m [dias]"      a cada intervalo, contado a partir de 00:00 de cada dia
+    #   "30 5 * * 1,4"           expressão cron de 5 campos (ou @daily/@hourly/@weekly/@monthly)
+    #   "!sab,dom 18:00-23:59"   exclusão: nenhum disparo dentro da janela
+    original = texto.strip()
+    regra = CRON_ALIASES.get(original.lower(), original)
+    if not regra:
+        raise ValueError("Regra vazia.")
+    if regra.startswith("!"):
+        partes = regra[1:].split()
+        if len(partes) not in (1, 2) or partes[-1].count("-") != 1:
+            raise ValueError(f"Exclusão '{original}' inválida. Use por exemplo '!sab,dom 18:00-23:59'.")
+        ini_txt, fim_txt = partes[-1].split("-")
+        weekdays = _parse_weekdays(partes[0]) if len(partes) == 2 else None
+        return ScheduleExclusion(original, _parse_hhmm_minutes(ini_txt), _parse_hhmm_minutes(fim_txt), weekdays)
+    partes = regra.split()
+    if partes[0].lower() == "@every":
+        if len(partes) not in (2, 3):
+            raise ValueError(f"Regra '{original}' inválida. Use por exemplo '@every 90m' ou '@every 4h seg-sex'.")
+        passo = _parse_duration_minutes(partes[1])
+        weekdays = _parse_weekdays(partes[2]) if len(partes) == 3 else None
+        return ScheduleRule(original, range(0, 1440, passo), weekdays)
+    if len(partes) == 5:
+        minutos = _parse_cron_field(partes[0], 0, 59, "minuto")
+        horas = _parse_cron_field(partes[1], 0, 23, "hora")
+        dias_mes = None if partes[2] == "*" else _parse_cron_field(partes[2], 1, 31, "dia")
+        meses = None if partes[3] == "*" else _parse_cron_field(partes[3], 1, 12, "mês")
+        weekdays = None
+        if partes[4] != "*":  # cron: 0 e 7 = domingo
+            weekdays = frozenset((d - 1) % 7 for d in _parse_cron_field(partes[4], 0, 7, "dia da semana"))
+        return ScheduleRule(original, [h * 60 + m for h in horas for m in minutos], weekdays, dias_mes, meses)
+    if len(partes) in (1, 2):
+        weekdays = _parse_weekdays(partes[0]) if len(partes) == 2 else None
+        minutos = {_parse_hhmm_minutes(h) for h in partes[-1].split(",")}
+        return ScheduleRule(original, minutos, weekdays)
+    raise ValueError(f"Regra de agendamento '{original}' não reconhecida.")
+
+
+class ScheduleRuleSet:
+    # Conjunto de regras compiladas de um servidor com iterador de próximos disparos.
+    def __init__(self, textos):
+        self.rules = []
+        self.exclusions = []
+        for texto in textos:
+            regra = parse_schedule_rule(texto)
+            (self.exclusions if isinstance(regra, ScheduleExclusion) else self.rules).append(regra)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    @staticmethod
+    def validate(texto):
+        # Retorna None se a regra for válida, ou a mensagem de erro
+        try:
+            parse_schedule_rule(texto)
+            return None
+        except ValueError as e:
+            return str(e)
+
+    def next_after(self, depois_de):
+        # Próximo disparo estritamente posterior a depois_de (datetime local "naive")
+        if not self.rules:
+            return None
+        data = depois_de.date()
+        minuto_min = depois_de.hour * 60 + depois_de.minute + 1  # Minuto atual já passou/está passando
+        for _ in range(MAX_SCHEDULE_LOOKAHEAD_DAYS):
+            melhor = None
+            for regra in self.rules:
+                if not regra.matches_day(data):
+                    continue
+                idx = bisect.bisect_left(regra.minutos_do_dia, minuto_min)
+                for minuto in regra.minutos_do_dia[idx:]:
+                    if melhor is not None and minuto >= melhor:
+                        break
+                    if not any(ex.excludes(data, minuto) for ex in self.exclusions):
+                        melhor = minuto
+                        break
+            if melhor is not None:
+                return datetime(data.year, data.month, data.day, melhor // 60, melhor % 60)
+            data += timedelta(days=1)
+            minuto_min = 0
+        return None
+
+    def upcoming(self, depois_de, quantidade):
+        horarios = []
+        atual = depois_de
+        while len(horarios) < quantidade:
+            atual = self.next_after(atual)
+            if atual is None:
+                break
+            horarios.append(atual)
+        return horarios
+
+
+class _ScheduleEntry:
+    __slots__ = ("key", "name", "schedule", "callback", "generation", "next_fire", "next_epoch", "last_fired")
+
+    def __init__(self, key, name, schedule, callback):
+        self.key = key
+        self.name = name
+        self.schedule = schedule
+        self.callback = callback
+        self.generation = 0
+        self.next_fire = None
+        self.next_epoch = None
+        self.last_fired = None
+
+
+class RestartScheduler:
+    # Scheduler único da aplicação sobre os timers do LogReactor: guarda o próximo disparo de cada
+    # servidor num min-heap e arma um único timer para o mais próximo. Os horários são locais
+    # (convertidos com mktime, que trata o horário de verão); cada disparo só acontece se for
+    # posterior ao último já disparado, o que evita duplicidade quando o relógio volta (fim do
+    # horário de verão ou ajuste manual). Saltos do relógio são detectados comparando o avanço do
+    # relógio de parede com o monotônico a cada despertar; o despertar é limitado a
+    # CLOCK_CHECK_INTERVAL_S para que um salto seja percebido mesmo longe do próximo disparo.
+    CLOCK_CHECK_INTERVAL_S = 60
+    CLOCK_JUMP_TOLERANCE_S = 2
+    MISSED_GRACE_S = 300  # Disparo atrasado além disso (ex.: relógio adiantado, suspensão) é descartado
+
+    def __init__(self, reactor):
+        self.reactor = reactor
+        self._entries = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._timer = None
+        self._ref_wall = time.time()
+        self._ref_mono = time.monotonic()
+
+    # --- API (qualquer thread) ---
+    def set_schedule(self, key, schedule, callback, name=None):
+        # callback(horario_local) roda na thread do reator e não deve bloquear
+        self.reactor.call_soon_threadsafe(self._set, key, schedule, callback, name or str(key))
+
+    def remove(self, key):
+        self.reactor.call_soon_threadsafe(self._remove, key)
+
+    def next_fire_time(self, key):
+        entry = self._entries.get(key)
+        return entry.next_fire if entry else None
+
+    # --- Thread do reator ---
+    def _set(self, key, schedule, callback, name):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _ScheduleEntry(key, name, schedule, callback)
+        else:
+            entry.schedule = schedule
+            entry.callback = callback
+            entry.name = name
+        self._plan(entry, datetime.now())
+        self._arm()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            entry.generation += 1  # Invalida o item do heap (remoção preguiçosa)
+        self._arm()
+
+    def _plan(self, entry, agora_local):
+        entry.generation += 1
+        base = agora_local
+        if entry.last_fired and entry.last_fired > base:
+            base = entry.last_fired  # Relógio voltou: não repete horários já disparados
+        entry.next_fire = entry.schedule.next_after(base) if entry.schedule else None
+        entry.next_epoch = None
+        if entry.next_fire is not None:
+            entry.next_epoch = local_to_epoch(entry.next_fire)
+            heapq.heappush(self._heap, (entry.next_epoch, next(self._seq), entry.generation, entry))
+
+    def _arm(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        while self._heap and self._heap[0][2] != self._heap[0][3].generation:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        atraso = max(0.0, self._heap[0][0] - time.time())
+        self._timer = self.reactor.call_later(min(atraso, self.CLOCK_CHECK_INTERVAL_S), self._on_timer)
+
+    def _check_clock_jump(self):
+        agora_wall, agora_mono = time.time(), time.monotonic()
+        salto = (agora_wall - self._ref_wall) - (agora_mono - self._ref_mono)
+        checagem_anterior = self._ref_wall
+        self._ref_wall, self._ref_mono = agora_wall, agora_mono
+        if abs(salto) > self.CLOCK_JUMP_TOLERANCE_S:
+            logging.warning(f"RestartScheduler: salto de relógio de {salto:+.0f}s detectado. Recalculando agendamentos.")
+            # Relógio adiantado: replaneja a partir da checagem anterior ao salto, para que os horários
+            # pulados vençam agora e passem pela tolerância de MISSED_GRACE_S em vez de sumirem
+            agora_local = datetime.fromtimestamp(checagem_anterior if salto > 0 else agora_wall)
+            for entry in self._entries.values():
+                self._plan(entry, agora_local)
+
+    def _on_timer(self):
+        self._timer = None
+        self._check_clock_jump()
+        agora = time.time()
+        while self._heap and self._heap[0][0] <= agora:
+            _epoch, _seq, generation, entry = heapq.heappop(self._heap)
+            if generation != entry.generation:
+                continue
+            horario = entry.next_fire
+            entry.last_fired = horario
+            atraso = agora - entry.next_epoch
+            if atraso > self.MISSED_GRACE_S:
+                logging.warning(f"RestartScheduler: disparo de {horario:%d/%m %H:%M} para '{entry.name}' perdido "
+                                f"({atraso:.0f}s de atraso). Ignorado.")
+            else:
+                try:
+                    entry.callback(horario)
+                except Exception as e:
+                    logging.error(f"RestartScheduler: erro no disparo de '{entry.name}': {e}", exc_info=True)
+            self._plan(entry, datetime.now())
+        self._arm()
+
+
+# ==============================================================================
+# CONTROLE DE ADMISSÃO DE REINÍCIOS
+# ==============================================================================
+class _AdmissionTicket:
+    __slots__ = ("name", "on_admitted", "on_position", "cancelled", "on_cancelled", "position", "admitted_at")
+
+    def __init__(self, name, on_admitted, on_position, cancelled, on_cancelled):
+        self.name = name
+        self.on_admitted = on_admitted
+        self.on_position = on_position
+        self.cancelled = cancelled
+        self.on_cancelled = on_cancelled
+        self.position = None
+        self.admitted_at = None
+
+
+class RestartAdmissionController:
+    # Limite de reinícios simultâneos para todo o host. Pedidos entram numa fila FIFO; o primeiro
+    # da fila é admitido quando há vaga e já passou stagger_s desde a última admissão, para que
+    # servidores com o mesmo horário agendado não subam todos juntos. max_concurrent 0 = sem limite.
+    # A fila é atendida na thread do reator (timers para o espaçamento e para conferir cancelamentos):
+    # quem espera não ocupa thread nenhuma, e só o pedido admitido vai para o pool de reinícios.
+    def __init__(self, reactor, max_concurrent=0, stagger_s=0, poll_interval_s=0.5):
+        self.reactor = reactor
+        self.max_concurrent = max(0, int(max_concurrent or 0))
+        self.stagger_s = max(0.0, float(stagger_s or 0))
+        self.poll_interval_s = poll_interval_s
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._active = []
+        self._last_admission = None
+        self._timer = None  # Só mexido na thread do reator
+
+    def _head_wait(self, agora):
+        # None: precisa esperar outro reinício liberar a vaga; float: segundos de escalonamento
+        if self.max_concurrent and len(self._active) >= self.max_concurrent:
+            return None
+        if self.stagger_s and self._last_admission is not None:
+            return max(0.0, self._last_admission + self.stagger_s - agora)
+        return 0.0
+
+    def enqueue(self, name, on_admitted, on_position=None, cancelled=None, on_cancelled=None):
+        # Pode ser chamado de qualquer thread. Os callbacks rodam na thread do reator:
+        #   on_admitted(ticket)          admitido; quem recebe deve chamar release(ticket) ao terminar
+        #   on_position(posição, espera) posição na fila mudou (1 = próximo; espera em s, ou None)
+        #   on_cancelled()               cancelled() ficou verdadeiro antes da admissão
+        ticket = _AdmissionTicket(name, on_admitted, on_position, cancelled, on_cancelled)
+        with self._lock:
+            self._queue.append(ticket)
+        self.reactor.call_soon_threadsafe(self._dispatch)
+        return ticket
+
+    def release(self, ticket):
+        with self._lock:
+            if ticket in self._active:
+                self._active.remove(ticket)
+        self.reactor.call_soon_threadsafe(self._dispatch)
+
+    def _dispatch(self):
+        # Thread do reator
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        cancelados, admitidos, avisos = [], [], []
+        with self._lock:
+            for ticket in list(self._queue):
+                if ticket.cancelled and ticket.cancelled():
+                    self._queue.remove(ticket)
+                    cancelados.append(ticket)
+            agora = time.monotonic()
+            espera = None
+            while self._queue:
+                espera = self._head_wait(agora)
+                if espera != 0.0:
+                    break
+                ticket = self._queue.popleft()
+                ticket.admitted_at = agora
+                self._active.append(ticket)
+                self._last_admission = agora
+                admitidos.append(ticket)
+            for posicao, ticket in enumerate(self._queue, 1):
+                if posicao != ticket.position:
+                    ticket.position = posicao
+                    avisos.append((ticket, posicao, espera if posicao == 1 else None))
+            proximo = None
+            if self._queue:
+                proximo = min(self.poll_interval_s, espera) if espera else self.poll_interval_s
+
+        for ticket in cancelados:
+            self._safe_callback(ticket.on_cancelled)
+        for ticket, posicao, espera_s in avisos:
+            self._safe_callback(ticket.on_position, posicao, espera_s)
+        for ticket in admitidos:
+            if not self._safe_callback(ticket.on_admitted, ticket):
+                self.release(ticket)  # Quem foi admitido falhou antes de assumir a vaga
+        if proximo is not None:
+            self._timer = self.reactor.call_later(proximo, self._dispatch)
+
+    @staticmethod
+    def _safe_callback(callback, *args):
+        if callback is None:
+            return True
+        try:
+            callback(*args)
+            return True
+        except Exception as e:
+            logging.error(f"RestartAdmissionController: erro em callback: {e}", exc_info=True)
+            return False
+
+    def snapshot(self):
+        with self._lock:
+            return {"ativos": [t.name for t in self._active], "fila": [t.name for t in self._queue]}
+
+
+# ==============================================================================
+# POOLS DE TRABALHO
+# ==============================================================================
+class CancellationToken:
+    # Cancelado quando qualquer um dos eventos estiver setado (ex.: parada da aba + encerramento do app)
+    def __init__(self, *events):
+        self.events = tuple(e for e in events if e is not None)
+
+    def is_set(self):
+        for evento in self.events:
+            if evento.is_set():
+                return True
+        return False
+
+    def __call__(self):
+        return self.is_set()
+
+    def wait(self, timeout, poll_s=0.5):
+        # Como Event.wait: retorna True se cancelado antes do timeout
+        fim = time.monotonic() + max(0.0, timeout)
+        while not self.is_set():
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                return False
+            if not self.events:
+                time.sleep(restante)
+                return False
+            self.events[0].wait(min(poll_s, restante))
+        return True
+
+    def combined(self, *events):
+        return CancellationToken(*(self.events + events))
+
+
+class _PoolTask:
+    __slots__ = ("func", "args", "token", "name", "on_discard")
+
+    def __init__(self, func, args, token, name, on_discard):
+        self.func = func
+        self.args = args
+        self.token = token
+        self.name = name
+        self.on_discard = on_discard
+
+
+class WorkerPool:
+    # Pool nomeado de threads com limite de workers e de fila, no lugar de uma thread nova por
+    # tarefa. Workers são criados sob demanda e encerram após idle_timeout_s sem trabalho. Tarefas
+    # com token cancelado são descartadas antes de rodar (on_discard é chamado, se dado, para quem
+    # precisa desfazer algum estado); durante a execução a thread usa o nome
+    # da tarefa (ex.: "DelayedRestart-Servidor"), que aparece no log. stop_event (encerramento do
+    # app) descarta a fila, também chamando on_discard das tarefas que não vão rodar, e faz os
+    # workers saírem.
+    def __init__(self, name, max_workers, max_queue=0, stop_event=None, idle_timeout_s=30):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue or 0))  # 0 = sem limite
+        self.stop_event = stop_event or threading.Event()
+        self.idle_timeout_s = idle_timeout_s
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._workers = 0
+        self._busy = 0
+        self._seq = itertools.count(1)
+        self.rejected = 0
+        self.completed = 0
+
+    def submit(self, func, *args, token=None, name=None, on_discard=None):
+        # Retorna True se a tarefa foi aceita; False com o pool encerrado ou a fila cheia
+        if self.stop_event.is_set():
+            return False
+        token = (token or CancellationToken()).combined(self.stop_event)
+        with self._cond:
+            if self.max_queue and len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                logging.warning(f"WorkerPool {self.name}: fila cheia ({self.max_queue}); tarefa "
+                                f"'{name or func.__name__}' recusada.")
+                return False
+            self._queue.append(_PoolTask(func, args, token, name or func.__name__, on_discard))
+            ocioso = self._workers - self._busy
+            if ocioso < len(self._queue) and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._worker, daemon=True, name=f"{self.name}-{next(self._seq)}").start()
+            else:
+                self._cond.notify()
+        return True
+
+    def _worker(self):
+        thread = threading.current_thread()
+        nome_base = thread.name
+        while True:
+            descartadas = ()
+            with self._cond:
+                inicio_espera = time.monotonic()
+                while not self._queue and not self.stop_event.is_set():
+                    restante = self.idle_timeout_s - (time.monotonic() - inicio_espera)
+                    if restante <= 0:
+                        break
+                    self._cond.wait(min(restante, 1.0))
+                if not self._queue or self.stop_event.is_set():
+                    self._workers -= 1
+                    if self.stop_event.is_set():
+                        descartadas = list(self._queue)
+                        self._queue.clear()
+                    task = None
+                else:
+                    task = self._queue.popleft()
+                    self._busy += 1
+            if task is None:
+                self._discard(descartadas)
+                return
+            try:
+                if task.token.is_set():
+                    logging.debug(f"WorkerPool {self.name}: tarefa '{task.name}' cancelada antes de iniciar.")
+                    if task.on_discard:
+                        task.on_discard()
+                else:
+                    thread.name = task.name
+                    task.func(*task.args)
+            except Exception as e:
+                logging.error(f"WorkerPool {self.name}: erro na tarefa '{task.name}': {e}", exc_info=True)
+            finally:
+                thread.name = nome_base
+                with self._cond:
+                    self._busy -= 1
+                    self.completed += 1
+
+    def _discard(self, tarefas):
+        # Fora do lock: on_discard pode voltar ao pool ou a outros locks
+        for task in tarefas:
+            if not task.on_discard:
+                continue
+            try:
+                task.on_discard()
+            except Exception as e:
+                logging.error(f"WorkerPool {self.name}: erro ao descartar a tarefa '{task.name}': {e}", exc_info=True)
+
+    def shutdown(self):
+        self.stop_event.set()
+        with self._cond:
+            descartadas = list(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+        self._discard(descartadas)
+
+    def stats(self):
+        with self._cond:
+            return {"nome": self.name, "ocupados": self._busy, "workers": self._workers,
+                    "max_workers": self.max_workers, "fila": len(self._queue), "recusadas": self.rejected,
+                    "concluidas": self.completed}
+
+
+# ==============================================================================
+# BACKEND SYSTEMD VIA D-BUS
+# ==============================================================================
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_OBJECT_PATH = "/org/freedesktop/systemd1"
+SYSTEMD_MANAGER_INTERFACE = "org.freedesktop.systemd1.Manager"
+SYSTEMD_UNIT_INTERFACE = "org.freedesktop.systemd1.Unit"
+SYSTEMD_NO_SUCH_UNIT = "org.freedesktop.systemd1.NoSuchUnit"
+
+# ActiveState do systemd -> códigos de status usados pela aplicação
+SYSTEMD_ACTIVE_STATE_MAP = {
+    "active": "RUNNING",
+    "reloading": "RUNNING",
+    "inactive": "STOPPED",
+    "failed": "ERROR",
+    "activating": "START_PENDING",
+    "deactivating": "STOP_PENDING",
+}
+
+
+class ServiceBackendError(Exception):
+    pass
+
+
+def systemd_unit_name(nome_servico):
+    return nome_servico if nome_servico.endswith(".service") else f"{nome_servico}.service"
+
+
+class SystemdDBusBackend:
+    # Controle do systemd direto pelo D-Bus (jeepney, opcional), sem fork de sudo/systemctl.
+    # Mantém uma conexão persistente, compartilhada entre threads sob um lock, e reconecta uma
+    # vez se ela cair. bus_address aceita "SYSTEM", "SESSION" ou um endereço D-Bus
+    # (ex.: "unix:path=/tmp/mock_bus") para testes contra um barramento simulado.
+    CALL_TIMEOUT_S = 10
+
+    def __init__(self, bus_address=None):
+        if not JEEPNEY_AVAILABLE:
+            raise ServiceBackendError("Biblioteca 'jeepney' não instalada.")
+        self.bus_address = bus_address or "SYSTEM"
+        self._lock = threading.Lock()
+        self._conn = None
+        self._unit_paths = {}
+        self._manager = DBusAddress(SYSTEMD_OBJECT_PATH, bus_name=SYSTEMD_BUS_NAME,
+                                    interface=SYSTEMD_MANAGER_INTERFACE)
+        with self._lock:
+            self._connect()  # Falha já na criação se o barramento não estiver acessível
+
+    def _connect(self):
+        try:
+            self._conn = open_dbus_connection(bus=self.bus_address)
+        except Exception as e:
+            self._conn = None
+            raise ServiceBackendError(f"Não foi possível conectar ao D-Bus '{self.bus_address}': {e}") from e
+
+    def _close_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def close(self):
+        with self._lock:
+            self._close_connection()
+
+    def _call(self, mensagem):
+        with self._lock:
+            for tentativa in range(2):
+                if self._conn is None:
+                    self._connect()
+                try:
+                    return unwrap_msg(self._conn.send_and_get_reply(mensagem, timeout=self.CALL_TIMEOUT_S))
+                except DBusErrorResponse as e:
+                    raise ServiceBackendError(f"{e.name}: {e.data[0] if e.data else ''}") from e
+                except (OSError, TimeoutError, ValueError) as e:  # Conexão caiu: tenta reconectar uma vez
+                    self._close_connection()
+                    if tentativa:
+                        raise ServiceBackendError(f"Falha na chamada D-Bus: {e}") from e
+
+    def unit_path(self, unit):
+        # O caminho do objeto de uma unidade é estável: guardado em cache, a consulta de status
+        # passa a custar uma única ida e volta no barramento.
+        caminho = self._unit_paths.get(unit)
+        if caminho:
+            return caminho
+        try:
+            caminho = self._call(new_method_call(self._manager, "GetUnit", "s", (unit,)))[0]
+        except ServiceBackendError as e:
+            if not str(e).startswith(SYSTEMD_NO_SUCH_UNIT):
+                raise
+            # Unidade ainda não carregada (ex.: parada há tempo): LoadUnit a carrega e devolve o caminho
+            caminho = self._call(new_method_call(self._manager, "LoadUnit", "s", (unit,)))[0]
+        self._unit_paths[unit] = caminho
+        return caminho
+
+    def get_properties(self, unit):
+        props = Properties(DBusAddress(self.unit_path(unit), bus_name=SYSTEMD_BUS_NAME,
+                                       interface=SYSTEMD_UNIT_INTERFACE))
+        try:
+            valores = self._call(props.get_all())[0]
+        except ServiceBackendError:
+            self._unit_paths.pop(unit, None)
+            raise
+        return {nome: valor[1] for nome, valor in valores.items()}
+
+    def get_status(self, unit):
+        props = self.get_properties(unit)
+        if props.get("LoadState") == "not-found":
+            return "NOT_FOUND"
+        return SYSTEMD_ACTIVE_STATE_MAP.get(props.get("ActiveState"), "UNKNOWN")
+
+    def unit_action(self, acao, unit):
+        # acao: "start", "stop" ou "restart". Retorna o caminho do job criado pelo systemd.
+        metodo = {"start": "StartUnit", "stop": "StopUnit", "restart": "RestartUnit"}[acao]
+        return self._call(new_method_call(self._manager, metodo, "ss", (unit, "replace")))[0]
+
+    def get_statuses(self, units):
+        # Consulta em lote pela conexão persistente: uma ida e volta por unidade, nenhum processo
+        resultado = {}
+        for unit in units:
+            try:
+                resultado[unit] = self.get_status(systemd_unit_name(unit))
+            except ServiceBackendError as e:
+                logging.warning(f"D-Bus: falha ao consultar '{unit}': {e}")
+                resultado[unit] = "ERROR"
+        return resultado
+
+
+# ==============================================================================
+# CACHE DE STATUS DE SERVIÇOS
+# ==============================================================================
+# Código numérico do "STATE" do sc.exe (independe do idioma do Windows)
+SC_STATE_MAP = {1: "STOPPED", 2: "START_PENDING", 3: "STOP_PENDING", 4: "RUNNING",
+                5: "START_PENDING", 6: "STOP_PENDING", 7: "STOPPED"}
+
+
+def query_systemd_statuses(units, timeout=10):
+    # Um único "systemctl show" para todas as unidades; systemctl show não precisa de sudo.
+    # A saída traz um bloco "Chave=Valor" por unidade, na ordem dos argumentos.
+    if not units:
+        return {}
+    nomes_systemd = [systemd_unit_name(u) for u in units]
+    try:
+        result = subprocess.run(['systemctl', 'show', '--no-pager', '-p', 'Id,LoadState,ActiveState,SubState,MainPID']
+                                + nomes_systemd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.error(f"Erro ao consultar status em lote via systemctl: {e}")
+        return {u: "ERROR" for u in units}
+    blocos = [b for b in result.stdout.split("\n\n") if b.strip()]
+    if len(blocos) != len(units):
+        logging.warning(f"'systemctl show' retornou {len(blocos)} blocos para {len(units)} unidades "
+                        f"(código {result.returncode}): {result.stderr.strip()[:200]}")
+        return {u: "ERROR" for u in units}
+    resultado = {}
+    for unit, bloco in zip(units, blocos):
+        props = dict(linha.split("=", 1) for linha in bloco.splitlines() if "=" in linha)
+        if props.get("LoadState") == "not-found":
+            resultado[unit] = "NOT_FOUND"
+        else:
+            resultado[unit] = SYSTEMD_ACTIVE_STATE_MAP.get(props.get("ActiveState"), "UNKNOWN")
+    return resultado
+
+
+def query_windows_service_statuses(units, timeout=15):
+    # Um único "sc query type= service state= all" lista todos os serviços instalados
+    if not units:
+        return {}
+    startupinfo = None
+    if hasattr(subprocess, "STARTUPINFO"):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+    try:
+        result = subprocess.run(['sc', 'query', 'type=', 'service', 'state=', 'all', 'bufsize=', '262144'],
+                                capture_output=True,
+                                timeout=timeout, startupinfo=startupinfo)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.error(f"Erro ao consultar status em lote via sc.exe: {e}")
+        return {u: "ERROR" for u in units}
+    estados = {}
+    nome_atual = None
+    for linha in result.stdout.decode('latin-1', errors='replace').splitlines():
+        chave, _, valor = linha.strip().partition(":")
+        chave = chave.strip().upper()
+        if chave == "SERVICE_NAME":
+            nome_atual = valor.strip().lower()
+        elif chave == "STATE" and nome_atual:
+            codigo = valor.split()[0] if valor.split() else ""
+            estados[nome_atual] = SC_STATE_MAP.get(int(codigo), "UNKNOWN") if codigo.isdigit() else "UNKNOWN"
+    if not estados:
+        logging.warning(f"'sc query' não retornou serviços (código {result.returncode}).")
+        return {u: "ERROR" for u in units}
+    return {u: estados.get(u.lower(), "NOT_FOUND") for u in units}
+
+
+class ServiceStatusEntry:
+    __slots__ = ("status", "checked_at")
+
+    def __init__(self, status, checked_at):
+        self.status = status
+        self.checked_at = checked_at
+
+
+class ServiceStatusCache:
+    # Status de todos os serviços configurados, atualizado numa única consulta em lote por ciclo
+    # (query_func(lista_de_servicos) -> {servico: status}) numa thread própria. As abas leem o cache
+    # respeitando um TTL e recebem callback(servico, status) quando o status muda; o callback roda
+    # na thread do cache.
+    def __init__(self, query_func, interval_s=10, ttl_s=15, name="ServiceStatusCache"):
+        self.query_func = query_func
+        self.interval_s = max(1, interval_s)
+        self.ttl_s = ttl_s
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._subscribers = {}  # chave -> (servico, callback)
+        self._refresh_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._refresh_event.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def subscribe(self, key, servico, callback):
+        # Retorna o status em cache só se estiver dentro do TTL. Senão retorna None e antecipa a
+        # consulta; o valor expirado sai do cache para que o callback chegue mesmo sem mudança.
+        with self._lock:
+            self._subscribers[key] = (servico, callback)
+            entry = self._entries.get(servico)
+            if entry is not None and not self._is_fresh(entry):
+                del self._entries[servico]
+                entry = None
+        if entry is None:
+            self.refresh_now()
+            return None
+        return entry.status
+
+    def unsubscribe(self, key):
+        with self._lock:
+            self._subscribers.pop(key, None)
+
+    def get(self, servico):
+        # Status dentro do TTL, ou None se ausente/expirado
+        with self._lock:
+            entry = self._entries.get(servico)
+        return entry.status if entry and self._is_fresh(entry) else None
+
+    def refresh_now(self, servico=None):
+        if servico is not None:
+            with self._lock:
+                self._entries.pop(servico, None)  # Força nova notificação mesmo sem mudança
+        self._refresh_event.set()
+
+    def _is_fresh(self, entry):
+        return time.monotonic() - entry.checked_at <= self.ttl_s
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._refresh_event.clear()
+            with self._lock:
+                servicos = sorted({servico for servico, _cb in self._subscribers.values() if servico})
+            if servicos:
+                try:
+                    self._apply(self.query_func(servicos))
+                except Exception as e:
+                    logging.error(f"{self.name}: erro na consulta em lote: {e}", exc_info=True)
+            self._refresh_event.wait(self.interval_s)
+
+    def _apply(self, statuses):
+        agora = time.monotonic()
+        mudancas = []
+        with self._lock:
+            for servico, status in statuses.items():
+                anterior = self._entries.get(servico)
+                self._entries[servico] = ServiceStatusEntry(status, agora)
+                if anterior is None or anterior.status != status:
+                    mudancas.append((servico, status))
+            notificacoes = [(cb, servico, status) for servico, status in mudancas
+                            for srv, cb in self._subscribers.values() if srv == servico]
+        for callback, servico, status in notificacoes:
+            try:
+                callback(servico, status)
+            except Exception as e:
+                logging.error(f"{self.name}: erro no callback de '{servico}': {e}", exc_info=True)
+
+
+# ==============================================================================
+# MÉTRICAS DE REINÍCIO
+# ==============================================================================
+# Métricas de duração registradas por reinício (segundos) e seus rótulos
+RESTART_METRICS = [
+    ("gatilho_ate_inicio", "Gatilho → início do reinício"),
+    ("parada", "Parada do serviço"),
+    ("inicio", "Início do serviço"),
+    ("prontidao", "Rodando → pronto"),
+    ("indisponibilidade", "Indisponibilidade"),
+    ("total", "Gatilho → pronto"),
+]
+HISTOGRAM_BUCKETS_S = [1, 2, 5, 10, 20, 30, 60, 120, 300, 600]
+
+
+def percentile(valores_ordenados, p):
+    # Percentil pelo método "nearest-rank"
+    if not valores_ordenados:
+        return None
+    idx = max(0, min(len(valores_ordenados) - 1, math.ceil(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[idx]
+
+
+def build_restart_record(servidor, tipo, sucesso, marcos):
+    # marcos: instantes (time.monotonic) "gatilho", "inicio_reinicio", "parado", "iniciado", "pronto"
+    inicio = marcos.get("inicio_reinicio")
+    gatilho = marcos.get("gatilho", inicio)
+    parado = marcos.get("parado")
+    iniciado = marcos.get("iniciado")
+    pronto = marcos.get("pronto")
+    fim = pronto or iniciado
+
+    def delta(a, b):
+        return round(b - a, 3) if a is not None and b is not None else None
+
+    return {
+        "servidor": servidor,
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "tipo": tipo,
+        "sucesso": bool(sucesso),
+        "gatilho_ate_inicio": delta(gatilho, inicio),
+        "parada": delta(inicio, parado),
+        "inicio": delta(parado or inicio, iniciado),
+        "prontidao": delta(iniciado, pronto),
+        "indisponibilidade": delta(inicio, fim),
+        "total": delta(gatilho, fim),
+    }
+
+
+class RestartMetrics:
+    # Registros de reinício por servidor numa janela deslizante (últimos window_size), com
+    # percentis p50/p95/máx, histograma por faixas e taxa de sucesso. Cada registro também é
+    # acrescentado a um arquivo JSON Lines, recarregado na inicialização.
+    def __init__(self, path=None, window_size=200):
+        self.path = path
+        self.window_size = window_size
+        self._lock = threading.Lock()
+        self._records = {}
+        self._listeners = []
+        if path:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        continue
+                    self._window(registro.get("servidor", "")).append(registro)
+        except OSError as e:
+            logging.warning(f"RestartMetrics: não foi possível ler '{self.path}': {e}")
+
+    def _window(self, servidor):
+        janela = self._records.get(servidor)
+        if janela is None:
+            janela = self._records[servidor] = deque(maxlen=self.window_size)
+        return janela
+
+    def add_listener(self, callback):
+        # callback(servidor) após cada novo registro; roda na thread que registrou
+        self._listeners.append(callback)
+
+    def record(self, registro):
+        with self._lock:
+            self._window(registro["servidor"]).append(registro)
+            if self.path:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    logging.warning(f"RestartMetrics: não foi possível gravar '{self.path}': {e}")
+        for callback in list(self._listeners):
+            try:
+                callback(registro["servidor"])
+            except Exception as e:
+                logging.error(f"RestartMetrics: erro em listener: {e}", exc_info=True)
+
+    def rename_server(self, antigo, novo):
+        with self._lock:
+            if antigo in self._records and novo not in self._records:
+                self._records[novo] = self._records.pop(antigo)
+                for registro in self._records[novo]:
+                    registro["servidor"] = novo
+                if self.path:
+                    self._rename_in_file(antigo, novo)
+
+    def _rename_in_file(self, antigo, novo):
+        # Chamar com _lock. Regrava o JSON Lines inteiro (atomicamente) com o novo nome, para o
+        # histórico continuar junto depois de reiniciar o programa; linhas ilegíveis ficam como estão.
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                linhas = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logging.warning(f"RestartMetrics: não foi possível ler '{self.path}' para renomear: {e}")
+            return
+        saida = []
+        for linha in linhas:
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                saida.append(linha)
+                continue
+            if registro.get("servidor") == antigo:
+                registro["servidor"] = novo
+                linha = json.dumps(registro, ensure_ascii=False) + "\n"
+            saida.append(linha)
+        try:
+            atomic_write_text(self.path, "".join(saida))
+        except OSError as e:
+            logging.warning(f"RestartMetrics: não foi possível gravar '{self.path}': {e}")
+
+    def records(self, servidor):
+        with self._lock:
+            return list(self._records.get(servidor, ()))
+
+    def summary(self, servidor):
+        registros = self.records(servidor)
+        sucessos = sum(1 for r in registros if r.get("sucesso"))
+        metricas = {}
+        for chave, _rotulo in RESTART_METRICS:
+            valores = sorted(r[chave] for r in registros if r.get("sucesso") and r.get(chave) is not None)
+            histograma = [0] * (len(HISTOGRAM_BUCKETS_S) + 1)
+            for valor in valores:
+                histograma[bisect.bisect_left(HISTOGRAM_BUCKETS_S, valor)] += 1
+            metricas[chave] = {
+                "amostras": len(valores),
+                "p50": percentile(valores, 50),
+                "p95": percentile(valores, 95),
+                "max": valores[-1] if valores else None,
+                "histograma": histograma,
+            }
+        return {
+            "servidor": servidor,
+            "reinicios": len(registros),
+            "sucessos": sucessos,
+            "taxa_sucesso": (sucessos / len(registros)) if registros else None,
+            "metricas": metricas,
+        }
+
+    def export(self, servidores):
+        return {
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "faixas_histograma_s": HISTOGRAM_BUCKETS_S,
+            "servidores": [dict(self.summary(s), registros=self.records(s)) for s in servidores],
+        }
+
+
+# ==============================================================================
+# PERSISTÊNCIA ATÔMICA DA CONFIGURAÇÃO
+# ==============================================================================
+def atomic_write_text(caminho, texto, encoding='utf-8'):
+    # Grava num temporário na mesma pasta, fsync e os.replace: quem lê (ou uma queda no
+    # meio da gravação) vê o arquivo antigo inteiro ou o novo inteiro, nunca um pedaço.
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(prefix="." + os.path.basename(caminho) + ".", suffix=".tmp", dir=pasta)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+            f.write(texto)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temporario, os.stat(caminho).st_mode & 0o7777)  # Mantém as permissões do original
+        except OSError:
+            pass
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.unlink(temporario)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Persiste a entrada do diretório (o rename) no Linux; melhor esforço
+        try:
+            fd_pasta = os.open(pasta, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd_pasta)
+        except OSError:
+            pass
+        finally:
+            os.close(fd_pasta)
+
+
+class JsonFileStore:
+    # Arquivo JSON gravado de forma atômica. Guarda o texto da última leitura/gravação e não
+    # regrava quando nada mudou. save() é síncrono; save_async() entrega a gravação a uma única
+    # thread escritora que só mantém o pedido mais recente (rajadas viram uma gravação e um
+    # dado antigo nunca sobrescreve um mais novo). Pode ser chamado de qualquer thread.
+    def __init__(self, path, indent=4):
+        self.path = path
+        self.indent = indent
+        self._lock = threading.Lock()  # Serializa as gravações
+        self._cond = threading.Condition()
+        self._last_text = None
+        self._seq = 0
+        self._written_seq = 0
+        self._pending = None
+        self._writer = None
+
+    def load(self):
+        # Lança OSError/ValueError como json.load; o texto lido vira a referência de "sem mudança"
+        with open(self.path, 'r', encoding='utf-8') as f:
+            texto = f.read()
+        dados = json.loads(texto)
+        with self._lock:
+            self._last_text = texto
+        return dados
+
+    def preserve_copy(self, sufixo=".corrompido"):
+        # Copia o arquivo atual para <arquivo><sufixo> (ex.: JSON que não carregou, antes que a
+        # próxima gravação o substitua). Retorna o caminho da cópia, ou None se não foi possível.
+        destino = self.path + sufixo
+        try:
+            with open(self.path, 'rb') as f:
+                conteudo = f.read()
+            with open(destino, 'wb') as f:
+                f.write(conteudo)
+        except OSError as e:
+            logging.error(f"JsonFileStore: não foi possível copiar '{self.path}' para '{destino}': {e}")
+            return None
+        return destino
+
+    def _serialize(self, dados):
+        return json.dumps(dados, indent=self.indent)
+
+    def _write(self, texto, seq):
+        # Retorna True se gravou, False se o conteúdo era igual ao último gravado ou já superado
+        with self._lock:
+            if seq < self._written_seq:
+                return False
+            self._written_seq = seq
+            if texto == self._last_text and os.path.exists(self.path):
+                return False
+            atomic_write_text(self.path, texto)
+            self._last_text = texto
+            return True
+
+    def _next_seq(self):
+        with self._cond:
+            self._seq += 1
+            return self._seq
+
+    def save(self, dados):
+        return self._write(self._serialize(dados), self._next_seq())
+
+    def save_async(self, dados, callback=None):
+        # callback(gravou, erro) roda na thread escritora, só para o pedido efetivamente processado
+        # (pedidos substituídos por um mais novo são descartados). A serialização também fica fora da GUI.
+        with self._cond:
+            self._seq += 1
+            self._pending = (dados, self._seq, callback)
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="ConfigWriter")
+                self._writer.start()
+            self._cond.notify()
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                if self._pending is None:
+                    self._writer = None
+                    return
+                dados, seq, callback = self._pending
+                self._pending = None
+            gravou, erro = False, None
+            try:
+                gravou = self._write(self._serialize(dados), seq)
+            except Exception as e:
+                erro = e
+                logging.error(f"JsonFileStore: erro ao gravar '{self.path}': {e}", exc_info=True)
+            if callback:
+                try:
+                    callback(gravou, erro)
+                except Exception as e:
+                    logging.error(f"JsonFileStore: erro em callback: {e}", exc_info=True)
+
+    def flush(self, timeout=None):
+        # Espera a thread escritora terminar o que estiver pendente
+        with self._cond:
+            writer = self._writer
+        if writer is not None:
+            writer.join(timeout)
@@ -0,0 +1,1162 @@
+# ==============================================================================
+# PQD_RestarterEngine
+# Motor de cada servidor, sem Tk: acompanhamento do log, gatilhos, agendamento e
+# a sequência de reinício do serviço (parada/início com prazos, prontidão e
+# métricas). A GUI (PQD_ScheduledRestart) usa um ServerEngine por aba; o modo
+# headless roda os mesmos motores direto do JSON de configuração:
+#   python PQD_RestarterEngine.py --config server_restarter_config.json
+#   python PQD_ScheduledRestart.py --headless --config server_restarter_config.json
+# ==============================================================================
+import argparse
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import math
+import os
+import platform
+import queue
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from types import MappingProxyType
+
+from PQD_RestarterCore import (
+    TriggerEngine, TriggerRule, LogReactor, ServerLogFollower, RestartScheduler, ScheduleRuleSet, ReadinessProbe,
+    RestartMetrics, RestartAdmissionController, CancellationToken, WorkerPool, build_restart_record, SystemdDBusBackend, ServiceBackendError, systemd_unit_name,
+    JEEPNEY_AVAILABLE, TRIGGER_ACTION_RESTART, TRIGGER_ACTION_NOTIFY
+)
+
+LOG_FILENAME = 'server_restarter.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - [%(threadName)s] - %(module)s.%(funcName)s:%(lineno)d - %(message)s'
+LOG_CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Log da aplicação: nível ("log_level"), rotação por tamanho ("log_max_bytes") ou por tempo
+# ("log_rotation": "time" + "log_rotate_when"), "log_backup_count" arquivos antigos e compressão
+# gzip opcional dos rotacionados ("log_compress")
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_LOG_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 5
+DEFAULT_LOG_ROTATE_WHEN = "midnight"
+STARTUP_LOG_BUFFER_SIZE = 1000  # Registros guardados antes de configure_logging (ver buffer_startup_logging)
+CONFIG_FILENAME = 'server_restarter_config.json'
+METRICS_FILENAME = 'restart_metrics.jsonl'
+RESTART_STATUS_POLL_INTERVAL_S = 0.5
+# Limite de reinícios simultâneos no host e espaçamento entre inícios ("max_concurrent_restarts" e
+# "restart_stagger_s" no JSON; 0 desativa cada um)
+DEFAULT_MAX_CONCURRENT_RESTARTS = 2
+DEFAULT_RESTART_STAGGER_S = 20
+# Pools de trabalho compartilhados: sequências de reinício (cada uma ocupa um worker da admissão no
+# limite do host até a prontidão; a espera na fila de admissão não ocupa worker) e consultas avulsas
+# a serviços (lista de serviços)
+DEFAULT_RESTART_WORKERS = 8
+RESTART_POOL_MAX_QUEUE = 64
+SERVICE_POOL_WORKERS = 2
+SERVICE_POOL_MAX_QUEUE = 4
+
+# Checagem mais robusta para systemctl no Linux
+SYSTEMCTL_AVAILABLE = platform.system() == "Linux" and shutil.which('systemctl') is not None
+
+# Valores usados quando a chave não está na configuração do servidor (mesmos padrões da GUI)
+SERVER_DEFAULTS = {
+    "service_name": "",
+    "auto_restart_on_trigger": True,
+    "restart_delay_after_trigger": 10,
+    "stop_delay": 10,
+    "start_delay": 30,
+    "readiness_pattern": "",
+    "readiness_regex": False,
+    "readiness_timeout_s": 300,
+    "restart_cooldown_s": 120,
+}
+
+# Estados do reinício de um servidor. Cada serviço tem no máximo uma sequência em andamento:
+# idle -> pending (espera do delay do gatilho) -> queued (vez no limite de reinícios do host) ->
+# stopping -> starting -> verifying (linha de prontidão) -> cooldown (novos pedidos ignorados até
+# restart_cooldown_s) -> idle.
+RESTART_STATE_IDLE = "idle"
+RESTART_STATE_PENDING = "pending"
+RESTART_STATE_QUEUED = "queued"
+RESTART_STATE_STOPPING = "stopping"
+RESTART_STATE_STARTING = "starting"
+RESTART_STATE_VERIFYING = "verifying"
+RESTART_STATE_COOLDOWN = "cooldown"
+RESTART_STATE_LABELS = {
+    RESTART_STATE_IDLE: "ocioso",
+    RESTART_STATE_PENDING: "pendente",
+    RESTART_STATE_QUEUED: "na fila",
+    RESTART_STATE_STOPPING: "parando",
+    RESTART_STATE_STARTING: "iniciando",
+    RESTART_STATE_VERIFYING: "verificando prontidão",
+    RESTART_STATE_COOLDOWN: "intervalo mínimo",
+}
+
+
+def create_restart_admission(config, reactor):
+    controlador = RestartAdmissionController(reactor, config.get("max_concurrent_restarts", DEFAULT_MAX_CONCURRENT_RESTARTS),
+                                             config.get("restart_stagger_s", DEFAULT_RESTART_STAGGER_S))
+    logging.info(f"Reinícios simultâneos: {controlador.max_concurrent or 'sem limite'}, "
+                 f"espaçamento entre inícios: {controlador.stagger_s:g}s.")
+    return controlador
+
+
+def create_worker_pools(config, stop_event=None):
+    return {
+        "restart": WorkerPool("RestartPool", config.get("restart_workers", DEFAULT_RESTART_WORKERS),
+                              max_queue=RESTART_POOL_MAX_QUEUE, stop_event=stop_event),
+        "service": WorkerPool("ServicePool", SERVICE_POOL_WORKERS, max_queue=SERVICE_POOL_MAX_QUEUE,
+                              stop_event=stop_event),
+    }
+
+
+def create_service_backend(config):
+    # "linux_service_backend": "auto" (D-Bus se disponível), "dbus" ou "systemctl" (sempre subprocess)
+    if platform.system() != "Linux":
+        return None
+    modo = config.get("linux_service_backend", "auto")
+    if modo == "systemctl":
+        return None
+    if not JEEPNEY_AVAILABLE:
+        if modo == "dbus":
+            logging.warning("Backend D-Bus solicitado, mas 'jeepney' não está instalado. Usando systemctl.")
+        return None
+    try:
+        backend = SystemdDBusBackend(config.get("dbus_bus_address") or None)
+        logging.info(f"Controle de serviços via D-Bus ({backend.bus_address}).")
+        return backend
+    except ServiceBackendError as e:
+        logging.warning(f"{e} Usando systemctl.")
+        return None
+
+
+# ==============================================================================
+# CLASSE ServerEngine
+# ==============================================================================
+class ServerEngine:
+    # Monitoramento, gatilhos, agendamento e reinício de um servidor. 'host' fornece os serviços
+    # compartilhados (log_reactor, restart_scheduler, worker_pools, service_backend, restart_metrics
+    # e, opcionalmente, service_status_cache e restart_admission); 'settings' é o dict de configuração do servidor (mesmas
+    # chaves do JSON), guardado como snapshot somente leitura em self.settings. Quem edita publica um
+    # snapshot novo com update_settings(); as threads de trabalho só leem o atributo, sem travas nem
+    # acesso a variáveis Tk. Os callbacks podem vir de qualquer thread:
+    #   on_output(texto)               mensagens do motor para o usuário
+    #   on_log_lines(linhas, caminho)  linhas novas do console.log (thread do reator)
+    #   on_status(texto)               aviso curto (barra de status)
+    #   on_scheduled_restart(horario)  um reinício agendado foi disparado (thread do reator)
+    #   on_restart_finished(sucesso, nome_servico, tipo)  fim de uma sequência de reinício
+    #   on_restart_state(estado, detalhe)  transição da máquina de estados do reinício
+    def __init__(self, host, nome, settings, on_output=None, on_log_lines=None, on_status=None,
+                 on_scheduled_restart=None, on_restart_finished=None, on_restart_state=None):
+        self.host = host
+        self.nome = nome
+        self.settings = None
+        self.update_settings(settings)
+        self.on_output = on_output
+        self.on_log_lines = on_log_lines
+        self.on_status = on_status
+        self.on_scheduled_restart = on_scheduled_restart
+        self.on_restart_finished = on_restart_finished
+        self.on_restart_state = on_restart_state
+
+        self.trigger_engine = TriggerEngine([])
+        self.schedule = None
+        self._readiness_probe = None
+        self.last_time_to_ready_s = None
+        self.restart_phase_durations = {}  # Duração real (s) de cada fase do último reinício
+        self.restart_timestamps = {}  # Marcos (time.monotonic) do último reinício, para as métricas
+        self._stop_event = threading.Event()
+        self._scheduler_stop_event = threading.Event()
+        # Token das tarefas de reinício no pool: cancela com o fim do monitoramento ou do agendamento
+        self._cancel_token = CancellationToken(self._stop_event, self._scheduler_stop_event)
+        self._paused = False
+        self.log_follower = None  # ServerLogFollower no LogReactor compartilhado
+        # Máquina de estados do reinício (ver RESTART_STATE_*); só muda com _restart_lock
+        self._restart_lock = threading.Lock()
+        self.restart_state = RESTART_STATE_IDLE
+        self._restart_request = None  # Pedido em espera no estado pending: dict com tipo, prazo, detectado_em
+        self._cooldown_until = 0.0
+        self._cooldown_timer = None
+        self._pending_timer = None  # Timer do reator até o prazo do pedido pendente
+        self.coalesced_requests = 0  # Pedidos absorvidos por uma sequência já pendente/em andamento
+
+    def update_settings(self, settings):
+        # Troca atômica da referência: cada leitura vê o snapshot antigo inteiro ou o novo inteiro
+        config = dict(SERVER_DEFAULTS)
+        config.update(settings or {})
+        self.settings = MappingProxyType(config)
+
+    def _output(self, texto):
+        if self.on_output:
+            self.on_output(texto)
+
+    # --- Gatilhos e monitoramento de logs ---
+    def set_triggers(self, regras):
+        regras_validas = []
+        for regra in regras:
+            erro = TriggerEngine.validate_regex(regra.pattern) if regra.regex else None
+            if erro:
+                logging.warning(f"Servidor '{self.nome}': Gatilho regex inválido ignorado '{regra.pattern}': {erro}")
+                continue
+            regras_validas.append(regra)
+        # Troca atômica da referência: o reator passa a usar o novo motor no próximo lote
+        self.trigger_engine = TriggerEngine(regras_validas)
+
+    def start_log_monitoring(self, pasta_raiz):
+        if self.log_follower and not self.log_follower.stopped:
+            return True
+        if not pasta_raiz or not os.path.isdir(pasta_raiz):
+            self._output(f"AVISO: Pasta de logs '{pasta_raiz}' inválida. Monitoramento não iniciado.\n")
+            return False
+        self._stop_event.clear()
+        # Pastas, arquivo de log e timers de todos os servidores são atendidos pela thread única do LogReactor
+        self.log_follower = ServerLogFollower(
+            self.host.log_reactor, pasta_raiz, self._on_log_lines,
+            on_new_log=self._on_new_log_file, on_log_missing=self._on_log_file_missing,
+            name=f"Servidor '{self.nome}'")
+        self.log_follower.set_paused(self._paused)
+        self.log_follower.start()
+        logging.info(f"Servidor '{self.nome}': Monitoramento de logs iniciado para pasta '{pasta_raiz}'.")
+        return True
+
+    def stop_log_monitoring(self):
+        self._stop_event.set()
+        if self.log_follower:
+            self.log_follower.stop()
+        self.log_follower = None
+
+    def set_paused(self, pausado):
+        self._paused = pausado
+        if self.log_follower:
+            self.log_follower.set_paused(pausado)
+
+    @property
+    def current_log_path(self):
+        return self.log_follower.current_path if self.log_follower else None
+
+    def _on_new_log_file(self, caminho):
+        self._output(f"\n>>> Monitorando novo log: {caminho}\n")
+
+    def _on_log_file_missing(self, caminho):
+        self._output(f"AVISO: Log {caminho} não encontrado. Procurando novo log...\n")
+
+    def _on_log_lines(self, linhas, caminho_log):
+        # Roda na thread do reator: não pode bloquear.
+        probe = self._readiness_probe
+        if probe:
+            probe.feed(linhas, caminho_log)
+        engine = self.trigger_engine
+        for linha in linhas:
+            regras = engine.match(linha.strip())
+            if regras:
+                for regra in regras:
+                    self._disparar_acao_gatilho(regra, linha.strip(), caminho_log)
+        if self.on_log_lines:
+            self.on_log_lines(linhas, caminho_log)
+
+    def _disparar_acao_gatilho(self, regra, linha_strip, caminho_log):
+        detectado_em = time.monotonic()
+        acao = regra.action
+        logging.info(f"Servidor '{self.nome}': GATILHO '{regra.pattern}' ({acao}) detectado em '{caminho_log}'. "
+                     f"Linha: '{linha_strip}'.")
+        if acao != TRIGGER_ACTION_NOTIFY and not self.settings["auto_restart_on_trigger"]:
+            acao = TRIGGER_ACTION_NOTIFY  # Reinício automático desabilitado: apenas avisa
+
+        if acao == TRIGGER_ACTION_NOTIFY:
+            self._output(f"*** GATILHO DETECTADO: '{regra.pattern}' (somente notificação) ***\n")
+            if self.on_status:
+                self.on_status(f"'{self.nome}': gatilho '{regra.pattern}' detectado.")
+        elif acao == TRIGGER_ACTION_RESTART:
+            self.request_restart(False, detectado_em)
+        else:
+            self.request_restart(False, detectado_em, delay_s=self.settings["restart_delay_after_trigger"])
+
+    # --- Agendamento ---
+    def set_schedule(self, schedule):
+        # Entrega os horários ao scheduler global, que recalcula o próximo disparo deste servidor
+        self.schedule = schedule
+        if not self._scheduler_stop_event.is_set():
+            self.host.restart_scheduler.set_schedule(self, schedule, self._on_scheduled_restart, name=self.nome)
+
+    def start_scheduler(self):
+        self._scheduler_stop_event.clear()
+        if self.schedule is not None:
+            self.set_schedule(self.schedule)
+
+    def stop_scheduler(self):
+        self._scheduler_stop_event.set()
+        self.host.restart_scheduler.remove(self)
+
+    def _on_scheduled_restart(self, horario):
+        # Executa na thread do LogReactor; o reinício em si segue para uma thread própria.
+        service_to_restart = self.settings["service_name"]
+        if not service_to_restart or self._scheduler_stop_event.is_set():
+            return
+        horario_str = horario.strftime("%H:%M")
+        logging.info(f"Servidor '{self.nome}': Disparando reinício agendado para '{service_to_restart}' "
+                     f"às {horario_str}.")
+        if self.on_scheduled_restart:
+            self.on_scheduled_restart(horario)
+        if self.request_restart(True, time.monotonic()):
+            self._output(f"--- REINÍCIO AGENDADO ({horario_str}) INICIADO ---\n")
+
+    def close(self):
+        self.stop_log_monitoring()
+        self.stop_scheduler()
+        with self._restart_lock:
+            self._cancel_cooldown_timer()
+            if self._pending_timer is not None:
+                self._pending_timer.cancel()
+                self._pending_timer = None
+                self._restart_request = None
+                self._set_restart_state(RESTART_STATE_IDLE, "cancelado")
+
+    # --- Máquina de estados do reinício ---
+    def _set_restart_state(self, novo_estado, detalhe=""):
+        # Chamar com _restart_lock. Mudança só de detalhe (ex.: posição na fila) não é registrada no log.
+        antigo = self.restart_state
+        if novo_estado == antigo:
+            if detalhe and self.on_restart_state:
+                self.on_restart_state(novo_estado, detalhe)
+            return
+        self.restart_state = novo_estado
+        logging.info(f"Servidor '{self.nome}': Reinício {antigo} -> {novo_estado}"
+                     f"{f' ({detalhe})' if detalhe else ''}.")
+        if self.on_restart_state:
+            self.on_restart_state(novo_estado, detalhe)
+
+    def _advance_restart_state(self, novo_estado, detalhe=""):
+        with self._restart_lock:
+            self._set_restart_state(novo_estado, detalhe)
+
+    def request_restart(self, is_scheduled_restart=False, detectado_em=None, delay_s=0):
+        # Ponto único de entrada de reinícios (gatilho, atrasado ou agendado). Retorna True se o
+        # pedido iniciou uma nova sequência; pedidos durante uma sequência são agrupados nela.
+        tipo = "agendado" if is_scheduled_restart else "por gatilho de log"
+        agora = time.monotonic()
+        detectado_em = detectado_em or agora
+        prazo = agora + max(0, delay_s or 0)
+        with self._restart_lock:
+            estado = self.restart_state
+            if estado == RESTART_STATE_COOLDOWN and agora < self._cooldown_until:
+                self.coalesced_requests += 1
+                restante = self._cooldown_until - agora
+                logging.info(f"Servidor '{self.nome}': Pedido de reinício ({tipo}) ignorado: intervalo mínimo "
+                             f"após o último reinício (faltam {restante:.0f}s).")
+                self._output(f"Reinício ({tipo}) ignorado: último reinício há pouco "
+                             f"(intervalo mínimo, faltam {restante:.0f}s).\n")
+                return False
+            if estado in (RESTART_STATE_PENDING, RESTART_STATE_QUEUED):
+                # Agrupa: vale o prazo mais curto, e agendado prevalece sobre gatilho no registro
+                self.coalesced_requests += 1
+                pedido = self._restart_request
+                pedido["detectado_em"] = min(pedido["detectado_em"], detectado_em)
+                pedido["agendado"] = pedido["agendado"] or is_scheduled_restart
+                if prazo < pedido["prazo"] and self._pending_timer is not None:
+                    pedido["prazo"] = prazo
+                    self._pending_timer.cancel()
+                    self._pending_timer = self.host.log_reactor.call_later(
+                        prazo - agora, self._submit_restart_pipeline, pedido["tarefa"])
+                logging.info(f"Servidor '{self.nome}': Pedido de reinício ({tipo}) agrupado ao reinício pendente.")
+                return False
+            if estado not in (RESTART_STATE_IDLE, RESTART_STATE_COOLDOWN):
+                self.coalesced_requests += 1
+                logging.info(f"Servidor '{self.nome}': Pedido de reinício ({tipo}) ignorado: reinício já em "
+                             f"andamento ({estado}).")
+                return False
+            self._cancel_cooldown_timer()
+            if is_scheduled_restart:
+                tarefa = f"ScheduledRestartExec-{self.nome}"
+            else:
+                tarefa = f"{'DelayedRestart' if delay_s else 'TriggerRestart'}-{self.nome}"
+            self._restart_request = {"agendado": is_scheduled_restart, "prazo": prazo, "detectado_em": detectado_em,
+                                     "tarefa": tarefa}
+            self._set_restart_state(RESTART_STATE_PENDING, tipo)
+            if delay_s:
+                # A espera do delay é um timer do reator, não uma thread parada
+                self._pending_timer = self.host.log_reactor.call_later(delay_s, self._submit_restart_pipeline,
+                                                                       tarefa)
+        if delay_s:
+            self._output(f"Gatilho detectado. Aguardando {delay_s}s para reiniciar...\n")
+        else:
+            self._submit_restart_pipeline(tarefa)
+        return True
+
+    def _submit_restart_pipeline(self, tarefa):
+        # No prazo do pedido pendente (thread do reator ou de quem pediu): entra na fila de admissão
+        with self._restart_lock:
+            self._pending_timer = None
+            if self._restart_request is None:
+                return
+        if self._reinicio_cancelado():
+            logging.info(f"Servidor '{self.nome}': Reinício pendente cancelado.")
+            self._finish_restart(False)
+            return
+        admissao = getattr(self.host, "restart_admission", None)
+        if admissao is None:
+            self._start_restart_worker(tarefa, None)
+            return
+        # Espera a vez no limite do host sem ocupar worker; só o pedido admitido vai para o pool
+        admissao.enqueue(self.nome, lambda ticket: self._start_restart_worker(tarefa, ticket),
+                         on_position=self._on_queue_position, cancelled=self._reinicio_cancelado,
+                         on_cancelled=self._on_admission_cancelled)
+
+    def _on_admission_cancelled(self):
+        logging.info(f"Servidor '{self.nome}': Reinício cancelado enquanto aguardava na fila.")
+        self._finish_restart(False)
+
+    def _start_restart_worker(self, tarefa, ticket):
+        # Thread do reator (admitido) ou de quem pediu (sem limite de admissão)
+        aceito = self.host.worker_pools["restart"].submit(self._restart_pipeline, ticket, token=self._cancel_token,
+                                                          name=tarefa,
+                                                          on_discard=lambda: self._on_restart_discarded(ticket))
+        if not aceito:
+            logging.error(f"Servidor '{self.nome}': Pool de reinícios indisponível ou cheio; reinício descartado.")
+            self._output("ERRO: Reinício descartado (pool de reinícios cheio ou encerrado).\n")
+            self._release_admission(ticket)
+            self._finish_restart(False)
+
+    def _release_admission(self, ticket):
+        if ticket is not None:
+            self.host.restart_admission.release(ticket)
+
+    def _on_restart_discarded(self, ticket):
+        logging.info(f"Servidor '{self.nome}': Reinício cancelado antes de começar.")
+        self._release_admission(ticket)
+        self._finish_restart(False)
+
+    def _restart_pipeline(self, ticket):
+        # Roda num worker do pool de reinícios, já admitido no limite do host: executa uma única
+        # sequência de reinício e libera a vaga.
+        executou = False
+        try:
+            if self._reinicio_cancelado():
+                logging.info(f"Servidor '{self.nome}': Reinício pendente cancelado antes da execução.")
+                return
+            with self._restart_lock:
+                pedido = dict(self._restart_request)
+            executou = self._executar_logica_reinicio_servico_efetivamente(pedido["agendado"],
+                                                                           pedido["detectado_em"])
+        finally:
+            self._release_admission(ticket)
+            self._finish_restart(executou)
+
+    def _finish_restart(self, executou):
+        with self._restart_lock:
+            self._restart_request = None
+            cooldown_s = max(0, self.settings["restart_cooldown_s"] or 0)
+            if executou and cooldown_s and not self._reinicio_cancelado():
+                self._cooldown_until = time.monotonic() + cooldown_s
+                self._set_restart_state(RESTART_STATE_COOLDOWN, f"{cooldown_s}s")
+                self._cooldown_timer = self.host.log_reactor.call_later(cooldown_s, self._end_cooldown)
+            else:
+                self._set_restart_state(RESTART_STATE_IDLE)
+
+    def _on_queue_position(self, posicao, espera_s):
+        # Thread do reator, chamado pelo RestartAdmissionController
+        if espera_s:
+            detalhe = f"{posicao}º, início em {math.ceil(espera_s)}s"
+        else:
+            detalhe = f"{posicao}º"
+        with self._restart_lock:
+            entrou_na_fila = self.restart_state != RESTART_STATE_QUEUED
+            self._set_restart_state(RESTART_STATE_QUEUED, detalhe)
+        if entrou_na_fila:
+            self._output(f"Reinício aguardando vez no limite de reinícios simultâneos ({detalhe}).\n")
+
+    def _end_cooldown(self):
+        # Thread do reator, ao fim do intervalo mínimo
+        with self._restart_lock:
+            self._cooldown_timer = None
+            if self.restart_state == RESTART_STATE_COOLDOWN:
+                self._set_restart_state(RESTART_STATE_IDLE)
+
+    def _cancel_cooldown_timer(self):
+        # Chamar com _restart_lock
+        if self._cooldown_timer is not None:
+            self._cooldown_timer.cancel()
+            self._cooldown_timer = None
+
+    # --- Sequência de reinício ---
+    def _executar_logica_reinicio_servico_efetivamente(self, is_scheduled_restart=False, detectado_em=None):
+        # Roda dentro de _restart_pipeline. Retorna True se a sequência foi executada (com sucesso
+        # ou não), False se nem começou ou foi cancelada.
+        tipo_reinicio_msg = "agendado" if is_scheduled_restart else "por gatilho de log"
+        config = self.settings
+        nome_servico = config["service_name"]
+        if not nome_servico:
+            self._output(f"ERRO: Nome do serviço não configurado para reinício ({tipo_reinicio_msg}).\n")
+            logging.error(f"Servidor '{self.nome}': Tentativa de reinício ({tipo_reinicio_msg}) sem nome de serviço.")
+            return False
+
+        self._advance_restart_state(RESTART_STATE_STOPPING, nome_servico)
+        self._output(f"--- REINÍCIO {tipo_reinicio_msg.upper()} DO SERVIÇO '{nome_servico}' INICIADO ---\n")
+        inicio_reinicio = time.monotonic()
+        self.restart_timestamps = {"gatilho": detectado_em or inicio_reinicio, "inicio_reinicio": inicio_reinicio}
+        probe = self._criar_readiness_probe(config)
+        try:
+            success = self._operar_servico_com_delays(nome_servico, config, tipo_reinicio_msg)
+            if success and probe:
+                self._advance_restart_state(RESTART_STATE_VERIFYING, probe.pattern)
+                success = self._aguardar_prontidao(probe, inicio_reinicio, config["readiness_timeout_s"])
+        finally:
+            self._readiness_probe = None
+        if self.restart_phase_durations:
+            fases_txt = ", ".join(f"{fase} {duracao:.1f}s" for fase, duracao in self.restart_phase_durations.items())
+            self._output(f"Duração das fases: {fases_txt}\n")
+        if self._reinicio_cancelado():
+            return False  # Reinício interrompido (aba fechada/encerramento) não entra nas métricas
+        self.host.restart_metrics.record(
+            build_restart_record(self.nome, "agendado" if is_scheduled_restart else "gatilho", success,
+                                 self.restart_timestamps))
+        if success:
+            self._output(f"SUCESSO: Serviço '{nome_servico}' reiniciado ({tipo_reinicio_msg}).\n")
+        else:
+            self._output(f"FALHA: Erro ao reiniciar '{nome_servico}' ({tipo_reinicio_msg}). Verifique os logs.\n")
+        if getattr(self.host, "service_status_cache", None) is not None:
+            self.host.service_status_cache.refresh_now(nome_servico)
+        if self.on_restart_finished:
+            self.on_restart_finished(success, nome_servico, tipo_reinicio_msg)
+        return True
+
+    def _criar_readiness_probe(self, config):
+        # Criado antes da parada, para não perder a linha caso o servidor suba rápido
+        pattern = config["readiness_pattern"].strip()
+        if not pattern:
+            return None
+        if not self.log_follower:
+            self._output("AVISO: Linha de prontidão configurada, mas o monitoramento de logs não está ativo. "
+                         "Ignorando.\n")
+            return None
+        try:
+            probe = ReadinessProbe(pattern, regex=config["readiness_regex"], ignore_path=self.current_log_path)
+        except re.error as e:
+            self._output(f"AVISO: Regex de prontidão inválida ({e}). Ignorando.\n")
+            return None
+        self._readiness_probe = probe
+        return probe
+
+    def _aguardar_prontidao(self, probe, inicio_reinicio, timeout_s):
+        self._output(f"Aguardando linha de prontidão '{probe.pattern}' no novo log (timeout {timeout_s}s)...\n")
+        inicio_espera = time.monotonic()
+        pronto = probe.wait(timeout_s, cancelado=self._reinicio_cancelado)
+        self.restart_phase_durations["prontidao"] = time.monotonic() - inicio_espera
+        if not pronto:
+            if not self._reinicio_cancelado():
+                logging.error(f"Servidor '{self.nome}': Servidor não ficou pronto em {timeout_s}s.")
+                self._output(f"ERRO: Linha de prontidão não apareceu em {timeout_s}s após o serviço iniciar.\n")
+            return False
+        self.restart_timestamps["pronto"] = probe.matched_at
+        self.last_time_to_ready_s = probe.matched_at - inicio_reinicio
+        logging.info(f"Servidor '{self.nome}': Servidor pronto {self.last_time_to_ready_s:.1f}s após o início do "
+                     f"reinício. Linha: '{probe.matched_line}'.")
+        self._output(f"Servidor pronto (tempo até prontidão: {self.last_time_to_ready_s:.1f}s).\n")
+        return True
+
+    def _reinicio_cancelado(self):
+        return self._cancel_token.is_set()
+
+    def _aguardar_status_servico(self, verificar_status, nome_servico, status_alvo, prazo_s, fase):
+        # Consulta o status a cada RESTART_STATUS_POLL_INTERVAL_S até atingir status_alvo; o delay
+        # configurado é um prazo, não uma espera fixa. Se no fim do prazo o serviço ainda estiver em
+        # transição (*_PENDING), concede mais um prazo igual antes de desistir. Registra a duração real
+        # da fase em self.restart_phase_durations. Retorna o último status, ou None se cancelado.
+        inicio = time.monotonic()
+        prazo_final = inicio + prazo_s
+        prazo_estendido = False
+        while True:
+            status = verificar_status(nome_servico)
+            agora = time.monotonic()
+            if status == status_alvo:
+                break
+            if agora >= prazo_final:
+                if status in ("START_PENDING", "STOP_PENDING") and not prazo_estendido:
+                    prazo_estendido = True
+                    prazo_final = agora + prazo_s
+                    self._output(
+                        f"Serviço '{nome_servico}' ainda em transição ({status}). Prazo estendido em {prazo_s}s.\n")
+                else:
+                    break
+            if self._stop_event.wait(min(RESTART_STATUS_POLL_INTERVAL_S, max(0.0, prazo_final - agora))) or \
+                    self._reinicio_cancelado():
+                self.restart_phase_durations[fase] = time.monotonic() - inicio
+                return None
+        duracao = time.monotonic() - inicio
+        self.restart_phase_durations[fase] = duracao
+        if status == status_alvo:
+            self.restart_timestamps["parado" if fase == "parada" else "iniciado"] = inicio + duracao
+        logging.info(f"Servidor '{self.nome}': Fase '{fase}' de '{nome_servico}' terminou em {duracao:.1f}s "
+                     f"(status {status}).")
+        return status
+
+    def _operar_servico_com_delays(self, nome_servico_a_gerenciar, config, tipo_reinicio_msg_log=""):
+        self.restart_phase_durations = {}
+        stop_delay_s = config["stop_delay"]
+        start_delay_s = config["start_delay"]
+        os_system = platform.system()
+        if os_system == "Windows":
+            return self._operar_servico_com_delays_windows(nome_servico_a_gerenciar, stop_delay_s, start_delay_s,
+                                                           tipo_reinicio_msg_log)
+        elif os_system == "Linux":
+            if not SYSTEMCTL_AVAILABLE and self.host.service_backend is None:
+                self._output("ERRO: systemctl não disponível para operar serviço no Linux.\n")
+                return False
+            return self._operar_servico_com_delays_linux(nome_servico_a_gerenciar, stop_delay_s, start_delay_s,
+                                                         tipo_reinicio_msg_log)
+        else:
+            self._output(f"ERRO: Operação de serviço não suportada no SO {os_system}.\n")
+            return False
+
+    def _operar_servico_com_delays_windows(self, nome_servico, stop_delay_s, start_delay_s, tipo_reinicio=""):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+        log_prefix = f"Servidor '{self.nome}' ({tipo_reinicio.strip()}) Win:"
+
+        try:
+            # Parar o serviço
+            status_atual = self._verificar_status_servico_win(nome_servico)
+            if status_atual == "RUNNING" or status_atual == "START_PENDING":
+                self._output(f"Parando serviço '{nome_servico}'...\n")
+                subprocess.run(["sc", "stop", nome_servico], check=True, startupinfo=startupinfo, timeout=30)
+                self._output(f"Comando de parada enviado. Aguardando parada (prazo {stop_delay_s}s)...\n")
+
+                status_apos_parada = self._aguardar_status_servico(self._verificar_status_servico_win, nome_servico,
+                                                                   "STOPPED", stop_delay_s, "parada")
+                if status_apos_parada is None:
+                    logging.info(f"{log_prefix} Operação de serviço interrompida durante a parada.")
+                    return False
+                if status_apos_parada != "STOPPED":
+                    logging.warning(
+                        f"{log_prefix} Serviço {nome_servico} não parou como esperado. Status: {status_apos_parada}")
+                    self._output(f"AVISO: Serviço '{nome_servico}' pode não ter parado. Status: {status_apos_parada}\n")
+            elif status_atual == "STOPPED":
+                self._output(f"Serviço '{nome_servico}' já estava parado.\n")
+            elif status_atual == "NOT_FOUND":
+                self._output(f"ERRO: Serviço '{nome_servico}' não encontrado para parada.\n")
+                return False
+            else:
+                self._output(f"ERRO: Estado do serviço '{nome_servico}' desconhecido ou erro ({status_atual}). "
+                             f"Impossível prosseguir com parada segura.\n")
+                return False
+
+            # Iniciar o serviço
+            self._advance_restart_state(RESTART_STATE_STARTING, nome_servico)
+            self._output(f"Iniciando serviço '{nome_servico}'...\n")
+            subprocess.run(["sc", "start", nome_servico], check=True, startupinfo=startupinfo, timeout=30)
+            self._output(f"Comando de início enviado. Aguardando o serviço rodar (prazo {start_delay_s}s)...\n")
+
+            status_final = self._aguardar_status_servico(self._verificar_status_servico_win, nome_servico, "RUNNING",
+                                                         start_delay_s, "inicio")
+            if status_final is None:
+                logging.info(f"{log_prefix} Operação de serviço interrompida durante o início.")
+                return False
+            if status_final == "RUNNING":
+                logging.info(f"{log_prefix} Serviço {nome_servico} iniciado com sucesso.")
+                return True
+            else:
+                logging.error(f"{log_prefix} Serviço {nome_servico} falhou ao iniciar. Status: {status_final}")
+                self._output(f"ERRO: Serviço '{nome_servico}' falhou ao iniciar. Status: {status_final}\n")
+                return False
+
+        except subprocess.CalledProcessError as e_sc:
+            err_output = "N/A"
+            if e_sc.stderr:
+                try:
+                    err_output = e_sc.stderr.decode('latin-1', errors='replace')
+                except:
+                    pass
+            elif e_sc.stdout:
+                try:
+                    err_output = e_sc.stdout.decode('latin-1', errors='replace')
+                except:
+                    pass
+            err_msg = f"Erro 'sc' para '{nome_servico}': {err_output.strip()}"
+            self._output(f"ERRO: {err_msg}\n")
+            logging.error(f"{log_prefix} {err_msg}", exc_info=True)
+            return False
+        except subprocess.TimeoutExpired as e_timeout:
+            self._output(f"ERRO: Timeout ao operar serviço '{nome_servico}': {e_timeout}\n")
+            logging.error(f"{log_prefix} Timeout ao operar serviço '{nome_servico}': {e_timeout}", exc_info=True)
+            return False
+        except FileNotFoundError:
+            self._output("ERRO: Comando 'sc.exe' não encontrado.\n")
+            logging.error(f"{log_prefix} Comando 'sc.exe' não encontrado.")
+            return False
+        except Exception as e:
+            self._output(f"ERRO inesperado ao operar serviço '{nome_servico}': {e}\n")
+            logging.error(f"{log_prefix} Erro inesperado ao operar serviço '{nome_servico}': {e}", exc_info=True)
+            return False
+
+    def _operar_servico_com_delays_linux(self, nome_servico, stop_delay_s, start_delay_s, tipo_reinicio=""):
+        log_prefix = f"Servidor '{self.nome}' ({tipo_reinicio.strip()}) Linux:"
+        nome_servico_systemd = systemd_unit_name(nome_servico)
+
+        try:
+            # Parar o serviço
+            status_atual = self._verificar_status_servico_linux(nome_servico_systemd)
+            if status_atual == "RUNNING" or status_atual == "START_PENDING":
+                self._output(f"Parando serviço '{nome_servico_systemd}'...\n")
+                self._executar_acao_systemd_linux('stop', nome_servico_systemd)
+                self._output(f"Comando de parada enviado. Aguardando parada (prazo {stop_delay_s}s)...\n")
+
+                status_apos_parada = self._aguardar_status_servico(self._verificar_status_servico_linux,
+                                                                   nome_servico_systemd, "STOPPED",
+                                                                   stop_delay_s, "parada")
+                if status_apos_parada is None:
+                    logging.info(f"{log_prefix} Operação de serviço interrompida durante a parada.")
+                    return False
+                if status_apos_parada != "STOPPED":
+                    logging.warning(f"{log_prefix} Serviço {nome_servico_systemd} não parou como esperado. "
+                                    f"Status: {status_apos_parada}")
+                    self._output(f"AVISO: Serviço '{nome_servico_systemd}' pode não ter parado. "
+                                 f"Status: {status_apos_parada}\n")
+            elif status_atual == "STOPPED":
+                self._output(f"Serviço '{nome_servico_systemd}' já estava parado.\n")
+            elif status_atual == "NOT_FOUND":
+                self._output(f"ERRO: Serviço '{nome_servico_systemd}' não encontrado para parada.\n")
+                return False
+            else:
+                self._output(f"ERRO: Estado do serviço '{nome_servico_systemd}' desconhecido ou erro "
+                             f"({status_atual}). Impossível prosseguir com parada segura.\n")
+                return False
+
+            # Iniciar o serviço
+            self._advance_restart_state(RESTART_STATE_STARTING, nome_servico_systemd)
+            self._output(f"Iniciando serviço '{nome_servico_systemd}'...\n")
+            self._executar_acao_systemd_linux('start', nome_servico_systemd)
+            self._output(f"Comando de início enviado. Aguardando o serviço rodar (prazo {start_delay_s}s)...\n")
+
+            status_final = self._aguardar_status_servico(self._verificar_status_servico_linux, nome_servico_systemd,
+                                                         "RUNNING", start_delay_s, "inicio")
+            if status_final is None:
+                logging.info(f"{log_prefix} Operação de serviço interrompida durante o início.")
+                return False
+            if status_final == "RUNNING":
+                logging.info(f"{log_prefix} Serviço {nome_servico_systemd} iniciado com sucesso.")
+                return True
+            else:
+                logging.error(f"{log_prefix} Serviço {nome_servico_systemd} falhou ao iniciar. Status: {status_final}")
+                self._output(f"ERRO: Serviço '{nome_servico_systemd}' falhou ao iniciar. Status: {status_final}\n")
+                return False
+
+        except subprocess.CalledProcessError as e_sysctl:
+            err_output = e_sysctl.stderr.strip() if e_sysctl.stderr else e_sysctl.stdout.strip()
+            err_msg = f"Erro 'systemctl' para '{nome_servico_systemd}': {err_output}"
+            self._output(f"ERRO: {err_msg}\n")
+            logging.error(f"{log_prefix} {err_msg}", exc_info=True)
+            return False
+        except subprocess.TimeoutExpired as e_timeout:
+            self._output(f"ERRO: Timeout ao operar serviço '{nome_servico_systemd}': {e_timeout}\n")
+            logging.error(f"{log_prefix} Timeout ao operar serviço '{nome_servico_systemd}': {e_timeout}",
+                          exc_info=True)
+            return False
+        except FileNotFoundError:
+            self._output("ERRO: Comando 'systemctl' ou 'sudo' não encontrado.\n")
+            logging.error(f"{log_prefix} Comando 'systemctl' ou 'sudo' não encontrado.")
+            return False
+        except Exception as e:
+            self._output(f"ERRO inesperado ao operar serviço '{nome_servico_systemd}': {e}\n")
+            logging.error(f"{log_prefix} Erro inesperado ao operar serviço '{nome_servico_systemd}': {e}",
+                          exc_info=True)
+            return False
+
+    def _executar_acao_systemd_linux(self, acao, nome_servico_systemd):
+        backend = self.host.service_backend
+        if backend is not None:
+            try:
+                backend.unit_action(acao, nome_servico_systemd)
+                return
+            except ServiceBackendError as e:
+                logging.warning(f"Servidor '{self.nome}': D-Bus falhou em '{acao}' de '{nome_servico_systemd}' "
+                                f"({e}). Usando systemctl.")
+        cmd_prefix = []
+        if os.geteuid() != 0:  # Adiciona sudo apenas se não for root
+            cmd_prefix = ['sudo']
+        subprocess.run(cmd_prefix + ['systemctl', acao, nome_servico_systemd], check=True,
+                       capture_output=True, text=True, timeout=30)
+
+    def _verificar_status_servico_win(self, nome_servico_local):
+        if not nome_servico_local: return "NOT_FOUND"
+        try:
+            startupinfo = None
+            if platform.system() == "Windows":
+                startupinfo = subprocess.STARTUPINFO()
+                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                startupinfo.wShowWindow = subprocess.SW_HIDE
+            encodings_to_try = ['latin-1', 'utf-8', 'cp850', 'cp1252']
+            output_text = None
+            for enc in encodings_to_try:
+                try:
+                    result = subprocess.run(
+                        ['sc', 'query', nome_servico_local],
+                        capture_output=True, text=False, check=False, startupinfo=startupinfo
+                    )
+                    stdout_decoded = result.stdout.decode(enc, errors='replace')
+                    stderr_decoded = result.stderr.decode(enc, errors='replace')
+                    output_text = stdout_decoded + stderr_decoded
+                    break
+                except UnicodeDecodeError:
+                    logging.debug(f"Servidor '{self.nome}': Falha decode 'sc query' com {enc} "
+                                  f"para '{nome_servico_local}'.")
+                except Exception as e_run:
+                    logging.error(f"Servidor '{self.nome}': Erro 'sc query' para '{nome_servico_local}': {e_run}",
+                                  exc_info=True)
+                    return "ERROR"
+            if output_text is None:
+                logging.error(f"Servidor '{self.nome}': Impossível decodificar 'sc query' para '{nome_servico_local}'.")
+                return "ERROR"
+            output_lower = output_text.lower()
+            service_not_found_errors = [
+                "failed 1060", "falha 1060", "o servi‡o especificado nÆo existe como servi‡o instalado",
+                "specified service does not exist as an installed service"
+            ]
+            if any(err_str in output_lower for err_str in service_not_found_errors):
+                logging.warning(f"Servidor '{self.nome}': Serviço '{nome_servico_local}' não encontrado. "
+                                f"Output: {output_text[:100]}")
+                return "NOT_FOUND"
+            if "state" not in output_lower:
+                logging.warning(f"Servidor '{self.nome}': Saída 'sc query {nome_servico_local}' inesperada: "
+                                f"{output_text[:100]}")
+                return "ERROR"
+            if "running" in output_lower or "em execu‡Æo" in output_lower: return "RUNNING"
+            if "stopped" in output_lower or "parado" in output_lower: return "STOPPED"
+            if "start_pending" in output_lower or "pendente deinÝcio" in output_lower: return "START_PENDING"
+            if "stop_pending" in output_lower or "pendente deparada" in output_lower: return "STOP_PENDING"
+            logging.info(f"Servidor '{self.nome}': Status desconhecido para '{nome_servico_local}': "
+                         f"{output_text[:100]}")
+            return "UNKNOWN"
+        except FileNotFoundError:
+            logging.error(f"Servidor '{self.nome}': 'sc.exe' não encontrado.", exc_info=True)
+            return "ERROR"
+        except Exception as e:
+            logging.error(f"Servidor '{self.nome}': Erro ao verificar status do serviço '{nome_servico_local}': {e}",
+                          exc_info=True)
+            return "ERROR"
+
+    def _verificar_status_servico_linux(self, nome_servico_local):
+        if not nome_servico_local: return "NOT_FOUND"
+        backend = self.host.service_backend
+        if backend is not None:  # D-Bus: sem fork de sudo/systemctl
+            try:
+                return backend.get_status(systemd_unit_name(nome_servico_local))
+            except ServiceBackendError as e:
+                logging.warning(f"Servidor '{self.nome}': D-Bus falhou ao consultar '{nome_servico_local}' ({e}). "
+                                f"Usando systemctl.")
+        if not SYSTEMCTL_AVAILABLE: return "SYSTEMCTL_NOT_FOUND"
+
+        nomes_a_tentar = [nome_servico_local]
+        if not nome_servico_local.endswith(".service"):
+            nomes_a_tentar.append(f"{nome_servico_local}.service")
+
+        for nome_tentativa in nomes_a_tentar:
+            try:
+                # Usar `sudo` aqui pode não ser ideal se o script inteiro já roda como root.
+                # Se o script já é root, `sudo` é redundante e pode até falhar se `sudo` não estiver configurado para root.
+                # No entanto, se o script NÃO roda como root, `sudo` é necessário.
+                # Para consistência com _operar_servico_com_delays_linux, vamos manter o sudo por enquanto,
+                # assumindo que o script pode não estar rodando como root ou que o sudo é inofensivo se já for root.
+                cmd = ['sudo', 'systemctl', 'is-active', nome_tentativa]
+                if os.geteuid() == 0:  # Se já é root, não precisa de sudo
+                    cmd = ['systemctl', 'is-active', nome_tentativa]
+
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
+                status = result.stdout.strip()
+
+                if result.returncode == 0:  # Comando bem sucedido, status é a palavra chave
+                    if status == "active": return "RUNNING"
+                    if status == "inactive": return "STOPPED"
+                    if status == "activating": return "START_PENDING"
+                    if status == "deactivating": return "STOP_PENDING"
+                    # Outros status como "failed" serão tratados abaixo se returncode não for 0
+                elif result.returncode == 3:  # Serviço inativo/parado
+                    return "STOPPED"
+                elif result.returncode == 4:  # Unidade não encontrada
+                    # Continua para a próxima tentativa de nome (se houver)
+                    continue
+                else:  # Outro erro
+                    logging.warning(
+                        f"Servidor '{self.nome}': 'systemctl is-active {nome_tentativa}' retornou código "
+                        f"{result.returncode}. Output: {status}. Stderr: {result.stderr.strip()}")
+                    # Tenta 'systemctl status' para mais detalhes em caso de 'failed'
+                    if status == "failed": return "ERROR"  # Se is-active reporta failed
+
+                    status_cmd = ['sudo', 'systemctl', 'status', nome_tentativa]
+                    if os.geteuid() == 0:
+                        status_cmd = ['systemctl', 'status', nome_tentativa]
+
+                    status_result = subprocess.run(status_cmd, capture_output=True, text=True, timeout=5)
+                    if "Active: failed" in status_result.stdout:
+                        return "ERROR"
+                    if "Unit " in status_result.stdout and " could not be found." in status_result.stdout:
+                        continue  # Unidade não encontrada, tenta próximo nome
+                    # Se não for um erro claro de 'não encontrado' ou 'failed', retorna UNKNOWN
+                    return "UNKNOWN"
+
+                return "UNKNOWN"  # Se o status não for reconhecido
+
+            except subprocess.TimeoutExpired:
+                logging.error(f"Servidor '{self.nome}': Timeout ao verificar serviço '{nome_tentativa}' no Linux.",
+                              exc_info=True)
+                return "ERROR"
+            except FileNotFoundError:  # systemctl ou sudo não encontrado
+                logging.error(f"Servidor '{self.nome}': Comando 'systemctl' ou 'sudo' não encontrado para verificar "
+                              f"status.", exc_info=True)
+                return "SYSTEMCTL_NOT_FOUND"  # Indica que a ferramenta base está faltando
+            except Exception as e:
+                logging.error(f"Servidor '{self.nome}': Erro ao verificar serviço '{nome_tentativa}' no Linux: {e}",
+                              exc_info=True)
+                return "ERROR"
+        return "NOT_FOUND"  # Se nenhum nome tentado foi encontrado
+
+
+# ==============================================================================
+# CLASSE HeadlessRestarter
+# ==============================================================================
+class HeadlessRestarter:
+    # Roda todos os servidores do JSON sem interface: mesmos motores, reator, scheduler,
+    # backend de serviços e métricas da GUI. As mensagens de cada servidor vão para o log.
+    def __init__(self, config_file=CONFIG_FILENAME):
+        self.config_file = config_file
+        with open(config_file, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self._stop_event = threading.Event()
+        self.log_reactor = LogReactor()
+        self.log_reactor.start()
+        self.restart_scheduler = RestartScheduler(self.log_reactor)
+        self.restart_admission = create_restart_admission(self.config, self.log_reactor)
+        self.worker_pools = create_worker_pools(self.config, self._stop_event)
+        self.service_backend = create_service_backend(self.config)
+        self.restart_metrics = RestartMetrics(METRICS_FILENAME)
+        self.service_status_cache = None  # Sem abas para atualizar: o status é consultado só no reinício
+        self.engines = []
+        for idx, srv_conf in enumerate(self.config.get("servers", [])):
+            self._add_server(srv_conf.get("nome") or f"Servidor {idx + 1}", srv_conf)
+
+    def _add_server(self, nome, srv_conf):
+        engine = ServerEngine(self, nome, srv_conf,
+                              on_output=lambda texto, n=nome: self._log_output(n, texto))
+        engine.set_triggers(TriggerRule.list_from_config(srv_conf))
+        try:
+            engine.set_schedule(ScheduleRuleSet(list(srv_conf.get("scheduled_restarts", [])) +
+                                                list(srv_conf.get("schedule_rules", []))))
+        except ValueError as e:
+            logging.error(f"Servidor '{nome}': Agendamento inválido ignorado: {e}")
+        pasta_raiz = srv_conf.get("log_folder", "")
+        if pasta_raiz:
+            engine.start_log_monitoring(pasta_raiz)
+        proximo = engine.schedule.next_after(datetime.now()) if engine.schedule else None
+        logging.info(f"Servidor '{nome}': serviço '{srv_conf.get('service_name', '')}', "
+                     f"{len(engine.trigger_engine.rules)} gatilho(s), próximo reinício agendado: "
+                     f"{proximo.strftime('%d/%m/%Y %H:%M') if proximo else 'nenhum'}.")
+        self.engines.append(engine)
+
+    @staticmethod
+    def _log_output(nome, texto):
+        for linha in texto.splitlines():
+            if linha.strip():
+                logging.info(f"[{nome}] {linha}")
+
+    def stop(self, *args):
+        self._stop_event.set()
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        logging.info(f"Modo headless: {len(self.engines)} servidor(es) de '{self.config_file}'.")
+        try:
+            while not self._stop_event.wait(1):
+                pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        logging.info("Iniciando processo de encerramento...")
+        for engine in self.engines:
+            engine.close()
+        for pool in self.worker_pools.values():
+            pool.shutdown()
+        self.log_reactor.stop()
+        if self.service_backend:
+            self.service_backend.close()
+        logging.info("Aplicação encerrada.")
+
+
+# ==============================================================================
+# LOG DA APLICAÇÃO (ASSÍNCRONO, COM ROTAÇÃO)
+# ==============================================================================
+# As threads só enfileiram o registro (QueueHandler); a escrita em disco, a rotação e a compressão
+# acontecem na thread do QueueListener, então um disco lento não segura o reator nem a GUI.
+_log_listener = None
+_log_lock = threading.Lock()
+_startup_log_buffer = None
+
+
+class _StartupLogBuffer(logging.Handler):
+    def __init__(self, capacidade=STARTUP_LOG_BUFFER_SIZE):
+        super().__init__()
+        self.registros = deque(maxlen=capacidade)
+
+    def emit(self, record):
+        self.registros.append(record)
+
+
+def buffer_startup_logging():
+    # Guarda na memória os registros emitidos antes de configure_logging (avisos na importação,
+    # erros ao ler a configuração), que então os repassa ao arquivo de log já com nível e rotação
+    # do JSON. Se o processo terminar antes disso, os avisos e erros guardados vão para o stderr.
+    global _startup_log_buffer
+    with _log_lock:
+        if _startup_log_buffer is not None or _log_listener is not None:
+            return
+        _startup_log_buffer = _StartupLogBuffer()
+        root_logger = logging.getLogger()
+        root_logger.addHandler(_startup_log_buffer)
+        root_logger.setLevel(logging.DEBUG)  # O nível configurado é aplicado na hora de repassar
+
+
+def _flush_startup_log_buffer_to_stderr():
+    global _startup_log_buffer
+    with _log_lock:
+        buffer, _startup_log_buffer = _startup_log_buffer, None
+    if buffer is None:
+        return
+    formatter = logging.Formatter(LOG_CONSOLE_FORMAT)
+    for record in buffer.registros:
+        if record.levelno >= logging.WARNING:
+            sys.stderr.write(formatter.format(record) + "\n")
+
+
+atexit.register(_flush_startup_log_buffer_to_stderr)
+
+
+def _gzip_rotator(origem, destino):
+    # Comprime o arquivo que acabou de sair de uso. Se falhar, o log continua no arquivo atual
+    # (o handler o reabre em modo append) e a rotação é tentada de novo no próximo limite.
+    try:
+        with open(origem, 'rb') as f_in, gzip.open(destino, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(origem)
+    except OSError as e:
+        try:
+            os.remove(destino)
+        except OSError:
+            pass
+        sys.stderr.write(f"Falha ao comprimir log rotacionado '{origem}': {e}\n")
+
+
+def create_log_file_handler(config=None, log_file=LOG_FILENAME):
+    config = config or {}
+    backup_count = max(0, int(config.get("log_backup_count", DEFAULT_LOG_BACKUP_COUNT)))
+    if str(config.get("log_rotation", "size")).lower() == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=config.get("log_rotate_when", DEFAULT_LOG_ROTATE_WHEN),
+            backupCount=backup_count, encoding='utf-8')
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, mode='a', maxBytes=max(0, int(config.get("log_max_bytes", DEFAULT_LOG_MAX_BYTES))),
+            backupCount=backup_count, encoding='utf-8')
+    if config.get("log_compress", False):
+        handler.namer = lambda nome: nome + ".gz"
+        handler.rotator = _gzip_rotator
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def _resolve_log_level(nivel):
+    nivel = str(nivel or DEFAULT_LOG_LEVEL).upper()
+    return nivel if nivel in LOG_LEVELS else DEFAULT_LOG_LEVEL
+
+
+def configure_logging(config=None, log_file=LOG_FILENAME, console=False, nivel=None):
+    # Pode ser chamada de novo (ex.: depois de carregar o JSON): o listener anterior é esvaziado e
+    # trocado. console=True mantém uma cópia resumida no stdout (journald, docker logs, etc.).
+    global _log_listener, _startup_log_buffer
+    config = config or {}
+    handlers = [create_log_file_handler(config, log_file)]
+    if console:
+        stdout_handler = logging.StreamHandler(sys.stdout)
+        stdout_handler.setFormatter(logging.Formatter(LOG_CONSOLE_FORMAT))
+        handlers.append(stdout_handler)
+    with _log_lock:
+        stop_logging()
+        buffer, _startup_log_buffer = _startup_log_buffer, None
+        fila = queue.SimpleQueue()
+        root_logger = logging.getLogger()
+        for handler in list(root_logger.handlers):
+            root_logger.removeHandler(handler)
+            handler.close()
+        queue_handler = logging.handlers.QueueHandler(fila)
+        root_logger.addHandler(queue_handler)
+        root_logger.setLevel(_resolve_log_level(nivel or config.get("log_level")))
+        if buffer is not None:
+            # Registros da inicialização entram na fila antes de qualquer outro, na ordem original
+            for record in buffer.registros:
+                if record.levelno >= root_logger.level:
+                    queue_handler.handle(record)
+        _log_listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+        _log_listener.start()
+
+
+def set_log_level(nivel):
+    # Troca o nível em tempo de execução (menu da GUI); o filtro é no logger raiz, antes da fila
+    nivel = _resolve_log_level(nivel)
+    logging.getLogger().setLevel(nivel)
+    return nivel
+
+
+def stop_logging():
+    # Esvazia a fila (o listener grava tudo que já foi enfileirado) e fecha os arquivos
+    global _log_listener
+    listener, _log_listener = _log_listener, None
+    if listener is None:
+        return
+    try:
+        listener.stop()
+    except Exception as e:  # O listener pode já ter sido parado por outra thread
+        sys.stderr.write(f"Falha ao encerrar o listener de log: {e}\n")
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(stop_logging)
+
+
+def handle_unhandled_thread_exception(args):
+    thread_name = args.thread.name if hasattr(args, 'thread') and hasattr(args.thread, 'name') else 'ThreadDesconhecida'
+    logging.critical(f"EXCEÇÃO NÃO TRATADA NA THREAD '{thread_name}':",
+                     exc_info=(args.exc_type, args.exc_value, args.exc_traceback))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PQDT_Raphael Server Auto-Restarter (modo headless, sem Tk)")
+    parser.add_argument("--headless", action="store_true", help="aceito por compatibilidade com a GUI")
+    parser.add_argument("--config", default=CONFIG_FILENAME, help="arquivo JSON de configuração")
+    parser.add_argument("--log-level", default=None, choices=LOG_LEVELS,
+                        help=f"sobrepõe \"log_level\" do JSON (padrão {DEFAULT_LOG_LEVEL})")
+    args = parser.parse_args(argv)
+
+    configure_logging(console=True, nivel=args.log_level)
+    threading.excepthook = handle_unhandled_thread_exception
+    try:
+        try:
+            restarter = HeadlessRestarter(args.config)
+        except (OSError, ValueError) as e:
+            logging.critical(f"Não foi possível carregar a configuração '{args.config}': {e}")
+            return 2
+        # Rotação, compressão e nível definidos no JSON passam a valer a partir daqui
+        configure_logging(restarter.config, console=True, nivel=args.log_level)
+        restarter.run()
+        return 0
+    finally:
+        stop_logging()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,17 +1,25 @@
 import os
 import re
-import time
 import threading
 import json
+import collections
+from types import MappingProxyType
 import subprocess
 import logging
 import platform
+import time
+import sys
+
+# Modo headless (servidores sem desktop): roda só o motor, sem importar Tk/ttkbootstrap
+if __name__ == '__main__' and '--headless' in sys.argv[1:]:
+    from PQD_RestarterEngine import main as headless_main
+
+    sys.exit(headless_main(sys.argv[1:]))
+
+import importlib.util
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-import sys
-import webbrowser
 from datetime import datetime
-import shutil  # Usado para shutil.which para encontrar systemctl
 
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
@@ -20,42 +28,67 @@ from ttkbootstrap.dialogs import Messagebox
 from tkinter import filedialog
 from tkinter.scrolledtext import ScrolledText
 
-try:
-    import pystray
-    from PIL import Image, ImageTk, ImageDraw
+from PQD_RestarterCore import (
+    IncrementalFileReader, DisplayFilter, TriggerEngine, TriggerRule, LogReactor, RestartScheduler, ScheduleRuleSet, RestartMetrics,
+    RESTART_METRICS, ServiceStatusCache, query_systemd_statuses, query_windows_service_statuses, JsonFileStore,
+    TRIGGER_ACTION_RESTART, TRIGGER_ACTION_DELAYED_RESTART, TRIGGER_ACTION_NOTIFY
+)
+from PQD_RestarterEngine import (
+    ServerEngine, create_service_backend, create_restart_admission, create_worker_pools,
+    handle_unhandled_thread_exception, buffer_startup_logging, configure_logging, set_log_level, stop_logging,
+    SYSTEMCTL_AVAILABLE,
+    LOG_FILENAME, LOG_LEVELS, DEFAULT_LOG_LEVEL, CONFIG_FILENAME, METRICS_FILENAME, RESTART_STATE_LABELS, RESTART_STATE_IDLE, RESTART_STATE_QUEUED,
+    RESTART_STATE_COOLDOWN
+)
 
-    PIL_AVAILABLE = True
-    PYSTRAY_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    PYSTRAY_AVAILABLE = False
-    pystray = None
-    logging.warning(
-        "Pillow (PIL) ou pystray não encontrados. Funcionalidades de ícone, imagem de fundo e bandeja estarão limitadas/desabilitadas.")
+if __name__ == '__main__':
+    buffer_startup_logging()  # Avisos abaixo e da leitura da configuração chegam ao arquivo de log
 
-try:
-    import win32com.client
-    import pythoncom
 
-    PYWIN32_AVAILABLE = True
-except ImportError:
-    PYWIN32_AVAILABLE = False
+def _module_available(nome):
+    # Só procura o módulo (sem importá-lo): Pillow, pystray e pywin32 são importados no primeiro
+    # uso, depois que a janela principal já apareceu. Veja benchmarks/bench_startup.py.
+    try:
+        return importlib.util.find_spec(nome) is not None
+    except (ImportError, ValueError):
+        return False
 
-# Checagem mais robusta para systemctl no Linux
-SYSTEMCTL_AVAILABLE = platform.system() == "Linux" and shutil.which('systemctl') is not None
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - [%(threadName)s] - %(module)s.%(funcName)s:%(lineno)d - %(message)s',
-    filename='server_restarter.log',
-    filemode='a',
-    encoding='utf-8'
-)
+PIL_AVAILABLE = _module_available("PIL")
+PYSTRAY_AVAILABLE = PIL_AVAILABLE and _module_available("pystray")
+PYWIN32_AVAILABLE = _module_available("win32com") and _module_available("pythoncom")
+if not PIL_AVAILABLE or not PYSTRAY_AVAILABLE:
+    logging.warning(
+        "Pillow (PIL) ou pystray não encontrados. Funcionalidades de ícone, imagem de fundo e bandeja estarão limitadas/desabilitadas.")
+
+SCHEDULE_PREVIEW_COUNT = 5
+# Salvamento automático: grava depois de AUTOSAVE_DELAY_MS sem novas alterações, mas nunca
+# adia mais que AUTOSAVE_MAX_DELAY_MS numa sequência contínua. "autosave_delay_ms": 0 desliga.
+AUTOSAVE_DELAY_MS = 1500
+AUTOSAVE_MAX_DELAY_MS = 10000
+DISPLAY_FILTER_DEBOUNCE_MS = 200  # Espera após a digitação antes de recompilar o filtro e refiltrar o histórico
+
+# Código de status do serviço -> (texto, cor) exibidos na aba
+SERVICE_STATUS_DISPLAY = {
+    "RUNNING": ("(Rodando)", "green"), "STOPPED": ("(Parado)", "red"),
+    "START_PENDING": ("(Iniciando...)", "blue"), "STOP_PENDING": ("(Parando...)", "blue"),
+    "NOT_FOUND": ("(Não encontrado!)", "orange"), "ERROR": ("(Erro ao verificar!)", "red"),
+    "SYSTEMCTL_NOT_FOUND": ("(systemctl N/A)", "gray"), "UNKNOWN": ("(Desconhecido)", "gray")
+}
+
+# Rótulos exibidos para as ações de gatilho (ação interna -> texto da UI)
+TRIGGER_ACTION_LABELS = {
+    TRIGGER_ACTION_DELAYED_RESTART: "Reiniciar após delay",
+    TRIGGER_ACTION_RESTART: "Reiniciar imediatamente",
+    TRIGGER_ACTION_NOTIFY: "Apenas notificar",
+}
 
 # --- Constantes para Ícones e Imagens ---
 ICON_FILENAME = "predpy.ico"
 BACKGROUND_IMAGE_FILENAME = "predpy.png"
 BACKGROUND_ALPHA_MULTIPLIER = 0.15
+BACKGROUND_RESIZE_DEBOUNCE_MS = 120
+BACKGROUND_CACHE_SIZE = 4  # Tamanhos de janela renderizados mantidos em memória
 
 
 def resource_path(relative_path):
@@ -70,6 +103,30 @@ ICON_PATH = resource_path(ICON_FILENAME)
 BACKGROUND_IMAGE_PATH = resource_path(BACKGROUND_IMAGE_FILENAME)
 
 
+def background_cover_size(tamanho_imagem, largura, altura):
+    # Menor tamanho, na proporção da imagem, que cobre largura x altura
+    img_w, img_h = tamanho_imagem
+    if largura / img_w > altura / img_h:
+        return largura, max(1, int(img_h * (largura / img_w)))
+    return max(1, int(img_w * (altura / img_h))), altura
+
+
+def load_background_master(caminho, largura_tela, altura_tela):
+    # Carrega a imagem de fundo uma única vez: converte para RGBA, aplica o alfa (tabela de 256
+    # valores, em C) e reduz para o tamanho que cobre a tela. Os redimensionamentos partem dessa
+    # matriz, nunca mais do PNG em resolução cheia.
+    from PIL import Image
+    with Image.open(caminho) as original:
+        imagem = original.convert("RGBA")
+    if 0.0 <= BACKGROUND_ALPHA_MULTIPLIER < 1.0:
+        alpha = imagem.getchannel("A").point([int(p * BACKGROUND_ALPHA_MULTIPLIER) for p in range(256)])
+        imagem.putalpha(alpha)
+    tamanho = background_cover_size(imagem.size, largura_tela, altura_tela)
+    if tamanho[0] < imagem.width:
+        imagem = imagem.resize(tamanho, Image.LANCZOS)
+    return imagem
+
+
 # ==============================================================================
 # CLASSE ServidorTab
 # ==============================================================================
@@ -82,62 +139,109 @@ class ServidorTab(ttk.Frame):
 
         self.pasta_raiz = tk.StringVar(value=self.config_inicial.get("log_folder", ""))
         self.nome_servico = tk.StringVar(value=self.config_inicial.get("service_name", ""))
-        self.trigger_log_message_var = tk.StringVar(
-            value=self.config_inicial.get("trigger_log_message", "ServerAdminTools | Event serveradmintools_game_ended")
-        )
+        # Vários gatilhos por servidor, cada um com sua ação; compilados num TriggerEngine
+        # que o LogReactor consulta uma vez por linha.
+        self.trigger_rules = TriggerRule.list_from_config(self.config_inicial)
+        # Motor sem Tk (o mesmo do modo headless): log, gatilhos, agendamento e reinício do serviço.
+        # Recebe a configuração como snapshot (self.settings), republicado a cada alteração.
+        self.settings = MappingProxyType(dict(self.config_inicial))
+        self.engine = ServerEngine(
+            self.app, nome_servidor, self.settings, on_output=self.append_text_to_log_area,
+            on_log_lines=self._on_log_lines, on_status=self.app.set_status_from_thread,
+            on_scheduled_restart=self._on_scheduled_restart, on_restart_finished=self._on_restart_finished,
+            on_restart_state=self._on_restart_state)
+        self._rebuild_trigger_engine()
+        self.new_trigger_pattern_var = tk.StringVar()
+        self.new_trigger_regex_var = tk.BooleanVar(value=False)
+        self.new_trigger_action_var = tk.StringVar(value=TRIGGER_ACTION_LABELS[TRIGGER_ACTION_DELAYED_RESTART])
         self.restart_delay_after_trigger_var = tk.IntVar(
             value=self.config_inicial.get("restart_delay_after_trigger", 10)
         )
         self.auto_restart_on_trigger_var = tk.BooleanVar(
             value=self.config_inicial.get("auto_restart_on_trigger", True)
         )
+        # Intervalo mínimo entre reinícios: pedidos nesse período após um reinício são ignorados
+        self.restart_cooldown_var = tk.IntVar(value=self.config_inicial.get("restart_cooldown_s", 120))
+        self.restart_state_var = tk.StringVar(value=f"Reinício: {RESTART_STATE_LABELS[RESTART_STATE_IDLE]}")
 
         self.log_folder_path_label_var = tk.StringVar(value="Pasta Logs: Nenhuma")
         self.servico_label_var = tk.StringVar(value="Serviço: Nenhum")
 
         self.filtro_var = tk.StringVar(value=self.config_inicial.get("filter", ""))
+        # Filtro de exibição compilado; a thread do reator lê só esta referência
+        try:
+            self._display_filter = DisplayFilter(self.filtro_var.get())
+        except ValueError as e:
+            logging.warning(f"Tab '{nome_servidor}': Filtro de exibição inválido ignorado: {e}")
+            self._display_filter = DisplayFilter()
+        self._filter_job = None
         self.stop_delay_var = tk.IntVar(value=self.config_inicial.get("stop_delay", 10))
         self.start_delay_var = tk.IntVar(value=self.config_inicial.get("start_delay", 30))
         self.auto_scroll_log_var = tk.BooleanVar(value=self.config_inicial.get("auto_scroll_log", True))
+        # Prontidão: o reinício só termina quando esta linha aparece no novo console.log
+        self.readiness_pattern_var = tk.StringVar(value=self.config_inicial.get("readiness_pattern", ""))
+        self.readiness_regex_var = tk.BooleanVar(value=self.config_inicial.get("readiness_regex", False))
+        self.readiness_timeout_var = tk.IntVar(value=self.config_inicial.get("readiness_timeout_s", 300))
+
+        # Entrega de linhas de log em lote: as threads de tail só enfileiram, e a thread da GUI
+        # drena a fila a cada log_flush_interval_ms com um único insert/scroll por lote.
+        self.log_flush_interval_ms = max(10, int(self.config_inicial.get("log_flush_interval_ms", 75)))
+        self.log_batch_max_lines = max(1, int(self.config_inicial.get("log_batch_max_lines", 500)))
+        # Histórico limitado da aba: ring buffer com as últimas log_max_lines linhas brutas, como
+        # (linha, filtrável), sem o filtro aplicado; a área de log mostra as que passam no filtro
+        # atual e é refeita a partir do buffer quando o filtro muda. Fila pendente: uma entrada por
+        # linha, (linha, visível, filtro usado), com filtro None para mensagens do próprio programa;
+        # assim maxlen e log_batch_max_lines contam linhas.
+        self.log_max_lines = max(100, int(self.config_inicial.get("log_max_lines", 5000)))
+        self._log_trim_slack = max(50, self.log_max_lines // 10)
+        self.log_ring_buffer = collections.deque(maxlen=self.log_max_lines)
+        self._pending_log_lines = collections.deque(maxlen=self.log_max_lines)
+        self._log_flush_job = None
 
         self.log_search_var = tk.StringVar()
         self.last_search_pos = "1.0"
         self.search_log_frame_visible = False
 
         self.scheduled_restarts_list = list(self.config_inicial.get("scheduled_restarts", []))
+        self.schedule_rules = list(self.config_inicial.get("schedule_rules", []))  # Regras cron/compactas
+        self.new_schedule_rule_var = tk.StringVar()
+        self.schedule_preview_var = tk.StringVar()
         self.predefined_schedule_vars = {}
         self.custom_schedule_entry_var = tk.StringVar()
-        self.last_scheduled_restart_processed_time_str = None
 
-        self._stop_event = threading.Event()
-        self._scheduler_stop_event = threading.Event()
         self._paused = False
-        self.log_monitor_thread = None
-        self.log_tail_thread = None
-        self.scheduler_thread = None
-        self.file_log_handle = None
-        self.caminho_log_atual = None
         self.pasta_log_detectada_atual = None
+        self._publish_settings()
 
         self._create_ui_for_tab()
+        self._schedule_log_flush()
         self.initialize_from_config_vars()
         self._update_scheduled_restarts_ui_from_list()
 
         vars_to_trace = [
             self.pasta_raiz, self.nome_servico, self.filtro_var,
-            self.trigger_log_message_var, self.auto_restart_on_trigger_var,
+            self.auto_restart_on_trigger_var,
             self.auto_scroll_log_var, self.stop_delay_var, self.start_delay_var,
-            self.restart_delay_after_trigger_var
+            self.restart_delay_after_trigger_var, self.readiness_pattern_var, self.readiness_regex_var,
+            self.readiness_timeout_var, self.restart_cooldown_var
         ]
 
         for var in vars_to_trace:
             var.trace_add("write", lambda *args, v=var: self._value_changed(v.get()))
+        self.filtro_var.trace_add("write", self._on_filter_text_changed)
 
-        self.start_scheduler_thread()
+        self.start_scheduler()
 
     def _value_changed(self, new_value=None):
+        self._publish_settings()
         self.app.mark_config_changed()
 
+    def _publish_settings(self):
+        # Só na thread da GUI: lê as variáveis Tk uma vez e publica um snapshot somente leitura.
+        # As threads do reator e de reinício leem self.settings / engine.settings sem tocar no Tcl.
+        self.settings = MappingProxyType(self.get_current_config())
+        self.engine.update_settings(self.settings)
+
     def get_current_config(self):
         return {
             "nome": self.nome,
@@ -145,12 +249,20 @@ class ServidorTab(ttk.Frame):
             "service_name": self.nome_servico.get(),
             "filter": self.filtro_var.get(),
             "auto_restart_on_trigger": self.auto_restart_on_trigger_var.get(),
-            "trigger_log_message": self.trigger_log_message_var.get(),
+            "triggers": [r.to_dict() for r in self.trigger_rules],
             "restart_delay_after_trigger": self.restart_delay_after_trigger_var.get(),
             "stop_delay": self.stop_delay_var.get(),
             "start_delay": self.start_delay_var.get(),
             "auto_scroll_log": self.auto_scroll_log_var.get(),
-            "scheduled_restarts": sorted(list(set(self.scheduled_restarts_list)))
+            "readiness_pattern": self.readiness_pattern_var.get(),
+            "readiness_regex": self.readiness_regex_var.get(),
+            "readiness_timeout_s": self.readiness_timeout_var.get(),
+            "restart_cooldown_s": self.restart_cooldown_var.get(),
+            "log_flush_interval_ms": self.log_flush_interval_ms,
+            "log_batch_max_lines": self.log_batch_max_lines,
+            "log_max_lines": self.log_max_lines,
+            "scheduled_restarts": sorted(list(set(self.scheduled_restarts_list))),
+            "schedule_rules": list(self.schedule_rules)
         }
 
     def _create_ui_for_tab(self):
@@ -189,6 +301,11 @@ class ServidorTab(ttk.Frame):
         self.servico_label_widget = ttk.Label(path_labels_frame_line1, textvariable=self.servico_label_var, anchor='w',
                                               width=30)
         self.servico_label_widget.pack(side='left', padx=(5, 0))
+        self.restart_state_label = ttk.Label(path_labels_frame_line1, textvariable=self.restart_state_var, anchor='w',
+                                             width=28)
+        self.restart_state_label.pack(side='left', padx=(5, 0))
+        ToolTip(self.restart_state_label, text="Etapa atual do reinício deste servidor. Gatilhos repetidos durante "
+                                               "um reinício são agrupados nele.")
 
         controls_labelframe = ttk.Labelframe(outer_top_frame, text="Controles de Log", padding=(10, 5))
         controls_labelframe.pack(side='top', fill='x', pady=(5, 0))
@@ -199,7 +316,11 @@ class ServidorTab(ttk.Frame):
         ttk.Label(log_controls_subframe, text="Filtro:").pack(side='left', padx=(0, 5))
         self.filtro_entry = ttk.Entry(log_controls_subframe, textvariable=self.filtro_var, width=20)
         self.filtro_entry.pack(side='left', padx=(0, 5))
-        ToolTip(self.filtro_entry, text="Filtra as linhas de log exibidas (case-insensitive).")
+        ToolTip(self.filtro_entry, text="Filtra as linhas de log exibidas (sem diferenciar maiúsculas):\n"
+                                        "termo \"frase\"  mostra linhas com qualquer termo\n"
+                                        "-termo  esconde; re:regex / -re:regex\n"
+                                        "level:error,warning  só esses níveis\n"
+                                        "cat:engine / -cat:script  categorias do console.log")
 
         self.pausar_btn = ttk.Button(log_controls_subframe, text="⏸️ Pausar", command=self.toggle_pausa,
                                      bootstyle=WARNING)
@@ -252,38 +373,187 @@ class ServidorTab(ttk.Frame):
         self.auto_restart_check.grid(row=0, column=0, sticky='w', padx=5, pady=5, columnspan=2)
         ToolTip(self.auto_restart_check, "Se marcado, o servidor será reiniciado após o gatilho de log ser detectado.")
 
-        ttk.Label(options_inner_frame, text="Mensagem de Log para Gatilho de Reinício:").grid(row=1, column=0,
-                                                                                              sticky='w', padx=5,
-                                                                                              pady=(10, 0))
-        trigger_message_entry = ttk.Entry(options_inner_frame, textvariable=self.trigger_log_message_var, width=60)
-        trigger_message_entry.grid(row=2, column=0, sticky='ew', padx=5, pady=2, columnspan=2)
-        ToolTip(trigger_message_entry, "A linha de log (ou parte dela) que acionará o reinício do servidor.")
+        ttk.Label(options_inner_frame, text="Gatilhos de Log:").grid(row=1, column=0, sticky='w', padx=5,
+                                                                     pady=(10, 0))
+        self._create_triggers_ui(options_inner_frame).grid(row=2, column=0, sticky='ew', padx=5, pady=2,
+                                                           columnspan=2)
 
         ttk.Label(options_inner_frame, text="Delay para Reiniciar após Gatilho (s):").grid(row=3, column=0, sticky='w',
                                                                                            padx=5, pady=(10, 0))
-        restart_delay_spinbox = ttk.Spinbox(options_inner_frame, from_=0, to=300,
+        restart_timing_frame = ttk.Frame(options_inner_frame)
+        restart_timing_frame.grid(row=4, column=0, columnspan=2, sticky='ew', pady=2)
+        restart_delay_spinbox = ttk.Spinbox(restart_timing_frame, from_=0, to=300,
                                             textvariable=self.restart_delay_after_trigger_var, width=5)
-        restart_delay_spinbox.grid(row=4, column=0, sticky='w', padx=5, pady=2)
+        restart_delay_spinbox.pack(side='left', padx=5)
         ToolTip(restart_delay_spinbox,
                 "Tempo (s) para aguardar ANTES de iniciar o processo de reinício, após o gatilho ser detectado.")
+        ttk.Label(restart_timing_frame, text="Intervalo Mínimo entre Reinícios (s):").pack(side='left', padx=(15, 5))
+        cooldown_spinbox = ttk.Spinbox(restart_timing_frame, from_=0, to=3600,
+                                       textvariable=self.restart_cooldown_var, width=6)
+        cooldown_spinbox.pack(side='left', padx=5)
+        ToolTip(cooldown_spinbox, "Após um reinício, novos gatilhos e agendamentos são ignorados por este tempo (s). "
+                                  "0 = desativado.")
 
         delay_frame = ttk.Frame(options_inner_frame)
         delay_frame.grid(row=5, column=0, columnspan=2, sticky='ew', pady=(20, 0))
         ttk.Label(delay_frame, text="Delay Parar Serviço (s):").pack(side='left', padx=5)
         stop_delay_spinbox = ttk.Spinbox(delay_frame, from_=1, to=60, textvariable=self.stop_delay_var, width=5)
         stop_delay_spinbox.pack(side='left', padx=5)
-        ToolTip(stop_delay_spinbox, "Tempo (s) para aguardar após comando de parada do serviço.")
+        ToolTip(stop_delay_spinbox, "Prazo máximo (s) para o serviço parar após o comando de parada. "
+                                    "O reinício segue assim que o serviço estiver parado.")
 
         ttk.Label(delay_frame, text="Delay Iniciar Serviço (s):").pack(side='left', padx=15)
         start_delay_spinbox = ttk.Spinbox(delay_frame, from_=5, to=180, textvariable=self.start_delay_var, width=5)
         start_delay_spinbox.pack(side='left', padx=5)
-        ToolTip(start_delay_spinbox, "Tempo (s) para aguardar o serviço iniciar completamente.")
+        ToolTip(start_delay_spinbox, "Prazo máximo (s) para o serviço estar rodando após o comando de início.")
+
+        ttk.Label(options_inner_frame, text="Linha de Prontidão no Log (vazio = desativado):").grid(
+            row=6, column=0, sticky='w', padx=5, pady=(20, 0))
+        readiness_frame = ttk.Frame(options_inner_frame)
+        readiness_frame.grid(row=7, column=0, columnspan=2, sticky='ew', pady=2)
+        readiness_entry = ttk.Entry(readiness_frame, textvariable=self.readiness_pattern_var)
+        readiness_entry.pack(side='left', fill='x', expand=True, padx=5)
+        ToolTip(readiness_entry, "Linha do console.log que indica que o servidor está pronto para conexões. "
+                                 "O reinício só é concluído quando ela aparece no log da nova pasta logs_*.")
+        ttk.Checkbutton(readiness_frame, text="Regex", variable=self.readiness_regex_var).pack(side='left', padx=5)
+        ttk.Label(readiness_frame, text="Timeout (s):").pack(side='left', padx=(10, 5))
+        readiness_timeout_spinbox = ttk.Spinbox(readiness_frame, from_=10, to=3600,
+                                                textvariable=self.readiness_timeout_var, width=6)
+        readiness_timeout_spinbox.pack(side='left', padx=5)
+        ToolTip(readiness_timeout_spinbox, "Tempo máximo (s), após o serviço rodar, para a linha de prontidão aparecer.")
         options_inner_frame.columnconfigure(0, weight=1)
 
         self.scheduled_restarts_frame = ttk.Frame(self.tab_notebook, padding=10)
         self.tab_notebook.add(self.scheduled_restarts_frame, text="Reinícios Agendados")
         self._create_scheduled_restarts_ui(self.scheduled_restarts_frame)
 
+        stats_frame = ttk.Frame(self.tab_notebook, padding=10)
+        self.tab_notebook.add(stats_frame, text="Estatísticas")
+        self._create_stats_ui(stats_frame)
+
+    def _create_stats_ui(self, parent_frame):
+        self.stats_success_var = tk.StringVar(value="Nenhum reinício registrado.")
+        ttk.Label(parent_frame, textvariable=self.stats_success_var).pack(fill='x', pady=(0, 5))
+
+        colunas = ("amostras", "p50", "p95", "max")
+        self.stats_tree = ttk.Treeview(parent_frame, columns=colunas, show="tree headings", height=len(RESTART_METRICS))
+        self.stats_tree.heading("#0", text="Métrica")
+        self.stats_tree.column("#0", width=220)
+        for coluna, titulo in zip(colunas, ("Amostras", "p50 (s)", "p95 (s)", "Máx (s)")):
+            self.stats_tree.heading(coluna, text=titulo)
+            self.stats_tree.column(coluna, width=80, anchor="e")
+        self.stats_tree.pack(fill='both', expand=True)
+        ToolTip(self.stats_tree, "Durações dos reinícios bem-sucedidos na janela recente. "
+                                 "Indisponibilidade = do início do reinício até o servidor rodar/ficar pronto.")
+
+        ttk.Button(parent_frame, text="Exportar Métricas...", command=lambda: self.app.export_restart_metrics([self]),
+                   bootstyle=SECONDARY).pack(anchor='e', pady=(5, 0))
+        self.refresh_stats_panel()
+
+    def refresh_stats_panel(self):
+        if not hasattr(self, 'stats_tree') or not self.stats_tree.winfo_exists():
+            return
+        resumo = self.app.restart_metrics.summary(self.nome)
+        if resumo["reinicios"]:
+            self.stats_success_var.set(
+                f"Taxa de sucesso (últimos {resumo['reinicios']}): {resumo['taxa_sucesso']:.0%} "
+                f"({resumo['sucessos']}/{resumo['reinicios']})")
+        else:
+            self.stats_success_var.set("Nenhum reinício registrado.")
+
+        def fmt(valor):
+            return "-" if valor is None else f"{valor:.1f}"
+
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for chave, rotulo in RESTART_METRICS:
+            m = resumo["metricas"][chave]
+            self.stats_tree.insert("", "end", text=rotulo, values=(m["amostras"], fmt(m["p50"]), fmt(m["p95"]),
+                                                                   fmt(m["max"])))
+
+    def _create_triggers_ui(self, parent_frame):
+        triggers_frame = ttk.Frame(parent_frame)
+
+        list_frame = ttk.Frame(triggers_frame)
+        list_frame.pack(fill='x')
+        self.triggers_treeview = ttk.Treeview(list_frame, columns=("pattern", "type", "action"), show="headings",
+                                              selectmode="browse", height=4)
+        self.triggers_treeview.heading("pattern", text="Padrão")
+        self.triggers_treeview.heading("type", text="Tipo")
+        self.triggers_treeview.heading("action", text="Ação")
+        self.triggers_treeview.column("pattern", width=360, stretch=tk.YES)
+        self.triggers_treeview.column("type", width=60, stretch=tk.NO)
+        self.triggers_treeview.column("action", width=160, stretch=tk.NO)
+        self.triggers_treeview.pack(side='left', fill='x', expand=True)
+        triggers_scroll = ttk.Scrollbar(list_frame, orient=VERTICAL, command=self.triggers_treeview.yview)
+        triggers_scroll.pack(side='left', fill='y')
+        self.triggers_treeview.config(yscrollcommand=triggers_scroll.set)
+
+        add_frame = ttk.Frame(triggers_frame)
+        add_frame.pack(fill='x', pady=(5, 0))
+        trigger_entry = ttk.Entry(add_frame, textvariable=self.new_trigger_pattern_var, width=40)
+        trigger_entry.pack(side='left', fill='x', expand=True, padx=(0, 5))
+        ToolTip(trigger_entry, "A linha de log (ou parte dela) que acionará o gatilho.")
+        regex_check = ttk.Checkbutton(add_frame, text="Regex", variable=self.new_trigger_regex_var)
+        regex_check.pack(side='left', padx=5)
+        ToolTip(regex_check, "Interpreta o padrão como expressão regular.")
+        action_combo = ttk.Combobox(add_frame, textvariable=self.new_trigger_action_var, state="readonly",
+                                    values=list(TRIGGER_ACTION_LABELS.values()), width=22)
+        action_combo.pack(side='left', padx=5)
+        ttk.Button(add_frame, text="+ Adicionar", command=self._add_trigger_rule, bootstyle=SUCCESS).pack(
+            side='left', padx=5)
+        ttk.Button(add_frame, text="- Remover", command=self._remove_selected_trigger_rule, bootstyle=DANGER).pack(
+            side='left', padx=(5, 0))
+
+        self._update_triggers_ui_from_list()
+        return triggers_frame
+
+    def _update_triggers_ui_from_list(self):
+        if not hasattr(self, 'triggers_treeview') or not self.triggers_treeview.winfo_exists():
+            return
+        self.triggers_treeview.delete(*self.triggers_treeview.get_children())
+        for regra in self.trigger_rules:
+            self.triggers_treeview.insert("", "end", values=(regra.pattern, "Regex" if regra.regex else "Texto",
+                                                             TRIGGER_ACTION_LABELS[regra.action]))
+
+    def _rebuild_trigger_engine(self):
+        # Regex inválidos são descartados (com aviso no log) pelo motor da aba
+        self.engine.set_triggers(self.trigger_rules)
+
+    def _add_trigger_rule(self):
+        padrao = self.new_trigger_pattern_var.get().strip()
+        if not padrao:
+            self.app.show_messagebox_from_thread("warning", "Gatilho Vazio", "Digite o texto do gatilho.")
+            return
+        is_regex = self.new_trigger_regex_var.get()
+        if is_regex:
+            erro = TriggerEngine.validate_regex(padrao)
+            if erro:
+                self.app.show_messagebox_from_thread("error", "Regex Inválido",
+                                                     f"A expressão '{padrao}' é inválida:\n{erro}")
+                return
+        acao = next((a for a, rotulo in TRIGGER_ACTION_LABELS.items()
+                     if rotulo == self.new_trigger_action_var.get()), TRIGGER_ACTION_DELAYED_RESTART)
+        if any(r.pattern == padrao and r.regex == is_regex for r in self.trigger_rules):
+            self.app.show_messagebox_from_thread("info", "Gatilho Duplicado", f"O gatilho '{padrao}' já existe.")
+            return
+        self.trigger_rules.append(TriggerRule(padrao, acao, is_regex))
+        self._rebuild_trigger_engine()
+        self._update_triggers_ui_from_list()
+        self.new_trigger_pattern_var.set("")
+        self._value_changed()
+
+    def _remove_selected_trigger_rule(self):
+        selection = self.triggers_treeview.selection()
+        if not selection:
+            self.app.show_messagebox_from_thread("warning", "Nenhuma Seleção", "Selecione um gatilho para remover.")
+            return
+        idx = self.triggers_treeview.index(selection[0])
+        if 0 <= idx < len(self.trigger_rules):
+            del self.trigger_rules[idx]
+            self._rebuild_trigger_engine()
+            self._update_triggers_ui_from_list()
+            self._value_changed()
+
     def _create_scheduled_restarts_ui(self, parent_frame):
         predefined_lf = ttk.Labelframe(parent_frame, text="Horários Pré-definidos (HH:00)", padding=10)
         predefined_lf.pack(fill="x", pady=5)
@@ -327,6 +597,75 @@ class ServidorTab(ttk.Frame):
         remove_btn.pack(side="left", padx=(5, 0), anchor="n")
         ToolTip(remove_btn, "Remove o horário personalizado selecionado na lista.")
 
+        rules_lf = ttk.Labelframe(parent_frame, text="Regras Avançadas (cron / compactas)", padding=10)
+        rules_lf.pack(fill="both", expand=True, pady=5)
+
+        rules_add_frame = ttk.Frame(rules_lf)
+        rules_add_frame.pack(fill="x", pady=(0, 5))
+        ttk.Label(rules_add_frame, text="Nova regra:").pack(side="left", padx=(0, 5))
+        rule_entry = ttk.Entry(rules_add_frame, textvariable=self.new_schedule_rule_var, width=28)
+        rule_entry.pack(side="left", padx=5, fill="x", expand=True)
+        rule_entry.bind("<Return>", lambda e: self._add_schedule_rule())
+        ToolTip(rule_entry, "Exemplos: 'seg,qui 05:30' | '@every 90m' | '@every 4h seg-sex' | "
+                            "'30 5 * * 1,4' (cron) | '!sab,dom 18:00-23:59' (exclui a janela)")
+        ttk.Button(rules_add_frame, text="+ Adicionar", command=self._add_schedule_rule,
+                   bootstyle=SUCCESS).pack(side="left", padx=5)
+
+        rules_list_frame = ttk.Frame(rules_lf)
+        rules_list_frame.pack(fill="both", expand=True)
+        self.schedule_rules_listbox = tk.Listbox(rules_list_frame, selectmode=tk.SINGLE, height=4)
+        self.schedule_rules_listbox.pack(side="left", fill="both", expand=True, padx=(0, 5))
+        ttk.Button(rules_list_frame, text="- Remover Selecionada", command=self._remove_selected_schedule_rule,
+                   bootstyle=DANGER).pack(side="left", padx=(5, 0), anchor="n")
+
+        preview_lf = ttk.Labelframe(parent_frame, text=f"Próximos {SCHEDULE_PREVIEW_COUNT} Reinícios", padding=10)
+        preview_lf.pack(fill="x", pady=5)
+        ttk.Label(preview_lf, textvariable=self.schedule_preview_var, justify="left",
+                  anchor="w").pack(fill="x")
+
+    def _build_schedule(self):
+        # Horários HH:MM e regras avançadas são compilados juntos num único iterador de disparos
+        return ScheduleRuleSet(list(self.scheduled_restarts_list) + list(self.schedule_rules))
+
+    def _refresh_schedule_preview(self):
+        if not hasattr(self, 'schedule_rules_listbox') or not self.schedule_rules_listbox.winfo_exists():
+            return
+        self.schedule_rules_listbox.delete(0, tk.END)
+        for regra in self.schedule_rules:
+            self.schedule_rules_listbox.insert(tk.END, regra)
+        try:
+            proximos = self._build_schedule().upcoming(datetime.now(), SCHEDULE_PREVIEW_COUNT)
+        except ValueError as e:
+            self.schedule_preview_var.set(f"Agendamento inválido: {e}")
+            return
+        if proximos:
+            self.schedule_preview_var.set("\n".join(h.strftime("%a %d/%m/%Y %H:%M") for h in proximos))
+        else:
+            self.schedule_preview_var.set("Nenhum reinício agendado.")
+
+    def _add_schedule_rule(self):
+        regra = self.new_schedule_rule_var.get().strip()
+        erro = ScheduleRuleSet.validate(regra)
+        if erro:
+            self.app.show_messagebox_from_thread("error", "Regra Inválida", erro)
+            return
+        if regra in self.schedule_rules:
+            self.app.show_messagebox_from_thread("info", "Regra Duplicada", f"A regra '{regra}' já está na lista.")
+            return
+        self.schedule_rules.append(regra)
+        self.new_schedule_rule_var.set("")
+        self._publish_schedule()
+        self._value_changed()
+
+    def _remove_selected_schedule_rule(self):
+        selection_indices = self.schedule_rules_listbox.curselection()
+        if not selection_indices:
+            self.app.show_messagebox_from_thread("warning", "Nenhuma Seleção", "Selecione uma regra para remover.")
+            return
+        del self.schedule_rules[selection_indices[0]]
+        self._publish_schedule()
+        self._value_changed()
+
     def _update_scheduled_restarts_ui_from_list(self):
         if not hasattr(self, 'predefined_schedule_vars') or not hasattr(self, 'custom_schedules_listbox'):
             return
@@ -352,6 +691,7 @@ class ServidorTab(ttk.Frame):
             if hour_str in self.scheduled_restarts_list:
                 self.scheduled_restarts_list.remove(hour_str)
         self.scheduled_restarts_list = sorted(list(set(self.scheduled_restarts_list)))
+        self._publish_schedule()
         self._value_changed()
 
     def _add_custom_schedule(self):
@@ -367,6 +707,7 @@ class ServidorTab(ttk.Frame):
         self.scheduled_restarts_list.append(time_str)
         self.scheduled_restarts_list = sorted(list(set(self.scheduled_restarts_list)))
         self._update_scheduled_restarts_ui_from_list()
+        self._publish_schedule()
         self.custom_schedule_entry_var.set("")
         self._value_changed()
 
@@ -379,52 +720,29 @@ class ServidorTab(ttk.Frame):
         if selected_time_str in self.scheduled_restarts_list:
             self.scheduled_restarts_list.remove(selected_time_str)
             self._update_scheduled_restarts_ui_from_list()
+            self._publish_schedule()
             self._value_changed()
 
-    def start_scheduler_thread(self):
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
+    def start_scheduler(self):
+        self.engine.start_scheduler()
+        self._publish_schedule()
+
+    def stop_scheduler(self, from_tab_closure=False):
+        self.engine.stop_scheduler()
+
+    def _publish_schedule(self):
+        # Entrega os horários ao motor da aba, que os publica no scheduler global
+        self._refresh_schedule_preview()
+        try:
+            schedule = self._build_schedule()
+        except ValueError as e:
+            logging.error(f"Tab '{self.nome}': Agendamento inválido ignorado: {e}")
             return
-        self._scheduler_stop_event.clear()
-        self.scheduler_thread = threading.Thread(target=self._scheduler_worker, daemon=True,
-                                                 name=f"Scheduler-{self.nome}")
-        self.scheduler_thread.start()
-        logging.info(f"Tab '{self.nome}': Scheduler de reinícios agendados iniciado.")
-
-    def stop_scheduler_thread(self, from_tab_closure=False):
-        self._scheduler_stop_event.set()
-        if self.scheduler_thread and self.scheduler_thread.is_alive() and self.scheduler_thread != threading.current_thread():
-            self.scheduler_thread.join(timeout=2.0)
-        self.scheduler_thread = None
-
-    def _scheduler_worker(self):
-        while not self._scheduler_stop_event.is_set():
-            try:
-                current_time_str_hh_mm = datetime.now().strftime("%H:%M")
-                if self.last_scheduled_restart_processed_time_str != current_time_str_hh_mm:
-                    self.last_scheduled_restart_processed_time_str = None
-
-                service_to_restart = self.nome_servico.get()
-                if not service_to_restart or not self.scheduled_restarts_list:
-                    if self._scheduler_stop_event.wait(20): break
-                    continue
-
-                if (current_time_str_hh_mm in self.scheduled_restarts_list and
-                        self.last_scheduled_restart_processed_time_str != current_time_str_hh_mm):
-                    logging.info(
-                        f"Tab '{self.nome}': Disparando reinício agendado para '{service_to_restart}' às {current_time_str_hh_mm}.")
-                    self.append_text_to_log_area_threadsafe(
-                        f"--- REINÍCIO AGENDADO ({current_time_str_hh_mm}) INICIADO ---\n")
-                    threading.Thread(
-                        target=self._executar_logica_reinicio_servico_efetivamente,
-                        args=(True,), daemon=True, name=f"ScheduledRestartExec-{self.nome}"
-                    ).start()
-                    self.last_scheduled_restart_processed_time_str = current_time_str_hh_mm
-            except Exception as e_scheduler:
-                logging.error(f"Tab '{self.nome}': Erro no _scheduler_worker: {e_scheduler}", exc_info=True)
-
-            if self._scheduler_stop_event.wait(15):
-                break
-        logging.info(f"Tab '{self.nome}': Thread _scheduler_worker encerrada.")
+        self.engine.set_schedule(schedule)
+
+    def _on_scheduled_restart(self, horario):
+        # Executa na thread do LogReactor
+        self.app.root.after(0, self._refresh_schedule_preview)
 
     def initialize_from_config_vars(self):
         default_fg = "black"
@@ -481,7 +799,7 @@ class ServidorTab(ttk.Frame):
                 self.servico_label_widget.config(foreground="orange")
 
         self._update_scheduled_restarts_ui_from_list()
-        self.start_scheduler_thread()
+        self.start_scheduler()
 
     def selecionar_pasta(self):
         pasta_selecionada = filedialog.askdirectory(title=f"Selecione a pasta de logs para '{self.nome}'")
@@ -515,629 +833,213 @@ class ServidorTab(ttk.Frame):
             self.app.set_status_from_thread(f"Serviço '{service_name}' selecionado para '{self.nome}'.")
             logging.info(f"Tab '{self.nome}': Serviço selecionado: {service_name}")
 
-    def update_service_status_display(self):
+    def update_service_status_display(self, force_refresh=False):
         nome_servico_val = self.nome_servico.get()
         if not nome_servico_val:
+            self.app.service_status_cache.unsubscribe(self)
             self.initialize_from_config_vars()  # Re-avalia o estado dos botões, etc.
             return
 
         os_system = platform.system()
-        current_text_base = f"Serviço: {nome_servico_val}"
-        worker = None
-
         if os_system == "Windows":
             if not PYWIN32_AVAILABLE:  # Checagem adicional
                 self.initialize_from_config_vars()
                 return
-            worker = self._get_and_display_service_status_win_thread_worker
         elif os_system == "Linux":
-            if not SYSTEMCTL_AVAILABLE:
+            if not SYSTEMCTL_AVAILABLE and self.app.service_backend is None:
                 self.initialize_from_config_vars()
                 return
-            worker = self._get_and_display_service_status_linux_thread_worker
         else:
             self.initialize_from_config_vars()
             return
 
-        self.servico_label_var.set(f"{current_text_base} (Verificando...)")
-        self.servico_label_widget.config(foreground="blue")
-        threading.Thread(
-            target=worker,
-            args=(nome_servico_val, current_text_base),
-            daemon=True,
-            name=f"ServiceStatusCheck-{self.nome}"
-        ).start()
-
-    def _get_and_display_service_status_win_thread_worker(self, service_name, base_text):
-        status = self._verificar_status_servico_win(service_name)
-        status_map = {
-            "RUNNING": ("(Rodando)", "green"), "STOPPED": ("(Parado)", "red"),
-            "START_PENDING": ("(Iniciando...)", "blue"), "STOP_PENDING": ("(Parando...)", "blue"),
-            "NOT_FOUND": ("(Não encontrado!)", "orange"), "ERROR": ("(Erro ao verificar!)", "red"),
-            "UNKNOWN": ("(Desconhecido)", "gray")
-        }
-        display_text, color = status_map.get(status, ("(Status ?)", "gray"))
-        if self.app.root.winfo_exists() and self.winfo_exists():
-            self.app.root.after(0, lambda: (
-                self.servico_label_var.set(f"{base_text} {display_text}"),
-                self.servico_label_widget.config(foreground=color)
-            ))
-
-    def _get_and_display_service_status_linux_thread_worker(self, service_name, base_text):
-        status = self._verificar_status_servico_linux(service_name)
-        status_map = {
-            "RUNNING": ("(Rodando)", "green"), "STOPPED": ("(Parado)", "red"),
-            "START_PENDING": ("(Iniciando...)", "blue"), "STOP_PENDING": ("(Parando...)", "blue"),
-            "NOT_FOUND": ("(Não encontrado!)", "orange"), "ERROR": ("(Erro ao verificar!)", "red"),
-            "SYSTEMCTL_NOT_FOUND": ("(systemctl N/A)", "gray"), "UNKNOWN": ("(Desconhecido)", "gray")
-        }
-        display_text, color = status_map.get(status, ("(Status ?)", "gray"))
-        if self.app.root.winfo_exists() and self.winfo_exists():
-            self.app.root.after(0, lambda: (
-                self.servico_label_var.set(f"{base_text} {display_text}"),
-                self.servico_label_widget.config(foreground=color)
-            ))
-
-    def _verificar_status_servico_win(self, nome_servico_local):
-        if not PYWIN32_AVAILABLE: return "ERROR"
-        if not nome_servico_local: return "NOT_FOUND"
-        try:
-            startupinfo = None
-            if platform.system() == "Windows":
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            encodings_to_try = ['latin-1', 'utf-8', 'cp850', 'cp1252']
-            output_text = None
-            for enc in encodings_to_try:
-                try:
-                    result = subprocess.run(
-                        ['sc', 'query', nome_servico_local],
-                        capture_output=True, text=False, check=False, startupinfo=startupinfo
-                    )
-                    stdout_decoded = result.stdout.decode(enc, errors='replace')
-                    stderr_decoded = result.stderr.decode(enc, errors='replace')
-                    output_text = stdout_decoded + stderr_decoded
-                    break
-                except UnicodeDecodeError:
-                    logging.debug(f"Tab '{self.nome}': Falha decode 'sc query' com {enc} para '{nome_servico_local}'.")
-                except Exception as e_run:
-                    logging.error(f"Tab '{self.nome}': Erro 'sc query' para '{nome_servico_local}': {e_run}",
-                                  exc_info=True)
-                    return "ERROR"
-            if output_text is None:
-                logging.error(f"Tab '{self.nome}': Impossível decodificar 'sc query' para '{nome_servico_local}'.")
-                return "ERROR"
-            output_lower = output_text.lower()
-            service_not_found_errors = [
-                "failed 1060", "falha 1060", "o servi‡o especificado nÆo existe como servi‡o instalado",
-                "specified service does not exist as an installed service"
-            ]
-            if any(err_str in output_lower for err_str in service_not_found_errors):
-                logging.warning(
-                    f"Tab '{self.nome}': Serviço '{nome_servico_local}' não encontrado. Output: {output_text[:100]}")
-                return "NOT_FOUND"
-            if "state" not in output_lower:
-                logging.warning(
-                    f"Tab '{self.nome}': Saída 'sc query {nome_servico_local}' inesperada: {output_text[:100]}")
-                return "ERROR"
-            if "running" in output_lower or "em execu‡Æo" in output_lower: return "RUNNING"
-            if "stopped" in output_lower or "parado" in output_lower: return "STOPPED"
-            if "start_pending" in output_lower or "pendente deinÝcio" in output_lower: return "START_PENDING"
-            if "stop_pending" in output_lower or "pendente deparada" in output_lower: return "STOP_PENDING"
-            logging.info(f"Tab '{self.nome}': Status desconhecido para '{nome_servico_local}': {output_text[:100]}")
-            return "UNKNOWN"
-        except FileNotFoundError:
-            logging.error(f"Tab '{self.nome}': 'sc.exe' não encontrado.", exc_info=True)
-            return "ERROR"
-        except Exception as e:
-            logging.error(f"Tab '{self.nome}': Erro ao verificar status do serviço '{nome_servico_local}': {e}",
-                          exc_info=True)
-            return "ERROR"
-
-    def _verificar_status_servico_linux(self, nome_servico_local):
-        if not SYSTEMCTL_AVAILABLE: return "SYSTEMCTL_NOT_FOUND"
-        if not nome_servico_local: return "NOT_FOUND"
+        # O status vem do cache compartilhado (uma consulta em lote para todas as abas); mudanças
+        # chegam por _on_service_status_changed.
+        cache = self.app.service_status_cache
+        status = cache.subscribe(self, nome_servico_val, self._on_service_status_changed)
+        if force_refresh:
+            status = None
+            cache.refresh_now(nome_servico_val)
+        if status is not None:
+            self._show_service_status(nome_servico_val, status)
+        else:
+            self.servico_label_var.set(f"Serviço: {nome_servico_val} (Verificando...)")
+            self.servico_label_widget.config(foreground="blue")
 
-        nomes_a_tentar = [nome_servico_local]
-        if not nome_servico_local.endswith(".service"):
-            nomes_a_tentar.append(f"{nome_servico_local}.service")
+    def _on_service_status_changed(self, service_name, status):
+        # Chamado na thread do ServiceStatusCache
+        if self.app.root.winfo_exists() and self.winfo_exists():
+            self.app.root.after(0, lambda: self._show_service_status(service_name, status))
 
-        for nome_tentativa in nomes_a_tentar:
-            try:
-                # Usar `sudo` aqui pode não ser ideal se o script inteiro já roda como root.
-                # Se o script já é root, `sudo` é redundante e pode até falhar se `sudo` não estiver configurado para root.
-                # No entanto, se o script NÃO roda como root, `sudo` é necessário.
-                # Para consistência com _operar_servico_com_delays_linux, vamos manter o sudo por enquanto,
-                # assumindo que o script pode não estar rodando como root ou que o sudo é inofensivo se já for root.
-                cmd = ['sudo', 'systemctl', 'is-active', nome_tentativa]
-                if os.geteuid() == 0:  # Se já é root, não precisa de sudo
-                    cmd = ['systemctl', 'is-active', nome_tentativa]
-
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-                status = result.stdout.strip()
-
-                if result.returncode == 0:  # Comando bem sucedido, status é a palavra chave
-                    if status == "active": return "RUNNING"
-                    if status == "inactive": return "STOPPED"
-                    if status == "activating": return "START_PENDING"
-                    if status == "deactivating": return "STOP_PENDING"
-                    # Outros status como "failed" serão tratados abaixo se returncode não for 0
-                elif result.returncode == 3:  # Serviço inativo/parado
-                    return "STOPPED"
-                elif result.returncode == 4:  # Unidade não encontrada
-                    # Continua para a próxima tentativa de nome (se houver)
-                    continue
-                else:  # Outro erro
-                    logging.warning(
-                        f"Tab '{self.nome}': 'systemctl is-active {nome_tentativa}' retornou código {result.returncode}. Output: {status}. Stderr: {result.stderr.strip()}")
-                    # Tenta 'systemctl status' para mais detalhes em caso de 'failed'
-                    if status == "failed": return "ERROR"  # Se is-active reporta failed
-
-                    status_cmd = ['sudo', 'systemctl', 'status', nome_tentativa]
-                    if os.geteuid() == 0:
-                        status_cmd = ['systemctl', 'status', nome_tentativa]
-
-                    status_result = subprocess.run(status_cmd, capture_output=True, text=True, timeout=5)
-                    if "Active: failed" in status_result.stdout:
-                        return "ERROR"
-                    if "Unit " in status_result.stdout and " could not be found." in status_result.stdout:
-                        continue  # Unidade não encontrada, tenta próximo nome
-                    # Se não for um erro claro de 'não encontrado' ou 'failed', retorna UNKNOWN
-                    return "UNKNOWN"
-
-                return "UNKNOWN"  # Se o status não for reconhecido
-
-            except subprocess.TimeoutExpired:
-                logging.error(f"Tab '{self.nome}': Timeout ao verificar serviço '{nome_tentativa}' no Linux.",
-                              exc_info=True)
-                return "ERROR"
-            except FileNotFoundError:  # systemctl ou sudo não encontrado
-                logging.error(f"Tab '{self.nome}': Comando 'systemctl' ou 'sudo' não encontrado para verificar status.",
-                              exc_info=True)
-                return "SYSTEMCTL_NOT_FOUND"  # Indica que a ferramenta base está faltando
-            except Exception as e:
-                logging.error(f"Tab '{self.nome}': Erro ao verificar serviço '{nome_tentativa}' no Linux: {e}",
-                              exc_info=True)
-                return "ERROR"
-        return "NOT_FOUND"  # Se nenhum nome tentado foi encontrado
+    def _show_service_status(self, service_name, status):
+        if service_name != self.nome_servico.get() or not self.winfo_exists():
+            return  # Serviço trocado enquanto a consulta estava em andamento
+        display_text, color = SERVICE_STATUS_DISPLAY.get(status, ("(Status ?)", "gray"))
+        self.servico_label_var.set(f"Serviço: {service_name} {display_text}")
+        self.servico_label_widget.config(foreground=color)
 
     def start_log_monitoring(self):
-        if self.log_monitor_thread and self.log_monitor_thread.is_alive():
-            return
-        if not self.pasta_raiz.get() or not os.path.isdir(self.pasta_raiz.get()):
-            self.append_text_to_log_area(
-                f"AVISO: Pasta de logs '{self.pasta_raiz.get()}' inválida. Monitoramento não iniciado.\n")
-            return
-        self._stop_event.clear()
-        self.log_monitor_thread = threading.Thread(target=self.monitorar_log_continuamente_worker, daemon=True,
-                                                   name=f"LogMonitor-{self.nome}")
-        self.log_monitor_thread.start()
-        logging.info(f"Tab '{self.nome}': Monitoramento de logs iniciado para pasta '{self.pasta_raiz.get()}'.")
+        self.engine.start_log_monitoring(self.pasta_raiz.get())
 
     def stop_log_monitoring(self, from_tab_closure=False):
-        self._stop_event.set()
-        if self.log_tail_thread and self.log_tail_thread.is_alive():
-            self.log_tail_thread.join(timeout=1.0)  # Reduzido timeout para desligamento mais rápido
-        self.log_tail_thread = None
-        if self.log_monitor_thread and self.log_monitor_thread.is_alive() and self.log_monitor_thread != threading.current_thread():
-            self.log_monitor_thread.join(timeout=1.0)  # Reduzido timeout
-        self.log_monitor_thread = None
-        if self.file_log_handle:
-            try:
-                self.file_log_handle.close()
-            except Exception:
-                pass
-        self.file_log_handle = None
-        self.caminho_log_atual = None  # Limpa o caminho do log atual
-
-    def monitorar_log_continuamente_worker(self):
-        pasta_raiz_monitorada = self.pasta_raiz.get()
-        logging.info(f"Tab '{self.nome}': Iniciando worker de monitoramento para '{pasta_raiz_monitorada}'")
-        while not self._stop_event.is_set():
-            if not pasta_raiz_monitorada or not os.path.isdir(pasta_raiz_monitorada):
-                logging.warning(
-                    f"Tab '{self.nome}': Pasta de logs '{pasta_raiz_monitorada}' inválida ou inacessível no loop.")
-                if self._stop_event.wait(10): break
-                pasta_raiz_monitorada = self.pasta_raiz.get()  # Tenta reobter caso tenha mudado
-                continue
-
-            subpasta_recente = self._obter_subpasta_log_mais_recente(pasta_raiz_monitorada)
-            novo_arquivo_log = None
-            if subpasta_recente:
-                novo_arquivo_log = os.path.join(subpasta_recente, 'console.log')
-
-            if novo_arquivo_log and os.path.exists(novo_arquivo_log) and novo_arquivo_log != self.caminho_log_atual:
-                logging.info(f"Tab '{self.nome}': Novo arquivo de log detectado: {novo_arquivo_log}")
-
-                # Para a thread de tail existente, se houver
-                if self.log_tail_thread and self.log_tail_thread.is_alive():
-                    # O _stop_event global já deve parar a thread de tail, mas vamos ser explícitos.
-                    # Não precisamos de um evento separado para a tail thread se o _stop_event da aba é suficiente.
-                    # Se self._stop_event.set() for chamado, a tail thread atual deve parar.
-                    # Apenas esperamos que ela termine.
-                    logging.debug(f"Tab '{self.nome}': Aguardando thread de tail anterior finalizar.")
-                    self.log_tail_thread.join(timeout=1.0)
-                    # self._stop_event.clear() # Não limpar aqui, pois o evento é da aba, não só da tail
-
-                if self.file_log_handle:
-                    try:
-                        self.file_log_handle.close()
-                    except Exception:
-                        pass
-                    self.file_log_handle = None
+        self.engine.stop_log_monitoring()
+
+    @property
+    def caminho_log_atual(self):
+        return self.engine.current_log_path
+
+    def _on_log_lines(self, linhas, caminho_log):
+        # Roda na thread do reator, depois dos gatilhos do motor: aplica o filtro de exibição já
+        # compilado e enfileira as linhas brutas (para o histórico) junto com as visíveis.
+        filtro = self._display_filter
+        if filtro.empty:
+            entradas = [(linha, True, filtro) for linha in linhas]
+        else:
+            visiveis = {id(linha) for linha in filtro.filter(linhas)}  # filter() devolve os mesmos objetos
+            entradas = [(linha, id(linha) in visiveis, filtro) for linha in linhas]
+        self._pending_log_lines.extend(entradas)
+
+    def _on_restart_state(self, estado, detalhe):
+        # Chamado em qualquer thread, a cada transição do reinício
+        texto = f"Reinício: {RESTART_STATE_LABELS.get(estado, estado)}"
+        if estado in (RESTART_STATE_QUEUED, RESTART_STATE_COOLDOWN) and detalhe:
+            texto += f" ({detalhe})"
+        try:
+            self.app.root.after(0, self.restart_state_var.set, texto)
+        except (tk.TclError, RuntimeError):
+            pass
 
-                self.caminho_log_atual = novo_arquivo_log
-                self.append_text_to_log_area(f"\n>>> Monitorando novo log: {self.caminho_log_atual}\n")
-                try:
-                    self.file_log_handle = open(self.caminho_log_atual, 'r', encoding='latin-1', errors='replace')
-                    self.file_log_handle.seek(0, os.SEEK_END)  # Vai para o fim do arquivo
-
-                    # Cria e inicia nova thread de tail
-                    self.log_tail_thread = threading.Thread(target=self.acompanhar_log_do_arquivo_worker,
-                                                            daemon=True,
-                                                            name=f"LogTail-{self.nome}-{os.path.basename(self.caminho_log_atual)}")
-                    self.log_tail_thread.start()
-                    logging.info(f"Tab '{self.nome}': Nova thread de tail iniciada para {self.caminho_log_atual}")
-                except FileNotFoundError:
-                    logging.error(
-                        f"Tab '{self.nome}': Arquivo {self.caminho_log_atual} não encontrado ao tentar abrir para tail.")
-                    self.caminho_log_atual = None  # Reseta se não conseguiu abrir
-                except Exception as e:
-                    logging.error(f"Tab '{self.nome}': Erro ao iniciar tail para {self.caminho_log_atual}: {e}",
-                                  exc_info=True)
-                    self.caminho_log_atual = None  # Reseta
-            elif self.caminho_log_atual and not os.path.exists(self.caminho_log_atual):
-                logging.warning(
-                    f"Tab '{self.nome}': Arquivo de log monitorado {self.caminho_log_atual} não existe mais.")
-                self.append_text_to_log_area(
-                    f"AVISO: Log {self.caminho_log_atual} não encontrado. Procurando novo log...\n")
-                self.caminho_log_atual = None  # Força a busca por um novo log na próxima iteração
-                if self.log_tail_thread and self.log_tail_thread.is_alive():
-                    self.log_tail_thread.join(timeout=1.0)
-                if self.file_log_handle:
-                    try:
-                        self.file_log_handle.close()
-                    except:
-                        pass
-                    self.file_log_handle = None
+    def _on_restart_finished(self, success, nome_servico, tipo_reinicio_msg):
+        # Chamado na thread do reinício, ao fim da sequência (já registrada nas métricas)
+        if not self.app.root.winfo_exists():  # Só mostra messagebox se a UI ainda existe
+            return
+        if success:
+            self.app.show_messagebox_from_thread("info", f"'{self.nome}': Servidor Reiniciado",
+                                                 f"O serviço '{nome_servico}' foi reiniciado com sucesso ({tipo_reinicio_msg}).")
+        else:
+            self.app.show_messagebox_from_thread("error", f"'{self.nome}': Falha no Reinício",
+                                                 f"Ocorreu um erro ao reiniciar ({tipo_reinicio_msg}) o serviço '{nome_servico}'.\nVerifique os logs.")
 
-            if self._stop_event.wait(5): break  # Espera 5 segundos ou até o evento de parada
-        logging.info(f"Tab '{self.nome}': Worker de monitoramento de log encerrado.")
+    def append_text_to_log_area(self, texto):
+        # Mensagens do programa (não filtradas). Pode ser chamado de qualquer thread: apenas
+        # enfileira (deque.append é thread-safe).
+        self._pending_log_lines.extend([(linha, True, None) for linha in texto.splitlines(keepends=True)])
 
-    def _obter_subpasta_log_mais_recente(self, pasta_raiz_logs):
-        if not pasta_raiz_logs or not os.path.isdir(pasta_raiz_logs): return None
+    def _schedule_log_flush(self):
         try:
-            entradas = os.listdir(pasta_raiz_logs)
-            log_folder_pattern = re.compile(r"^logs_\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}$")
-            subpastas_log_validas = [os.path.join(pasta_raiz_logs, nome) for nome in entradas if
-                                     os.path.isdir(os.path.join(pasta_raiz_logs, nome)) and log_folder_pattern.match(
-                                         nome)]
-            if not subpastas_log_validas: return None
-            return max(subpastas_log_validas, key=os.path.getmtime)
-        except Exception as e:
-            logging.error(f"Tab '{self.nome}': Erro ao obter subpasta em '{pasta_raiz_logs}': {e}", exc_info=True)
-            return None
-
-    def acompanhar_log_do_arquivo_worker(self):
-        trigger_message_to_find = self.trigger_log_message_var.get()
-        current_file_path = self.caminho_log_atual  # Captura o caminho no início da thread
-        logging.info(f"Tab '{self.nome}': Iniciando acompanhamento de log para {current_file_path}")
+            self._log_flush_job = self.app.root.after(self.log_flush_interval_ms, self._flush_pending_log_lines)
+        except tk.TclError:  # root destruída
+            self._log_flush_job = None
 
-        if not self.file_log_handle or self.file_log_handle.closed:
-            logging.error(
-                f"Tab '{self.nome}': file_log_handle nulo ou fechado no início de acompanhar_log para {current_file_path}.")
+    def _flush_pending_log_lines(self):
+        self._log_flush_job = None
+        try:
+            if not self.winfo_exists(): return
+        except tk.TclError:
             return
 
-        while not self._stop_event.is_set():
-            if self._paused:
-                if self._stop_event.wait(0.5): break
-                continue
-
-            # Verifica se o arquivo monitorado ainda é o mesmo ou se o handle foi fechado
-            if not self.file_log_handle or self.file_log_handle.closed or self.caminho_log_atual != current_file_path:
-                logging.info(
-                    f"Tab '{self.nome}': Encerrando thread de tail para {current_file_path} devido a mudança de arquivo ou handle fechado.")
-                break
+        if self._pending_log_lines:
+            batch = []
             try:
-                linha = self.file_log_handle.readline()
-                if linha:
-                    linha_strip = linha.strip()
-                    if not self.filtro_var.get() or self.filtro_var.get().lower() in linha.lower():
-                        self.append_text_to_log_area(linha)
-
-                    if trigger_message_to_find and trigger_message_to_find in linha_strip:
-                        logging.info(
-                            f"Tab '{self.nome}': GATILHO DE REINÍCIO detectado em '{current_file_path}'. Linha: '{linha_strip}'.")
-                        if self.auto_restart_on_trigger_var.get():
-                            threading.Thread(target=self._delayed_restart_worker, daemon=True,
-                                             name=f"DelayedRestart-{self.nome}").start()
-                else:  # Fim do arquivo, espera um pouco
-                    if self._stop_event.wait(0.2): break
-            except ValueError as ve:  # Ex: I/O operation on closed file
-                if "closed file" in str(ve).lower():
-                    logging.warning(
-                        f"Tab '{self.nome}': Tentativa de I/O em arquivo fechado ({current_file_path}). Encerrando tail.")
-                else:
-                    logging.error(f"Tab '{self.nome}': ValueError ao acompanhar log {current_file_path}: {ve}",
-                                  exc_info=True)
-                break  # Sai do loop se o arquivo estiver fechado ou outro ValueError
-            except Exception as e:
-                if not self._stop_event.is_set():  # Só loga se não for um encerramento esperado
-                    logging.error(f"Tab '{self.nome}': Erro inesperado ao acompanhar log {current_file_path}: {e}",
-                                  exc_info=True)
-                break
-        logging.info(f"Tab '{self.nome}': Acompanhamento de log para {current_file_path} encerrado.")
-
-    def _delayed_restart_worker(self):
-        delay_s = self.restart_delay_after_trigger_var.get()
-        self.append_text_to_log_area_threadsafe(f"Gatilho detectado. Aguardando {delay_s}s para reiniciar...\n")
-
-        start_time = time.monotonic()
-        while time.monotonic() - start_time < delay_s:
-            if self._stop_event.is_set() or self._scheduler_stop_event.is_set():  # Checa ambos
-                logging.info(f"Tab '{self.nome}': Reinício atrasado cancelado.")
-                return
-            time.sleep(0.5)  # Permite que o evento seja checado mais frequentemente
+                for _ in range(self.log_batch_max_lines):
+                    batch.append(self._pending_log_lines.popleft())
+            except IndexError:  # Fila esvaziada antes de completar o lote
+                pass
+            self._append_batch_to_log_area_gui_thread(batch)
+        self._schedule_log_flush()
 
-        if not self._stop_event.is_set() and not self._scheduler_stop_event.is_set():
-            self._executar_logica_reinicio_servico_efetivamente(is_scheduled_restart=False)
-        else:
-            logging.info(f"Tab '{self.nome}': Reinício atrasado cancelado antes da execução.")
-
-    def _executar_logica_reinicio_servico_efetivamente(self, is_scheduled_restart=False):
-        tipo_reinicio_msg = "agendado" if is_scheduled_restart else "por gatilho de log"
-        nome_servico = self.nome_servico.get()
-        if not nome_servico:
-            self.append_text_to_log_area_threadsafe(
-                f"ERRO: Nome do serviço não configurado para reinício ({tipo_reinicio_msg}).\n")
-            logging.error(f"Tab '{self.nome}': Tentativa de reinício ({tipo_reinicio_msg}) sem nome de serviço.")
+    def _append_batch_to_log_area_gui_thread(self, batch):
+        if not self.text_area_log.winfo_exists(): return
+        filtro_atual = self._display_filter
+        visiveis = []
+        for linha, visivel, filtro in batch:
+            filtravel = filtro is not None
+            self.log_ring_buffer.append((linha, filtravel))
+            if filtravel and filtro is not filtro_atual:  # Filtrado com um filtro que já foi trocado
+                visivel = filtro_atual.empty or filtro_atual.matches(linha)
+            if visivel:
+                visiveis.append(linha)
+        if not visiveis:
             return
-
-        self.append_text_to_log_area_threadsafe(
-            f"--- REINÍCIO {tipo_reinicio_msg.upper()} DO SERVIÇO '{nome_servico}' INICIADO ---\n")
-        success = self._operar_servico_com_delays(nome_servico, tipo_reinicio_msg)
-
-        if self.app.root.winfo_exists():  # Só mostra messagebox se a UI ainda existe
-            if success:
-                self.app.show_messagebox_from_thread("info", f"'{self.nome}': Servidor Reiniciado",
-                                                     f"O serviço '{nome_servico}' foi reiniciado com sucesso ({tipo_reinicio_msg}).")
-                self.append_text_to_log_area_threadsafe(
-                    f"SUCESSO: Serviço '{nome_servico}' reiniciado ({tipo_reinicio_msg}).\n")
-            else:
-                self.app.show_messagebox_from_thread("error", f"'{self.nome}': Falha no Reinício",
-                                                     f"Ocorreu um erro ao reiniciar ({tipo_reinicio_msg}) o serviço '{nome_servico}'.\nVerifique os logs.")
-                self.append_text_to_log_area_threadsafe(
-                    f"FALHA: Erro ao reiniciar '{nome_servico}' ({tipo_reinicio_msg}). Verifique os logs.\n")
-
-            if self.winfo_exists():  # Atualiza o status na aba
-                self.update_service_status_display()
-
-    def _operar_servico_com_delays(self, nome_servico_a_gerenciar, tipo_reinicio_msg_log=""):
-        os_system = platform.system()
-        if os_system == "Windows":
-            if not PYWIN32_AVAILABLE:
-                self.append_text_to_log_area_threadsafe(
-                    f"ERRO: pywin32 não disponível para operar serviço no Windows.\n")
-                return False
-            return self._operar_servico_com_delays_windows(nome_servico_a_gerenciar, tipo_reinicio_msg_log)
-        elif os_system == "Linux":
-            if not SYSTEMCTL_AVAILABLE:
-                self.append_text_to_log_area_threadsafe(
-                    f"ERRO: systemctl não disponível para operar serviço no Linux.\n")
-                return False
-            return self._operar_servico_com_delays_linux(nome_servico_a_gerenciar, tipo_reinicio_msg_log)
-        else:
-            self.append_text_to_log_area_threadsafe(f"ERRO: Operação de serviço não suportada no SO {os_system}.\n")
-            return False
-
-    def _operar_servico_com_delays_windows(self, nome_servico, tipo_reinicio=""):
-        stop_delay_s = self.stop_delay_var.get()
-        start_delay_s = self.start_delay_var.get()
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = subprocess.SW_HIDE
-        log_prefix = f"Tab '{self.nome}' ({tipo_reinicio.strip()}) Win:"
-
+        if len(visiveis) > self.log_max_lines:  # Lote maior que o limite: só o final chega à tela
+            visiveis = visiveis[-self.log_max_lines:]
+        texto = "".join(visiveis)
         try:
-            # Parar o serviço
-            status_atual = self._verificar_status_servico_win(nome_servico)
-            if status_atual == "RUNNING" or status_atual == "START_PENDING":
-                self.append_text_to_log_area_threadsafe(f"Parando serviço '{nome_servico}'...\n")
-                subprocess.run(["sc", "stop", nome_servico], check=True, startupinfo=startupinfo, timeout=30)
-                self.append_text_to_log_area_threadsafe(f"Comando de parada enviado. Aguardando {stop_delay_s}s...\n")
-
-                wait_start = time.monotonic()
-                while time.monotonic() - wait_start < stop_delay_s:
-                    if self._stop_event.is_set() or self._scheduler_stop_event.is_set():
-                        logging.info(f"{log_prefix} Operação de serviço interrompida durante delay de parada.")
-                        return False
-                    time.sleep(0.1)
-
-                status_apos_parada = self._verificar_status_servico_win(nome_servico)
-                if status_apos_parada != "STOPPED":
-                    logging.warning(
-                        f"{log_prefix} Serviço {nome_servico} não parou como esperado. Status: {status_apos_parada}")
-                    self.append_text_to_log_area_threadsafe(
-                        f"AVISO: Serviço '{nome_servico}' pode não ter parado. Status: {status_apos_parada}\n")
-            elif status_atual == "STOPPED":
-                self.append_text_to_log_area_threadsafe(f"Serviço '{nome_servico}' já estava parado.\n")
-            elif status_atual == "NOT_FOUND":
-                self.append_text_to_log_area_threadsafe(f"ERRO: Serviço '{nome_servico}' não encontrado para parada.\n")
-                return False
-            else:
-                self.append_text_to_log_area_threadsafe(
-                    f"ERRO: Estado do serviço '{nome_servico}' desconhecido ou erro ({status_atual}). Impossível prosseguir com parada segura.\n")
-                return False
-
-            # Iniciar o serviço
-            self.append_text_to_log_area_threadsafe(f"Iniciando serviço '{nome_servico}'...\n")
-            subprocess.run(["sc", "start", nome_servico], check=True, startupinfo=startupinfo, timeout=30)
-            self.append_text_to_log_area_threadsafe(
-                f"Comando de início enviado. Aguardando {start_delay_s}s para estabilizar...\n")
-
-            wait_start = time.monotonic()
-            while time.monotonic() - wait_start < start_delay_s:
-                if self._stop_event.is_set() or self._scheduler_stop_event.is_set():
-                    logging.info(f"{log_prefix} Operação de serviço interrompida durante delay de início.")
-                    return False
-                time.sleep(0.1)
-
-            status_final = self._verificar_status_servico_win(nome_servico)
-            if status_final == "RUNNING":
-                logging.info(f"{log_prefix} Serviço {nome_servico} iniciado com sucesso.")
-                return True
-            else:
-                logging.error(f"{log_prefix} Serviço {nome_servico} falhou ao iniciar. Status: {status_final}")
-                self.append_text_to_log_area_threadsafe(
-                    f"ERRO: Serviço '{nome_servico}' falhou ao iniciar. Status: {status_final}\n")
-                return False
-
-        except subprocess.CalledProcessError as e_sc:
-            err_output = "N/A"
-            if e_sc.stderr:
-                try:
-                    err_output = e_sc.stderr.decode('latin-1', errors='replace')
-                except:
-                    pass
-            elif e_sc.stdout:
-                try:
-                    err_output = e_sc.stdout.decode('latin-1', errors='replace')
-                except:
-                    pass
-            err_msg = f"Erro 'sc' para '{nome_servico}': {err_output.strip()}"
-            self.append_text_to_log_area_threadsafe(f"ERRO: {err_msg}\n")
-            logging.error(f"{log_prefix} {err_msg}", exc_info=True)
-            return False
-        except subprocess.TimeoutExpired as e_timeout:
-            self.append_text_to_log_area_threadsafe(f"ERRO: Timeout ao operar serviço '{nome_servico}': {e_timeout}\n")
-            logging.error(f"{log_prefix} Timeout ao operar serviço '{nome_servico}': {e_timeout}", exc_info=True)
-            return False
-        except FileNotFoundError:
-            self.append_text_to_log_area_threadsafe(f"ERRO: Comando 'sc.exe' não encontrado.\n")
-            logging.error(f"{log_prefix} Comando 'sc.exe' não encontrado.")
-            return False
-        except Exception as e:
-            self.append_text_to_log_area_threadsafe(f"ERRO inesperado ao operar serviço '{nome_servico}': {e}\n")
-            logging.error(f"{log_prefix} Erro inesperado ao operar serviço '{nome_servico}': {e}", exc_info=True)
-            return False
-
-    def _operar_servico_com_delays_linux(self, nome_servico, tipo_reinicio=""):
-        stop_delay_s = self.stop_delay_var.get()
-        start_delay_s = self.start_delay_var.get()
-        log_prefix = f"Tab '{self.nome}' ({tipo_reinicio.strip()}) Linux:"
-
-        nome_servico_systemd = nome_servico
-        if not nome_servico.endswith(".service"):
-            nome_servico_systemd = f"{nome_servico}.service"
-
-        cmd_prefix = []
-        if os.geteuid() != 0:  # Adiciona sudo apenas se não for root
-            cmd_prefix = ['sudo']
+            current_state = self.text_area_log.cget("state")
+            self.text_area_log.config(state='normal')
+            self.text_area_log.insert('end', texto)
+            self._trim_log_area_gui_thread()
+            if self.auto_scroll_log_var.get():
+                self.text_area_log.yview_moveto(1.0)
+            self.text_area_log.config(state=current_state)  # Restore original state
+        except tk.TclError:  # Widget might be destroyed
+            pass
 
-        try:
-            # Parar o serviço
-            status_atual = self._verificar_status_servico_linux(nome_servico_systemd)
-            if status_atual == "RUNNING" or status_atual == "START_PENDING":
-                self.append_text_to_log_area_threadsafe(f"Parando serviço '{nome_servico_systemd}'...\n")
-                subprocess.run(cmd_prefix + ['systemctl', 'stop', nome_servico_systemd], check=True,
-                               capture_output=True, text=True, timeout=30)
-                self.append_text_to_log_area_threadsafe(f"Comando de parada enviado. Aguardando {stop_delay_s}s...\n")
-
-                wait_start = time.monotonic()
-                while time.monotonic() - wait_start < stop_delay_s:
-                    if self._stop_event.is_set() or self._scheduler_stop_event.is_set():
-                        logging.info(f"{log_prefix} Operação de serviço interrompida durante delay de parada.")
-                        return False
-                    time.sleep(0.1)
-
-                status_apos_parada = self._verificar_status_servico_linux(nome_servico_systemd)
-                if status_apos_parada != "STOPPED":
-                    logging.warning(
-                        f"{log_prefix} Serviço {nome_servico_systemd} não parou como esperado. Status: {status_apos_parada}")
-                    self.append_text_to_log_area_threadsafe(
-                        f"AVISO: Serviço '{nome_servico_systemd}' pode não ter parado. Status: {status_apos_parada}\n")
-            elif status_atual == "STOPPED":
-                self.append_text_to_log_area_threadsafe(f"Serviço '{nome_servico_systemd}' já estava parado.\n")
-            elif status_atual == "NOT_FOUND":
-                self.append_text_to_log_area_threadsafe(
-                    f"ERRO: Serviço '{nome_servico_systemd}' não encontrado para parada.\n")
-                return False
-            else:
-                self.append_text_to_log_area_threadsafe(
-                    f"ERRO: Estado do serviço '{nome_servico_systemd}' desconhecido ou erro ({status_atual}). Impossível prosseguir com parada segura.\n")
-                return False
-
-            # Iniciar o serviço
-            self.append_text_to_log_area_threadsafe(f"Iniciando serviço '{nome_servico_systemd}'...\n")
-            subprocess.run(cmd_prefix + ['systemctl', 'start', nome_servico_systemd], check=True, capture_output=True,
-                           text=True, timeout=30)
-            self.append_text_to_log_area_threadsafe(
-                f"Comando de início enviado. Aguardando {start_delay_s}s para estabilizar...\n")
-
-            wait_start = time.monotonic()
-            while time.monotonic() - wait_start < start_delay_s:
-                if self._stop_event.is_set() or self._scheduler_stop_event.is_set():
-                    logging.info(f"{log_prefix} Operação de serviço interrompida durante delay de início.")
-                    return False
-                time.sleep(0.1)
-
-            status_final = self._verificar_status_servico_linux(nome_servico_systemd)
-            if status_final == "RUNNING":
-                logging.info(f"{log_prefix} Serviço {nome_servico_systemd} iniciado com sucesso.")
-                return True
-            else:
-                logging.error(f"{log_prefix} Serviço {nome_servico_systemd} falhou ao iniciar. Status: {status_final}")
-                self.append_text_to_log_area_threadsafe(
-                    f"ERRO: Serviço '{nome_servico_systemd}' falhou ao iniciar. Status: {status_final}\n")
-                return False
-
-        except subprocess.CalledProcessError as e_sysctl:
-            err_output = e_sysctl.stderr.strip() if e_sysctl.stderr else e_sysctl.stdout.strip()
-            err_msg = f"Erro 'systemctl' para '{nome_servico_systemd}': {err_output}"
-            self.append_text_to_log_area_threadsafe(f"ERRO: {err_msg}\n")
-            logging.error(f"{log_prefix} {err_msg}", exc_info=True)
-            return False
-        except subprocess.TimeoutExpired as e_timeout:
-            self.append_text_to_log_area_threadsafe(
-                f"ERRO: Timeout ao operar serviço '{nome_servico_systemd}': {e_timeout}\n")
-            logging.error(f"{log_prefix} Timeout ao operar serviço '{nome_servico_systemd}': {e_timeout}",
-                          exc_info=True)
-            return False
-        except FileNotFoundError:
-            self.append_text_to_log_area_threadsafe(f"ERRO: Comando 'systemctl' ou 'sudo' não encontrado.\n")
-            logging.error(f"{log_prefix} Comando 'systemctl' ou 'sudo' não encontrado.")
-            return False
-        except Exception as e:
-            self.append_text_to_log_area_threadsafe(
-                f"ERRO inesperado ao operar serviço '{nome_servico_systemd}': {e}\n")
-            logging.error(f"{log_prefix} Erro inesperado ao operar serviço '{nome_servico_systemd}': {e}",
-                          exc_info=True)
-            return False
+    def _trim_log_area_gui_thread(self):
+        # Remove as linhas excedentes de uma vez só, e apenas quando o excesso passa da folga,
+        # para não pagar um delete no widget a cada lote.
+        total_linhas = int(self.text_area_log.index('end-1c').split('.')[0])
+        if total_linhas > self.log_max_lines + self._log_trim_slack:
+            excesso = total_linhas - self.log_max_lines
+            self.text_area_log.delete('1.0', f'{excesso + 1}.0')
+
+    def _visible_buffer_lines(self):
+        filtro = self._display_filter
+        if filtro.empty:
+            return [linha for linha, _ in self.log_ring_buffer]
+        return [linha for linha, filtravel in self.log_ring_buffer if not filtravel or filtro.matches(linha)]
+
+    def get_log_buffer_text(self):
+        # Exporta o que está visível (histórico com o filtro atual)
+        return "".join(self._visible_buffer_lines())
+
+    def _on_filter_text_changed(self, *args):
+        # Debounce: recompila e refiltra só quando a digitação para
+        if self._filter_job is not None:
+            try:
+                self.after_cancel(self._filter_job)
+            except tk.TclError:
+                pass
+        self._filter_job = self.after(DISPLAY_FILTER_DEBOUNCE_MS, self._apply_display_filter)
 
-    def append_text_to_log_area(self, texto):
-        if not self.winfo_exists(): return
+    def _apply_display_filter(self):
+        self._filter_job = None
+        texto = self.filtro_var.get()
+        if texto == self._display_filter.text:
+            return
         try:
-            self.app.root.after(0, self._append_text_to_log_area_gui_thread, texto)
-        except Exception:  # tk.TclError if root is destroyed
-            pass
+            novo_filtro = DisplayFilter(texto)
+        except ValueError as e:
+            # Mantém o filtro anterior até o texto ficar válido
+            self.filtro_entry.configure(bootstyle=DANGER)
+            self.app.set_status_from_thread(f"'{self.nome}': {e}")
+            return
+        self.filtro_entry.configure(bootstyle=DEFAULT)
+        self._display_filter = novo_filtro
+        self._refilter_log_area_gui_thread()
 
-    def _append_text_to_log_area_gui_thread(self, texto):
-        if not self.text_area_log.winfo_exists(): return
+    def _refilter_log_area_gui_thread(self):
+        # Refaz a área de log a partir do histórico bruto com o filtro atual
+        if not self.text_area_log.winfo_exists():
+            return
+        texto = "".join(self._visible_buffer_lines())
         try:
             current_state = self.text_area_log.cget("state")
             self.text_area_log.config(state='normal')
+            self.text_area_log.delete('1.0', 'end')
             self.text_area_log.insert('end', texto)
             if self.auto_scroll_log_var.get():
                 self.text_area_log.yview_moveto(1.0)
-            self.text_area_log.config(state=current_state)  # Restore original state
-        except tk.TclError:  # Widget might be destroyed
+            self.text_area_log.config(state=current_state)
+        except tk.TclError:
             pass
 
     def append_text_to_log_area_threadsafe(self, texto):
         self.append_text_to_log_area(texto)
 
     def limpar_tela_log(self):
+        self._pending_log_lines.clear()
+        self.log_ring_buffer.clear()
         if self.text_area_log.winfo_exists():
             self.text_area_log.config(state='normal')
             self.text_area_log.delete('1.0', 'end')
@@ -1145,6 +1047,7 @@ class ServidorTab(ttk.Frame):
 
     def toggle_pausa(self):
         self._paused = not self._paused
+        self.engine.set_paused(self._paused)
         btn_text, btn_style = ("▶️ Retomar", SUCCESS) if self._paused else ("⏸️ Pausar", WARNING)
         self.pausar_btn.config(text=btn_text, bootstyle=btn_style)
 
@@ -1237,10 +1140,19 @@ class ServerRestarterApp:
         self.original_pil_bg_image = None
         self.bg_photo_image = None
         self.bg_label = None
+        # Imagens de fundo já renderizadas por tamanho (LRU) e redimensionamento com debounce
+        self._bg_photo_cache = collections.OrderedDict()
+        self._bg_current_size = None
+        self._bg_pending_size = None
+        self._bg_resize_job = None
 
         self.style = ttk.Style()
-        self.config_file = "server_restarter_config.json"
+        self.config_file = CONFIG_FILENAME
+        self.config_store = JsonFileStore(self.config_file)
+        buffer_startup_logging()  # Sem log configurado ainda: guarda os erros de leitura até configure_logging
         self.config = self._load_app_config_from_file()
+        # Log assíncrono com rotação; nível e rotação vêm do JSON (padrão INFO, menu Ferramentas)
+        configure_logging(self.config)
 
         try:
             self.style.theme_use(self.config.get("theme", "darkly"))
@@ -1251,10 +1163,26 @@ class ServerRestarterApp:
 
         self.servidores = []
         self.config_changed = False
+        self._config_generation = 0  # Incrementado a cada alteração; a gravação assíncrona só limpa o estado da sua
+        self._autosave_job = None
+        self._autosave_first_change = None
         self._app_stop_event = threading.Event()
+        # Uma única thread de E/S atende pastas, tails e agendamentos de todas as abas
+        self.log_reactor = LogReactor()
+        self.log_reactor.start()
+        self.restart_scheduler = RestartScheduler(self.log_reactor)  # Próximo disparo de cada aba num min-heap
+        # Limite de reinícios simultâneos de todas as abas, com espaçamento entre inícios
+        self.restart_admission = create_restart_admission(self.config, self.log_reactor)
+        # Pools limitados de threads (reinícios, consultas de serviço); a fila é descartada ao encerrar
+        self.worker_pools = create_worker_pools(self.config, self._app_stop_event)
+        self.service_backend = create_service_backend(self.config)
+        self.restart_metrics = RestartMetrics(METRICS_FILENAME)
+        self.restart_metrics.add_listener(self._on_restart_recorded)
+        self.service_status_cache = ServiceStatusCache(
+            self._query_service_statuses, interval_s=float(self.config.get("service_status_interval_s", 10)),
+            ttl_s=float(self.config.get("service_status_ttl_s", 15)))
+        self.service_status_cache.start()
 
-        self._setup_background_image()
-        self.set_application_icon()
         self.create_menu()
         self.create_status_bar()
 
@@ -1267,89 +1195,134 @@ class ServerRestarterApp:
         self.inicializar_servidores_das_configuracoes()
 
         self.main_notebook.pack(fill='both', expand=True, padx=5, pady=5)
-        if self.bg_label and self.bg_label.winfo_exists():  # Check if bg_label exists
-            self.bg_label.lower()
 
         self._system_log_update_error_count = 0
+        # Aba "Log do Sistema": leitura incremental (só bytes novos) com janela limitada de linhas
+        self.system_log_max_lines = max(100, int(self.config.get("system_log_max_lines", 2000)))
+        self._system_log_reader = IncrementalFileReader(LOG_FILENAME, encoding='utf-8',
+                                                        initial_tail_bytes=256 * 1024)
+        self._system_log_missing_shown = False
         self.atualizar_log_sistema_periodicamente()  # Corrigido: Chamada de método da classe
         self.root.bind("<Configure>", self._on_root_configure)
         self.root.protocol("WM_DELETE_WINDOW", self.minimize_to_tray_on_close)
 
+        # Ícone, imagem de fundo e bandeja (Pillow/pystray) só depois da primeira pintura da janela:
+        # "after idle" + "after 0" roda depois dos redesenhos pendentes.
+        self.root.after_idle(self.root.after, 0, self._load_deferred_resources)
+
+    def _load_deferred_resources(self):
+        if self._app_stop_event.is_set() or not self.root.winfo_exists():
+            return
+        self.set_application_icon()
+        self._setup_background_image()
         if PYSTRAY_AVAILABLE:
             self.setup_tray_icon()
 
+    def _on_restart_recorded(self, nome_servidor):
+        # Chamado na thread do reinício
+        if self.root.winfo_exists():
+            self.root.after(0, lambda: [s.refresh_stats_panel() for s in self.servidores if s.nome == nome_servidor])
+
+    def export_restart_metrics(self, tabs=None):
+        tabs = tabs if tabs is not None else self.servidores
+        if not tabs:
+            self.show_messagebox_from_thread("info", "Exportar Métricas", "Nenhum servidor configurado.")
+            return
+        caminho_arquivo = filedialog.asksaveasfilename(
+            defaultextension=".json", filetypes=[("Arquivos JSON", "*.json"), ("Todos", "*.*")],
+            title="Exportar Métricas de Reinício", initialfile="metricas_reinicio.json")
+        if not caminho_arquivo:
+            return
+        try:
+            with open(caminho_arquivo, 'w', encoding='utf-8') as f:
+                json.dump(self.restart_metrics.export([t.nome for t in tabs]), f, indent=4, ensure_ascii=False)
+            self.set_status_from_thread(f"Métricas exportadas para: {os.path.basename(caminho_arquivo)}")
+            logging.info(f"Métricas de reinício exportadas para: {caminho_arquivo}")
+        except Exception as e:
+            logging.error(f"Erro ao exportar métricas para {caminho_arquivo}: {e}", exc_info=True)
+            self.show_messagebox_from_thread("error", "Erro na Exportação", f"Falha ao exportar métricas:\n{e}")
+
+    def _query_service_statuses(self, servicos):
+        # Uma consulta em lote por ciclo do ServiceStatusCache, para todas as abas
+        if platform.system() == "Windows":
+            return query_windows_service_statuses(servicos)
+        if self.service_backend is not None:
+            return self.service_backend.get_statuses(servicos)
+        return query_systemd_statuses(servicos)
+
     def _setup_background_image(self):
         if not PIL_AVAILABLE or not os.path.exists(BACKGROUND_IMAGE_PATH): return
+        # A decodificação do PNG (~2 MB) e o preparo da matriz rodam fora da thread da GUI;
+        # só a aplicação é feita nela
+        tela = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        threading.Thread(target=self._load_background_image_worker, args=(tela,), daemon=True,
+                         name="BackgroundImageLoad").start()
+
+    def _load_background_image_worker(self, tela):
         try:
-            pil_image_original = Image.open(BACKGROUND_IMAGE_PATH)
-            pil_image_rgba = pil_image_original.convert("RGBA")
-            self.original_pil_bg_image = pil_image_rgba  # Armazena para redimensionamento
+            pil_image_master = load_background_master(BACKGROUND_IMAGE_PATH, *tela)
+        except Exception as e:
+            logging.error(f"Erro ao carregar imagem de fundo: {e}", exc_info=True)
+            return
+        if not self._app_stop_event.is_set():
+            try:
+                self.root.after(0, self._apply_background_image, pil_image_master)
+            except (tk.TclError, RuntimeError):  # root destruída ou mainloop encerrado
+                pass
+
+    def _apply_background_image(self, pil_image_master):
+        if not self.root.winfo_exists():
+            return
+        try:
+            self.original_pil_bg_image = pil_image_master  # Matriz (alfa já aplicado) para redimensionamento
 
             self.bg_label = ttk.Label(self.root)
             self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-            self.root.update_idletasks()  # Garante que a janela tem dimensões
+            self.bg_label.lower()
             self._resize_background_image(self.root.winfo_width(), self.root.winfo_height())
         except Exception as e:
-            logging.error(f"Erro ao carregar imagem de fundo: {e}", exc_info=True)
+            logging.error(f"Erro ao aplicar imagem de fundo: {e}", exc_info=True)
             self.original_pil_bg_image = None
             if self.bg_label and self.bg_label.winfo_exists(): self.bg_label.destroy()
             self.bg_label = None
 
     def _on_root_configure(self, event):
-        if event.widget == self.root and self.original_pil_bg_image and self.bg_label and self.bg_label.winfo_exists():
-            self._resize_background_image(event.width, event.height)
+        # Arrastar a borda da janela gera dezenas de <Configure> por segundo: só o último tamanho,
+        # depois de BACKGROUND_RESIZE_DEBOUNCE_MS sem novos eventos, é redesenhado.
+        if event.widget != self.root or not self.original_pil_bg_image:
+            return
+        self._bg_pending_size = (event.width, event.height)
+        if self._bg_resize_job is not None:
+            self.root.after_cancel(self._bg_resize_job)
+        self._bg_resize_job = self.root.after(BACKGROUND_RESIZE_DEBOUNCE_MS, self._apply_pending_background_size)
+
+    def _apply_pending_background_size(self):
+        self._bg_resize_job = None
+        if self._bg_pending_size:
+            self._resize_background_image(*self._bg_pending_size)
 
     def _resize_background_image(self, width, height):
         if not self.original_pil_bg_image or width <= 1 or height <= 1 or \
                 not self.bg_label or not self.bg_label.winfo_exists():
             return
 
-        img_to_resize = self.original_pil_bg_image.copy()  # Trabalha com uma cópia
-
-        if BACKGROUND_ALPHA_MULTIPLIER < 1.0 and BACKGROUND_ALPHA_MULTIPLIER >= 0.0:
-            try:
-                alpha = img_to_resize.split()[3]
-                alpha = alpha.point(lambda p: int(p * BACKGROUND_ALPHA_MULTIPLIER))
-                img_to_resize.putalpha(alpha)
-            except IndexError:  # Sem canal alfa
-                pass
-            except Exception as e_alpha:
-                logging.warning(f"Não foi possível aplicar alfa à imagem de fundo: {e_alpha}")
-
-        # Calcular proporções para "cobrir" a área
-        img_aspect = img_to_resize.width / img_to_resize.height
-        win_aspect = width / height
-
-        if win_aspect > img_aspect:
-            # Janela mais larga que a imagem: altura da imagem = altura da janela, largura proporcional
-            new_height = height
-            new_width = int(new_height * img_aspect)
-        else:
-            # Janela mais alta ou mesma proporção: largura da imagem = largura da janela, altura proporcional
-            new_width = width
-            new_height = int(new_width / img_aspect)
-
-        # Para "cobrir", pode ser que a imagem precise ser maior que a janela em uma dimensão
-        # e depois cortada. Ou, podemos escalar para que uma dimensão bata e a outra seja >=
-        # e então centralizar.
-        # Ajuste para 'cover': escalar para que a menor dimensão da imagem caiba
-        # e a maior exceda ou caiba, depois cortar o excesso do centro.
-
-        # Escala para que a imagem CUBRA a janela
-        if width / img_to_resize.width > height / img_to_resize.height:
-            # Escalar pela largura da janela, a imagem é proporcionalmente mais alta
-            final_w = width
-            final_h = int(img_to_resize.height * (width / img_to_resize.width))
-        else:
-            # Escalar pela altura da janela, a imagem é proporcionalmente mais larga
-            final_h = height
-            final_w = int(img_to_resize.width * (height / img_to_resize.height))
-
+        # Escala para que a imagem CUBRA a janela (o excesso fica fora da área visível)
+        tamanho = background_cover_size(self.original_pil_bg_image.size, width, height)
+        if tamanho == self._bg_current_size:
+            return
+        photo = self._bg_photo_cache.get(tamanho)
         try:
-            resized_pil_image = img_to_resize.resize((final_w, final_h), Image.LANCZOS)
-            self.bg_photo_image = ImageTk.PhotoImage(resized_pil_image)
+            if photo is None:
+                from PIL import Image, ImageTk
+                photo = ImageTk.PhotoImage(self.original_pil_bg_image.resize(tamanho, Image.LANCZOS))
+                self._bg_photo_cache[tamanho] = photo
+                if len(self._bg_photo_cache) > BACKGROUND_CACHE_SIZE:
+                    self._bg_photo_cache.popitem(last=False)  # Descarta o tamanho usado há mais tempo
+            else:
+                self._bg_photo_cache.move_to_end(tamanho)
+            self.bg_photo_image = photo  # Manter referência: o Tk não segura a PhotoImage sozinho
             self.bg_label.configure(image=self.bg_photo_image)
-            # self.bg_label.image = self.bg_photo_image # Manter referência, ttk.Label deve fazer isso
+            self._bg_current_size = tamanho
         except Exception as e_resize:
             logging.error(f"Erro ao redimensionar ou aplicar imagem de fundo: {e_resize}", exc_info=True)
 
@@ -1359,6 +1332,7 @@ class ServerRestarterApp:
                 if platform.system() == "Windows":
                     self.root.iconbitmap(default=ICON_PATH)
                 else:
+                    from PIL import Image, ImageTk
                     pil_icon = Image.open(ICON_PATH)
                     self.app_icon_tk = ImageTk.PhotoImage(pil_icon)
                     self.root.iconphoto(True, self.app_icon_tk)
@@ -1366,7 +1340,10 @@ class ServerRestarterApp:
                 logging.error(f"Erro ao definir ícone da aplicação: {e}", exc_info=True)
 
     def _create_tray_image(self):
-        if PIL_AVAILABLE and os.path.exists(ICON_PATH):
+        if not PIL_AVAILABLE:
+            return None
+        from PIL import Image, ImageDraw
+        if os.path.exists(ICON_PATH):
             try:
                 return Image.open(ICON_PATH)
             except Exception as e_load_icon:
@@ -1374,16 +1351,15 @@ class ServerRestarterApp:
                     f"Não foi possível carregar ícone da bandeja de {ICON_PATH}: {e_load_icon}. Usando padrão.")
                 pass  # Tenta o padrão abaixo
 
-        if PIL_AVAILABLE:  # Se o ícone falhou ou não existia, mas PIL sim, desenha um
-            try:
-                image = Image.new('RGBA', (64, 64), (0, 0, 0, 0))  # Transparente
-                draw = ImageDraw.Draw(image)
-                # Exemplo simples: um círculo azul
-                draw.ellipse((5, 5, 59, 59), fill='skyblue', outline='blue')
-                draw.text((20, 20), "SR", fill="navy", font=None)  # Sem fonte específica para portabilidade
-                return image
-            except Exception as e_draw:
-                logging.error(f"Erro ao desenhar ícone padrão da bandeja: {e_draw}")
+        try:  # Se o ícone falhou ou não existia, desenha um
+            image = Image.new('RGBA', (64, 64), (0, 0, 0, 0))  # Transparente
+            draw = ImageDraw.Draw(image)
+            # Exemplo simples: um círculo azul
+            draw.ellipse((5, 5, 59, 59), fill='skyblue', outline='blue')
+            draw.text((20, 20), "SR", fill="navy", font=None)  # Sem fonte específica para portabilidade
+            return image
+        except Exception as e_draw:
+            logging.error(f"Erro ao desenhar ícone padrão da bandeja: {e_draw}")
         return None
 
     def setup_tray_icon(self):
@@ -1395,12 +1371,12 @@ class ServerRestarterApp:
             logging.error("Imagem para ícone da bandeja não pôde ser criada.")
             return
 
-        menu_items = [
-            pystray.MenuItem('Mostrar', self.show_from_tray, default=True),
-            pystray.MenuItem('Sair', self.shutdown_application_from_tray)
-        ]
-
         try:
+            import pystray
+            menu_items = [
+                pystray.MenuItem('Mostrar', self.show_from_tray, default=True),
+                pystray.MenuItem('Sair', self.shutdown_application_from_tray)
+            ]
             self.tray_icon = pystray.Icon("ServerRestarter", image, "PredPy Server Restarter", tuple(menu_items))
             threading.Thread(target=self.tray_icon.run, daemon=True, name="TrayIconThread").start()
             logging.info("Ícone da bandeja configurado.")
@@ -1433,8 +1409,21 @@ class ServerRestarterApp:
         self._app_stop_event.set()
         for srv_tab in self.servidores:
             srv_tab.stop_log_monitoring(from_tab_closure=True)
-            srv_tab.stop_scheduler_thread(from_tab_closure=True)
-
+            srv_tab.stop_scheduler(from_tab_closure=True)
+            srv_tab.engine.close()
+            self.service_status_cache.unsubscribe(srv_tab)
+        for pool in self.worker_pools.values():
+            pool.shutdown()
+        self.log_reactor.stop()
+        self.service_status_cache.stop()
+        if self.service_backend:
+            self.service_backend.close()
+
+        self._cancel_autosave()
+        # Espera uma gravação automática em andamento (a thread escritora é daemon e morreria com o
+        # processo). config_changed só é limpo depois que ela termina, então a gravação síncrona
+        # abaixo cobre qualquer alteração ainda não gravada (conteúdo igual ao arquivo é pulado).
+        self.config_store.flush(5)
         if self.config_changed:
             try:
                 self._save_app_config_to_file()
@@ -1518,7 +1507,10 @@ class ServerRestarterApp:
                                parent=self.root, alert=True) == "OK":
             logging.info(f"Removendo aba '{nome_servidor}'...")
             current_tab.stop_log_monitoring(from_tab_closure=True)
-            current_tab.stop_scheduler_thread(from_tab_closure=True)
+            current_tab.stop_scheduler(from_tab_closure=True)
+            # Cancela reinício pendente e timer de intervalo mínimo: nada pode disparar depois do destroy()
+            current_tab.engine.close()
+            self.service_status_cache.unsubscribe(current_tab)
 
             try:
                 self.main_notebook.forget(current_tab)
@@ -1562,26 +1554,37 @@ class ServerRestarterApp:
                 self.show_messagebox_from_thread("error", "Nome Duplicado", f"O nome '{novo_nome}' já está em uso.")
                 return
 
-            current_tab.nome = novo_nome
+            current_tab.nome = current_tab.engine.nome = novo_nome
+            self.restart_metrics.rename_server(nome_antigo, novo_nome)
             try:
                 # Encontra o ID da aba para renomear no notebook
                 for i, tab_id_str in enumerate(self.main_notebook.tabs()):
                     if self.main_notebook.nametowidget(tab_id_str) == current_tab:
                         self.main_notebook.tab(tab_id_str, text=novo_nome)
                         break
-                self.mark_config_changed()
+                current_tab._value_changed()
                 self.set_status_from_thread(f"Servidor '{nome_antigo}' renomeado para '{novo_nome}'.")
                 logging.info(f"Servidor '{nome_antigo}' renomeado para '{novo_nome}'.")
             except tk.TclError as e:
                 logging.error(f"Erro ao renomear aba no notebook: {e}", exc_info=True)
                 self.show_messagebox_from_thread("error", "Erro ao Renomear",
                                                  "Não foi possível atualizar o nome da aba.")
-                current_tab.nome = nome_antigo  # Reverte a mudança interna
+                current_tab.nome = current_tab.engine.nome = nome_antigo  # Reverte a mudança interna
+                current_tab._publish_settings()
+                self.restart_metrics.rename_server(novo_nome, nome_antigo)
 
         elif novo_nome is not None and not novo_nome.strip():
             self.show_messagebox_from_thread("warning", "Nome Inválido", "O nome do servidor não pode ser vazio.")
 
     def mark_config_changed(self):
+        # Pode vir de threads de trabalho: o estado da configuração só é mexido na thread da GUI
+        if threading.current_thread() is not threading.main_thread():
+            try:
+                self.root.after(0, self.mark_config_changed)
+            except (tk.TclError, RuntimeError):
+                pass
+            return
+        self._config_generation += 1
         if not self.config_changed:
             self.config_changed = True
             if hasattr(self, 'file_menu') and self.file_menu.winfo_exists():  # Checa se o menu existe
@@ -1589,41 +1592,114 @@ class ServerRestarterApp:
                     self.file_menu.entryconfigure("Salvar Configuração", state="normal")
                 except tk.TclError:  # Pode acontecer se o menu for destruído
                     pass
+        self._schedule_autosave()
+
+    def _schedule_autosave(self):
+        # Debounce: cada alteração reinicia a espera, limitada a AUTOSAVE_MAX_DELAY_MS desde a primeira
+        atraso = self.config.get("autosave_delay_ms", AUTOSAVE_DELAY_MS)
+        if not atraso or atraso <= 0 or self._app_stop_event.is_set():
+            return
+        agora = time.monotonic()
+        if self._autosave_first_change is None:
+            self._autosave_first_change = agora
+        restante_ms = AUTOSAVE_MAX_DELAY_MS - (agora - self._autosave_first_change) * 1000
+        self._cancel_autosave(reset=False)
+        self._autosave_job = self.root.after(int(max(0, min(atraso, restante_ms))), self._run_autosave)
+
+    def _cancel_autosave(self, reset=True):
+        if self._autosave_job is not None:
+            try:
+                self.root.after_cancel(self._autosave_job)
+            except tk.TclError:
+                pass
+            self._autosave_job = None
+        if reset:
+            self._autosave_first_change = None
+
+    def _run_autosave(self):
+        self._autosave_job = None
+        self._autosave_first_change = None
+        if not self.config_changed:
+            return
+        # Monta os dados na thread da GUI (variáveis Tk); serializar e gravar fica com a thread escritora
+        # A configuração só passa a "salva" quando a gravação termina (ver _on_autosave_written)
+        config_data = self._build_config_data()
+        geracao = self._config_generation
+        self.config_store.save_async(config_data, lambda gravou, erro: self._on_autosave_done(geracao, gravou, erro))
+
+    def _on_autosave_done(self, geracao, gravou, erro):
+        # Roda na thread escritora do JsonFileStore; o estado da configuração é mexido na thread da GUI
+        if erro is not None:
+            self.set_status_from_thread(f"Erro ao salvar configuração automaticamente: {erro}")
+            return  # Continua pendente; tenta de novo na próxima alteração ou ao sair
+        if gravou:
+            logging.debug(f"Configuração salva automaticamente em {self.config_store.path}")
+        if self._app_stop_event.is_set():
+            return  # Encerrando: shutdown_application já esperou esta gravação (flush)
+        try:
+            self.root.after(0, self._on_autosave_written, geracao, gravou)
+        except (tk.TclError, RuntimeError):  # root destruída
+            pass
+
+    def _on_autosave_written(self, geracao, gravou):
+        # Alterações feitas durante a gravação mantêm a configuração pendente
+        if self._app_stop_event.is_set() or geracao != self._config_generation:
+            return
+        self._set_config_saved_state(True)
+        if gravou:
+            self.set_status_from_thread("Configuração salva automaticamente.")
+
+    def _set_config_saved_state(self, salvo):
+        self.config_changed = not salvo
+        if hasattr(self, 'file_menu') and self.file_menu.winfo_exists():
+            try:
+                self.file_menu.entryconfigure("Salvar Configuração", state="disabled" if salvo else "normal")
+            except tk.TclError:
+                pass
+
+    def _build_config_data(self):
+        # Usa self.style.theme.name para pegar o nome do tema atual de forma segura
+        current_theme_name = "litera"  # Default
+        if hasattr(self.style, 'theme') and hasattr(self.style.theme, 'name'):
+            current_theme_name = self.style.theme.name
+
+        # Preserva as opções globais editáveis no JSON (ex.: linux_service_backend, dbus_bus_address)
+        config_data = {k: v for k, v in self.config.items() if k not in ("theme", "servers")}
+        config_data.update({"theme": current_theme_name,
+                            "servers": [dict(s.settings) for s in self.servidores]})
+        return config_data
 
     def _load_app_config_from_file(self):
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    logging.info(f"Configuração carregada de {self.config_file}")
-                    return config_data
+                config_data = self.config_store.load()
+                logging.info(f"Configuração carregada de {self.config_file}")
+                return config_data
         except json.JSONDecodeError as e_json:
             logging.error(f"Erro ao decodificar JSON em {self.config_file}: {e_json}", exc_info=True)
         except Exception as e_load:
             logging.error(f"Erro ao carregar configuração de {self.config_file}: {e_load}", exc_info=True)
+        if os.path.exists(self.config_file):
+            # O arquivo inválido será substituído na próxima gravação: guarda uma cópia para recuperação manual
+            copia = self.config_store.preserve_copy()
+            if copia:
+                logging.warning(f"Cópia do arquivo de configuração inválido preservada em {copia}.")
 
         logging.info(f"Arquivo de configuração {self.config_file} não encontrado ou inválido. Usando padrões.")
         return {"theme": "litera", "servers": []}  # Default para um tema que deve existir
 
     def _save_app_config_to_file(self):
-        # Usa self.style.theme.name para pegar o nome do tema atual de forma segura
-        current_theme_name = "litera"  # Default
-        if hasattr(self.style, 'theme') and hasattr(self.style.theme, 'name'):
-            current_theme_name = self.style.theme.name
-
-        config_data = {"theme": current_theme_name,
-                       "servers": [s.get_current_config() for s in self.servidores]}
+        # Gravação síncrona e atômica (menu "Salvar Configuração" e saída do programa)
+        self._cancel_autosave()
+        config_data = self._build_config_data()
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=4)
-            self.config_changed = False
-            if hasattr(self, 'file_menu') and self.file_menu.winfo_exists():
-                try:
-                    self.file_menu.entryconfigure("Salvar Configuração", state="disabled")
-                except tk.TclError:
-                    pass
+            gravou = self.config_store.save(config_data)
+            self._set_config_saved_state(True)
             self.set_status_from_thread("Configuração salva!")
-            logging.info(f"Configuração salva em {self.config_file}")
+            if gravou:
+                logging.info(f"Configuração salva em {self.config_file}")
+            else:
+                logging.debug(f"Configuração sem alterações; {self.config_file} não foi regravado.")
         except IOError as e_io:
             self.show_messagebox_from_thread("error", "Erro ao Salvar", f"Erro de E/S: {e_io}")
             logging.error(f"Erro de E/S ao salvar configuração: {e_io}", exc_info=True)
@@ -1640,13 +1716,16 @@ class ServerRestarterApp:
             return
 
         try:
-            with open(caminho, 'r', encoding='utf-8') as f:
-                loaded_config_data = json.load(f)
+            novo_store = JsonFileStore(caminho)
+            loaded_config_data = novo_store.load()
 
             # Limpar abas existentes
+            self._cancel_autosave()
+            self.config_store.flush(5)
             for srv_tab in list(self.servidores):  # Itera sobre uma cópia
                 srv_tab.stop_log_monitoring(from_tab_closure=True)
-                srv_tab.stop_scheduler_thread(from_tab_closure=True)
+                srv_tab.stop_scheduler(from_tab_closure=True)
+                self.service_status_cache.unsubscribe(srv_tab)
                 if self.main_notebook.winfo_exists():  # Verifica se o notebook ainda existe
                     try:
                         self.main_notebook.forget(srv_tab)
@@ -1657,6 +1736,7 @@ class ServerRestarterApp:
 
             # Carregar nova configuração
             self.config_file = caminho  # Atualiza o arquivo de configuração padrão
+            self.config_store = novo_store
             self.config = loaded_config_data
             new_theme = self.config.get("theme", "litera")  # Default para litera
 
@@ -1669,13 +1749,12 @@ class ServerRestarterApp:
                 self.config["theme"] = "litera"
                 self.theme_var.set("litera")  # Atualiza a variável do menu de temas
 
+            configure_logging(self.config)  # Nível e rotação do novo arquivo
+            self.log_level_var.set(set_log_level(self.config.get("log_level", DEFAULT_LOG_LEVEL)))
+
             self.inicializar_servidores_das_configuracoes()
-            self.config_changed = False
-            if hasattr(self, 'file_menu') and self.file_menu.winfo_exists():
-                try:
-                    self.file_menu.entryconfigure("Salvar Configuração", state="disabled")
-                except tk.TclError:
-                    pass
+            self._cancel_autosave()
+            self._set_config_saved_state(True)
 
             self.set_status_from_thread(f"Configuração carregada de {os.path.basename(caminho)}")
             logging.info(f"Configuração carregada de {caminho}")
@@ -1709,6 +1788,7 @@ class ServerRestarterApp:
         tools_menu = ttk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Ferramentas", menu=tools_menu)
         tools_menu.add_command(label="Exportar Logs da Aba Atual", command=self.export_current_tab_logs)
+        tools_menu.add_command(label="Exportar Métricas de Reinício...", command=self.export_restart_metrics)
 
         theme_menu = ttk.Menu(tools_menu, tearoff=0)
         tools_menu.add_cascade(label="Mudar Tema", menu=theme_menu)
@@ -1722,10 +1802,24 @@ class ServerRestarterApp:
         for theme_name in sorted(self.style.theme_names()):
             theme_menu.add_radiobutton(label=theme_name, variable=self.theme_var, command=self.trocar_tema)
 
+        log_level_menu = ttk.Menu(tools_menu, tearoff=0)
+        tools_menu.add_cascade(label="Nível de Log", menu=log_level_menu)
+        self.log_level_var = tk.StringVar(value=set_log_level(self.config.get("log_level", DEFAULT_LOG_LEVEL)))
+        for nivel in LOG_LEVELS:
+            log_level_menu.add_radiobutton(label=nivel, value=nivel, variable=self.log_level_var,
+                                           command=self.trocar_nivel_log)
+
         help_menu = ttk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Ajuda", menu=help_menu)
         help_menu.add_command(label="Sobre", command=self.show_about)
 
+    def trocar_nivel_log(self):
+        nivel = set_log_level(self.log_level_var.get())
+        self.config["log_level"] = nivel
+        self.mark_config_changed()
+        logging.warning(f"Nível de log alterado para: {nivel}")  # WARNING: fica registrado em qualquer nível
+        self.set_status_from_thread(f"Nível de log alterado para '{nivel}'.")
+
     def trocar_tema(self, event=None):
         novo_tema = self.theme_var.get()
         try:
@@ -1754,10 +1848,12 @@ class ServerRestarterApp:
     def export_current_tab_logs(self):
         current_tab_widget = self.get_current_servidor_tab_widget()
         text_widget_to_export = None
+        content_getter = None
         filename_part = ""
 
         if current_tab_widget:
             text_widget_to_export = current_tab_widget.text_area_log
+            content_getter = current_tab_widget.get_log_buffer_text  # Exporta do ring buffer da aba
             filename_part = f"Logs de '{current_tab_widget.nome}'"
         elif self.main_notebook.winfo_exists() and self.main_notebook.tabs():
             try:
@@ -1770,12 +1866,12 @@ class ServerRestarterApp:
                 pass
 
         if text_widget_to_export and text_widget_to_export.winfo_exists():
-            self._export_text_widget_content(text_widget_to_export, filename_part)
+            self._export_text_widget_content(text_widget_to_export, filename_part, content_getter)
         else:
             self.show_messagebox_from_thread("info", "Exportar Logs",
                                              "Selecione uma aba de servidor ou a aba 'Log do Sistema' para exportar.")
 
-    def _export_text_widget_content(self, text_widget, default_filename_part):
+    def _export_text_widget_content(self, text_widget, default_filename_part, content_getter=None):
         # Sanitiza o nome do arquivo
         safe_filename_part = re.sub(r'[^\w\s-]', '', default_filename_part).strip().replace(' ', '_')
         initial_filename = f"{safe_filename_part}.txt" if safe_filename_part else "logs.txt"
@@ -1789,11 +1885,14 @@ class ServerRestarterApp:
         if caminho_arquivo:
             try:
                 if text_widget.winfo_exists():
-                    # Salva o estado, habilita, pega o texto, restaura o estado
-                    original_state = text_widget.cget("state")
-                    text_widget.config(state="normal")
-                    content = text_widget.get('1.0', 'end-1c')  # end-1c para não pegar o newline final
-                    text_widget.config(state=original_state)
+                    if content_getter:
+                        content = content_getter()
+                    else:
+                        # Salva o estado, habilita, pega o texto, restaura o estado
+                        original_state = text_widget.cget("state")
+                        text_widget.config(state="normal")
+                        content = text_widget.get('1.0', 'end-1c')  # end-1c para não pegar o newline final
+                        text_widget.config(state=original_state)
 
                     with open(caminho_arquivo, 'w', encoding='utf-8') as f:
                         f.write(content)
@@ -1857,6 +1956,25 @@ class ServerRestarterApp:
         self.status_label_var = tk.StringVar(value="Pronto.")
         self.status_label = ttk.Label(self.status_bar_frame, textvariable=self.status_label_var, anchor='w')
         self.status_label.pack(side='left', fill='x', expand=True, padx=5, pady=(2, 0))  # Adicionado pady
+        # Ocupação dos pools de trabalho e fila de admissão de reinícios, atualizada a cada segundo
+        self.pools_status_var = tk.StringVar()
+        self.pools_status_label = ttk.Label(self.status_bar_frame, textvariable=self.pools_status_var, anchor='e')
+        self.pools_status_label.pack(side='right', padx=5, pady=(2, 0))
+        ToolTip(self.pools_status_label, text="Workers ocupados/limite e tarefas na fila de cada pool; "
+                                              "reinícios em execução e aguardando vaga no limite do host.")
+        self._update_pools_status()
+
+    def _update_pools_status(self):
+        if self._app_stop_event.is_set() or not self.root.winfo_exists():
+            return
+        partes = []
+        for rotulo, chave in (("Reinícios", "restart"), ("Serviços", "service")):
+            stats = self.worker_pools[chave].stats()
+            partes.append(f"{rotulo}: {stats['ocupados']}/{stats['max_workers']} fila {stats['fila']}")
+        admissao = self.restart_admission.snapshot()
+        partes.append(f"Em reinício: {len(admissao['ativos'])} aguardando vaga: {len(admissao['fila'])}")
+        self.pools_status_var.set(" | ".join(partes))
+        self.root.after(1000, self._update_pools_status)
 
     def atualizar_log_sistema_periodicamente(self):  # Corrigido: Indentação para ser método da classe
         if self._app_stop_event.is_set() or not self.root.winfo_exists() or \
@@ -1864,30 +1982,35 @@ class ServerRestarterApp:
             return
 
         try:
-            log_file_path = 'server_restarter.log'
-            if os.path.exists(log_file_path):
-                with open(log_file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    conteudo = f.read()
-
-                self.system_log_text_area.config(state='normal')
-                current_scroll_pos_tuple = self.system_log_text_area.yview()  # Retorna tupla (primeiro, ultimo)
-                current_scroll_pos = current_scroll_pos_tuple[0]
-
-                self.system_log_text_area.delete('1.0', 'end')
-                self.system_log_text_area.insert('end', conteudo)
-
-                if current_scroll_pos >= 0.99:
-                    self.system_log_text_area.yview_moveto(1.0)
-                else:
-                    self.system_log_text_area.yview_moveto(current_scroll_pos)
-
-                self.system_log_text_area.config(state='disabled')
-                self._system_log_update_error_count = 0
-            else:
-                self.system_log_text_area.config(state='normal')
-                self.system_log_text_area.delete('1.0', 'end')
-                self.system_log_text_area.insert('end', f"Arquivo de log '{log_file_path}' não encontrado.")
-                self.system_log_text_area.config(state='disabled')
+            linhas, reiniciado = self._system_log_reader.read_new_lines()
+            text_area = self.system_log_text_area
+            # Arquivo truncado/rotacionado/removido (ou aviso de ausência na tela): recomeça a exibição
+            if reiniciado or (self._system_log_missing_shown and not self._system_log_reader.file_missing):
+                text_area.config(state='normal')
+                text_area.delete('1.0', 'end')
+                text_area.config(state='disabled')
+                self._system_log_missing_shown = False
+
+            if self._system_log_reader.file_missing:
+                if not self._system_log_missing_shown:
+                    text_area.config(state='normal')
+                    text_area.delete('1.0', 'end')
+                    text_area.insert('end', f"Arquivo de log '{LOG_FILENAME}' não encontrado.")
+                    text_area.config(state='disabled')
+                    self._system_log_missing_shown = True
+            elif linhas:
+                if len(linhas) > self.system_log_max_lines:
+                    linhas = linhas[-self.system_log_max_lines:]
+                estava_no_fim = text_area.yview()[1] >= 0.99
+                text_area.config(state='normal')
+                text_area.insert('end', "".join(linhas))
+                total_linhas = int(text_area.index('end-1c').split('.')[0])
+                if total_linhas > self.system_log_max_lines:
+                    text_area.delete('1.0', f'{total_linhas - self.system_log_max_lines + 1}.0')
+                if estava_no_fim:
+                    text_area.yview_moveto(1.0)
+                text_area.config(state='disabled')
+            self._system_log_update_error_count = 0
 
         except tk.TclError as e_tcl_syslog:
             if "invalid command name" not in str(e_tcl_syslog).lower():
@@ -1898,7 +2021,7 @@ class ServerRestarterApp:
                 self._system_log_update_error_count += 1
 
         if not self._app_stop_event.is_set() and self.root.winfo_exists():
-            self.root.after(3000, self.atualizar_log_sistema_periodicamente)
+            self.root.after(1000, self.atualizar_log_sistema_periodicamente)
 
     def iniciar_selecao_servico_para_aba(self, tab_instance, os_type):
         worker = None
@@ -1919,10 +2042,16 @@ class ServerRestarterApp:
             return
 
         progress_win, _ = self._show_progress_dialog(f"Carregando Serviços ({os_type.capitalize()})", "Aguarde...")
-        threading.Thread(target=worker, args=(progress_win, tab_instance), daemon=True,
-                         name=f"ServiceList-{os_type}-{tab_instance.nome}").start()
+        aceito = self.worker_pools["service"].submit(worker, progress_win, tab_instance,
+                                                     name=f"ServiceList-{os_type}-{tab_instance.nome}")
+        if not aceito:
+            progress_win.destroy()
+            self.show_messagebox_from_thread("warning", "Ocupado",
+                                             "Há consultas de serviços demais em andamento. Tente novamente.")
 
     def _obter_servicos_worker_win(self, progress_win, tab_instance):
+        import pythoncom  # pywin32 é importado só quando a lista de serviços é aberta
+        import win32com.client
         initialized_com = False
         try:
             pythoncom.CoInitialize()
@@ -2207,15 +2336,11 @@ def main():
         elif root_window.winfo_exists():  # Se app falhou no init mas root existe
             root_window.destroy()
         logging.info("Aplicação finalizada (bloco finally do main).")
-
-
-def handle_unhandled_thread_exception(args):
-    thread_name = args.thread.name if hasattr(args, 'thread') and hasattr(args.thread, 'name') else 'ThreadDesconhecida'
-    logging.critical(f"EXCEÇÃO NÃO TRATADA NA THREAD '{thread_name}':",
-                     exc_info=(args.exc_type, args.exc_value, args.exc_traceback))
+        stop_logging()
 
 
 if __name__ == '__main__':
+    configure_logging()  # Padrões até o JSON ser lido pela aplicação
     threading.excepthook = handle_unhandled_thread_exception
 
     if platform.system() == "Linux" and SYSTEMCTL_AVAILABLE:
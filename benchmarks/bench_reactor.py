@@ -0,0 +1,173 @@
+# ==============================================================================
+# Benchmark de escala do monitoramento de logs: 1, 10, 50 e 200 servidores.
+# Compara o LogReactor compartilhado (uma thread para todos) com o modelo antigo
+# de threads por aba (monitor de pasta a cada 5 s + tail com polling de 200 ms +
+# scheduler a cada 15 s). Mede threads, CPU ociosa e latência de entrega de linha.
+# Uso: python benchmarks/bench_reactor.py [--servers 1,10,50,200] [--idle 3]
+# ==============================================================================
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from PQD_RestarterCore import (  # noqa: E402
+    LogReactor, ServerLogFollower, CONSOLE_LOG_FILENAME, INOTIFY_AVAILABLE, find_latest_log_folder
+)
+
+
+def criar_servidores(base, qtd):
+    arquivos = []
+    for i in range(qtd):
+        pasta_logs = os.path.join(base, f"srv{i:03d}", "logs_2026-01-01_00-00-00")
+        os.makedirs(pasta_logs)
+        caminho = os.path.join(pasta_logs, CONSOLE_LOG_FILENAME)
+        open(caminho, "w").close()
+        arquivos.append(caminho)
+    return arquivos
+
+
+class Coletor:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chegadas = {}
+        self.evento = threading.Event()
+        self.esperadas = 0
+
+    def recebeu(self, chave):
+        with self.lock:
+            if chave not in self.chegadas:
+                self.chegadas[chave] = time.perf_counter()
+                if len(self.chegadas) >= self.esperadas:
+                    self.evento.set()
+
+
+def medir_latencia(arquivos, coletor, rodadas=5):
+    latencias = []
+    for rodada in range(rodadas):
+        with coletor.lock:
+            coletor.chegadas = {}
+            coletor.esperadas = len(arquivos)
+            coletor.evento.clear()
+        envio = {}
+        for i, caminho in enumerate(arquivos):
+            envio[(i, rodada)] = time.perf_counter()
+            with open(caminho, "a") as fh:
+                fh.write(f"MARK {i} {rodada}\n")
+        coletor.evento.wait(10)
+        with coletor.lock:
+            latencias.extend((coletor.chegadas[k] - envio[k]) * 1000 for k in envio if k in coletor.chegadas)
+        time.sleep(0.05)
+    latencias.sort()
+    if not latencias:
+        return float("nan"), float("nan")
+    return latencias[len(latencias) // 2], latencias[int(len(latencias) * 0.95) - 1 if len(latencias) > 1 else 0]
+
+
+def extrair_chave(linha):
+    partes = linha.split()
+    if len(partes) == 3 and partes[0] == "MARK":
+        return int(partes[1]), int(partes[2])
+    return None
+
+
+def cenario_reator(base, arquivos, coletor):
+    reator = LogReactor()
+    reator.start()
+    followers = []
+    for i in range(len(arquivos)):
+        def on_lines(linhas, _caminho):
+            for linha in linhas:
+                chave = extrair_chave(linha)
+                if chave:
+                    coletor.recebeu(chave)
+        follower = ServerLogFollower(reator, os.path.join(base, f"srv{i:03d}"), on_lines, name=f"srv{i}")
+        follower.start()
+        followers.append(follower)
+        reator.call_later(15, lambda: None)  # Equivalente ao timer do scheduler de cada aba
+
+    def encerrar():
+        for follower in followers:
+            follower.stop()
+        reator.stop()
+    return encerrar
+
+
+def cenario_legado(base, arquivos, coletor):
+    parar = threading.Event()
+
+    def monitor(pasta):
+        while not parar.is_set():
+            find_latest_log_folder(pasta)
+            parar.wait(5)
+
+    def tail(caminho):
+        with open(caminho, "r", encoding="latin-1") as fh:
+            fh.seek(0, os.SEEK_END)
+            while not parar.is_set():
+                linha = fh.readline()
+                if linha:
+                    chave = extrair_chave(linha)
+                    if chave:
+                        coletor.recebeu(chave)
+                else:
+                    time.sleep(0.2)
+
+    def scheduler():
+        while not parar.is_set():
+            parar.wait(15)
+
+    threads = []
+    for i, caminho in enumerate(arquivos):
+        for alvo, args in ((monitor, (os.path.join(base, f"srv{i:03d}"),)), (tail, (caminho,)), (scheduler, ())):
+            t = threading.Thread(target=alvo, args=args, daemon=True)
+            t.start()
+            threads.append(t)
+
+    def encerrar():
+        parar.set()
+        for t in threads:
+            t.join(1)
+    return encerrar
+
+
+def executar(nome, fabrica, qtd, ocioso_s):
+    base = tempfile.mkdtemp(prefix="bench_reactor_")
+    try:
+        arquivos = criar_servidores(base, qtd)
+        coletor = Coletor()
+        threads_antes = threading.active_count()
+        encerrar = fabrica(base, arquivos, coletor)
+        time.sleep(0.5)  # Deixa os followers abrirem os arquivos
+        threads = threading.active_count() - threads_antes
+        cpu_inicio = time.process_time()
+        time.sleep(ocioso_s)
+        cpu_ocioso = (time.process_time() - cpu_inicio) / ocioso_s * 100
+        p50, p95 = medir_latencia(arquivos, coletor)
+        encerrar()
+        print(f"{qtd:>9} | {nome:<8} | {threads:>7} | {cpu_ocioso:>8.2f}% | {p50:>9.1f} ms | {p95:>9.1f} ms")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", default="1,10,50,200")
+    parser.add_argument("--idle", type=float, default=3.0, help="segundos medindo CPU ociosa")
+    args = parser.parse_args()
+
+    modo = "inotify" if INOTIFY_AVAILABLE else "polling"
+    print(f"LogReactor em modo {modo}\n")
+    print(f"{'servidores':>9} | {'modelo':<8} | {'threads':>7} | {'CPU ocio':>9} | {'lat. p50':>12} | {'lat. p95':>12}")
+    print("-" * 72)
+    for qtd in (int(x) for x in args.servers.split(",")):
+        executar("reator", cenario_reator, qtd, args.idle)
+        executar("legado", cenario_legado, qtd, args.idle)
+
+
+if __name__ == '__main__':
+    main()
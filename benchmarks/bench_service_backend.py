@@ -0,0 +1,135 @@
+# ==============================================================================
+# Benchmark do backend de serviços no Linux: SystemdDBusBackend (conexão D-Bus
+# persistente) x fork/exec por consulta, como o caminho via sudo/systemctl.
+# Não precisa de systemd: sobe um dbus-daemon privado e um systemd simulado
+# (Manager.GetUnit/LoadUnit/StartUnit/StopUnit/RestartUnit + Properties.GetAll),
+# o mesmo barramento que pode ser usado em testes via "dbus_bus_address".
+# Uso: python benchmarks/bench_service_backend.py [--calls N]
+# ==============================================================================
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from PQD_RestarterCore import (  # noqa: E402
+    JEEPNEY_AVAILABLE, SYSTEMD_BUS_NAME, SYSTEMD_MANAGER_INTERFACE, SystemdDBusBackend
+)
+
+if JEEPNEY_AVAILABLE:
+    from jeepney import MessageType, new_error, new_method_return
+    from jeepney.bus_messages import message_bus
+    from jeepney.io.blocking import open_dbus_connection
+
+
+class MockSystemd:
+    # systemd mínimo no barramento privado: cada unidade é um dict de propriedades
+    def __init__(self, address, units):
+        self.units = units
+        self.conn = open_dbus_connection(bus=address)
+        self.conn.send_and_get_reply(message_bus.RequestName(SYSTEMD_BUS_NAME))
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="MockSystemd")
+        self.thread.start()
+
+    @staticmethod
+    def _path(unit):
+        return "/org/freedesktop/systemd1/unit/" + unit.replace(".", "_2e").replace("-", "_2d")
+
+    def _unit_from_path(self, path):
+        return next((u for u in self.units if self._path(u) == path), None)
+
+    def _handle(self, msg):
+        membro = msg.header.fields.get(3)  # HeaderFields.member
+        interface = msg.header.fields.get(2)  # HeaderFields.interface
+        if interface == SYSTEMD_MANAGER_INTERFACE:
+            unit = msg.body[0]
+            if membro == "GetUnit":
+                if unit not in self.units or self.units[unit]["LoadState"] != "loaded":
+                    return new_error(msg, "org.freedesktop.systemd1.NoSuchUnit", "s", (f"Unit {unit} not loaded.",))
+                return new_method_return(msg, "o", (self._path(unit),))
+            if membro == "LoadUnit":
+                self.units.setdefault(unit, {"LoadState": "not-found", "ActiveState": "inactive",
+                                             "SubState": "dead"})
+                return new_method_return(msg, "o", (self._path(unit),))
+            if membro in ("StartUnit", "StopUnit", "RestartUnit"):
+                props = self.units.get(unit)
+                if not props or props["LoadState"] != "loaded":
+                    return new_error(msg, "org.freedesktop.systemd1.NoSuchUnit", "s", (f"Unit {unit} not found.",))
+                props["ActiveState"] = "inactive" if membro == "StopUnit" else "active"
+                return new_method_return(msg, "o", ("/org/freedesktop/systemd1/job/1",))
+        if membro == "GetAll":
+            unit = self._unit_from_path(msg.header.fields.get(1))  # HeaderFields.path
+            if unit is not None:
+                return new_method_return(msg, "a{sv}", ({k: ("s", v) for k, v in self.units[unit].items()},))
+        return new_error(msg, "org.freedesktop.DBus.Error.UnknownMethod", "s", (str(membro),))
+
+    def _loop(self):
+        while True:
+            try:
+                msg = self.conn.receive()
+            except (OSError, ValueError):
+                return
+            if msg.header.message_type == MessageType.method_call:
+                self.conn.send(self._handle(msg))
+
+
+def iniciar_barramento():
+    daemon = shutil.which("dbus-daemon")
+    if not daemon:
+        sys.exit("dbus-daemon não encontrado.")
+    proc = subprocess.Popen([daemon, "--session", "--nofork", "--print-address=1"],
+                            stdout=subprocess.PIPE, text=True)
+    endereco = proc.stdout.readline().strip()
+    return proc, endereco
+
+
+def medir(func, chamadas):
+    inicio = time.perf_counter()
+    for _ in range(chamadas):
+        func()
+    return (time.perf_counter() - inicio) / chamadas * 1000  # ms por chamada
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+    if not JEEPNEY_AVAILABLE:
+        sys.exit("jeepney não instalado (pip install jeepney).")
+
+    proc, endereco = iniciar_barramento()
+    try:
+        MockSystemd(endereco, {"arma.service": {"LoadState": "loaded", "ActiveState": "active",
+                                                "SubState": "running"}})
+        backend = SystemdDBusBackend(endereco)
+
+        # Verificação funcional do backend contra o barramento simulado
+        assert backend.get_status("arma.service") == "RUNNING"
+        backend.unit_action("stop", "arma.service")
+        assert backend.get_status("arma.service") == "STOPPED"
+        backend.unit_action("restart", "arma.service")
+        assert backend.get_status("arma.service") == "RUNNING"
+        assert backend.get_status("inexistente.service") == "NOT_FOUND"
+        print(f"Backend D-Bus OK contra barramento simulado ({endereco})\n")
+
+        dbus_ms = medir(lambda: backend.get_status("arma.service"), args.calls)
+        fork_ms = medir(lambda: subprocess.run(["sh", "-c", "echo active"], capture_output=True, text=True),
+                        max(20, args.calls // 10))
+        print(f"{'consulta de status':<38} | {'ms/chamada':>10}")
+        print("-" * 52)
+        print(f"{'D-Bus (conexão persistente)':<38} | {dbus_ms:>10.3f}")
+        print(f"{'fork/exec (sem sudo/PAM, limite inf.)':<38} | {fork_ms:>10.3f}")
+        print("\nO caminho antigo faz de 1 a 4 processos sudo+systemctl por consulta; "
+              "cada um custa ao menos a linha de fork/exec acima.")
+        backend.close()
+    finally:
+        proc.terminate()
+        proc.wait(5)
+
+
+if __name__ == '__main__':
+    main()
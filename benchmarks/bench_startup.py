@@ -0,0 +1,190 @@
+# ==============================================================================
+# Benchmark de inicialização: tempo de import, tempo até a primeira pintura da
+# janela e tempo até a primeira linha de log acompanhada (first tail), na GUI e
+# no modo headless. Cada medição roda num processo novo (partida a frio do
+# interpretador, como o .exe), dentro de uma pasta temporária com um servidor
+# configurado. Também indica se pystray/pywin32/webbrowser foram importados
+# antes da janela aparecer (não deveriam). Pillow não entra na lista: o próprio
+# ttkbootstrap o importa.
+# A GUI precisa de display (no Linux, DISPLAY definido); sem display só o
+# import e o modo headless são medidos.
+# Uso: python benchmarks/bench_startup.py [--runs 5]
+# ==============================================================================
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+MODULOS_OPCIONAIS = ("pystray", "win32com", "pythoncom", "webbrowser")
+
+# Executado no processo filho. O relógio começa antes de qualquer import do projeto.
+DRIVER = r'''
+import time
+T0 = time.perf_counter()
+import json, os, sys, threading
+sys.path.insert(0, sys.argv[1])
+modo, pasta_raiz = sys.argv[2], sys.argv[3]
+resultado = {}
+
+def criar_log():
+    # Log novo criado depois do início do monitoramento: é lido desde a primeira linha
+    pasta = os.path.join(pasta_raiz, "logs_2026-01-01_00-00-00")
+    os.makedirs(pasta)
+    with open(os.path.join(pasta, "console.log"), "w") as fh:
+        fh.write("BENCH primeira linha\n")
+
+def aguardar_reator(reator):
+    # Barreira: o reator atende na ordem, então o início dos followers já foi processado
+    # (um log criado antes disso seria tratado como preexistente e lido do fim).
+    feito = threading.Event()
+    reator.call_soon_threadsafe(feito.set)
+    feito.wait(10)
+
+def opcionais_carregados():
+    return [m for m in %r if m in sys.modules]
+
+if modo == "headless":
+    import PQD_RestarterEngine as engine_mod
+    resultado["import_ms"] = (time.perf_counter() - T0) * 1000
+    primeira_linha = threading.Event()
+    restarter = engine_mod.HeadlessRestarter("server_restarter_config.json")
+    restarter.engines[0].on_log_lines = lambda linhas, caminho: primeira_linha.set()
+    aguardar_reator(restarter.log_reactor)
+    resultado["pronto_ms"] = (time.perf_counter() - T0) * 1000
+    criar_log()
+    if primeira_linha.wait(10):
+        resultado["first_tail_ms"] = (time.perf_counter() - T0) * 1000
+    resultado["opcionais"] = opcionais_carregados()
+    restarter.shutdown()
+elif modo == "gui-import":
+    import PQD_ScheduledRestart
+    resultado["import_ms"] = (time.perf_counter() - T0) * 1000
+    resultado["opcionais"] = opcionais_carregados()
+else:
+    import PQD_ScheduledRestart as gui
+    resultado["import_ms"] = (time.perf_counter() - T0) * 1000
+    root = gui.ttk.Window()
+    app = gui.ServerRestarterApp(root)
+    resultado["pronto_ms"] = (time.perf_counter() - T0) * 1000
+    tab = app.servidores[0]
+    original = tab.engine.on_log_lines
+
+    def on_lines(linhas, caminho):
+        original(linhas, caminho)
+        if "first_tail_ms" not in resultado:
+            resultado["first_tail_ms"] = (time.perf_counter() - T0) * 1000
+
+    tab.engine.on_log_lines = on_lines
+
+    def pintou():
+        resultado["first_paint_ms"] = (time.perf_counter() - T0) * 1000
+        resultado["opcionais"] = opcionais_carregados()
+        aguardar_reator(app.log_reactor)
+        criar_log()
+
+    def encerrar():
+        if "first_tail_ms" in resultado or (time.perf_counter() - T0) > 15:
+            app.shutdown_application()
+        else:
+            root.after(10, encerrar)
+
+    root.after_idle(root.after, 0, pintou)
+    root.after(50, encerrar)
+    root.mainloop()
+print("RESULTADO " + json.dumps(resultado))
+''' % (MODULOS_OPCIONAIS,)
+
+
+def preparar_pasta():
+    base = tempfile.mkdtemp(prefix="bench_startup_")
+    pasta_raiz = os.path.join(base, "servidor")
+    os.makedirs(pasta_raiz)
+    config = {"theme": "litera", "linux_service_backend": "systemctl",
+              "servers": [{"nome": "Bench", "log_folder": pasta_raiz, "service_name": ""}]}
+    with open(os.path.join(base, "server_restarter_config.json"), "w", encoding="utf-8") as fh:
+        json.dump(config, fh)
+    return base, pasta_raiz
+
+
+def executar(modo):
+    base, pasta_raiz = preparar_pasta()
+    try:
+        proc = subprocess.run([sys.executable, "-c", DRIVER, RAIZ, modo, pasta_raiz], cwd=base,
+                              capture_output=True, text=True, timeout=60)
+        for linha in proc.stdout.splitlines():
+            if linha.startswith("RESULTADO "):
+                return json.loads(linha[len("RESULTADO "):])
+        raise RuntimeError(f"Execução '{modo}' falhou:\n{proc.stderr[-2000:]}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+def imports_mais_pesados(modulo, quantidade=8):
+    # -X importtime: tempo acumulado de cada import; mostra os maiores abaixo do módulo principal
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"], cwd=RAIZ,
+                          capture_output=True, text=True, timeout=60)
+    entradas = []
+    for linha in proc.stderr.splitlines():
+        partes = linha.split("|")
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            entradas.append((int(partes[1]), partes[2].strip()))
+    return sorted(entradas, reverse=True)[:quantidade]
+
+
+def gui_importavel():
+    try:
+        import tkinter
+        import ttkbootstrap  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def display_disponivel():
+    return platform.system() != "Linux" or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def fmt(valores):
+    if not valores:
+        return f"{'-':>9}"
+    return f"{statistics.median(valores):>6.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    modos = ["headless"]
+    if gui_importavel():
+        modos.append("gui" if display_disponivel() else "gui-import")
+    if "gui" not in modos:
+        print("Sem display (ou sem ttkbootstrap): a GUI não é aberta, só o import é medido.\n")
+    print(f"Mediana de {args.runs} execuções a frio:\n")
+    print(f"{'modo':<10} | {'import':>9} | {'pronto':>9} | {'1ª pintura':>10} | {'1º tail':>9} | opcionais importados")
+    print("-" * 91)
+    for modo in modos:
+        resultados = [executar(modo) for _ in range(args.runs)]
+
+        def coluna(chave):
+            return [r[chave] for r in resultados if chave in r]
+
+        opcionais = sorted({m for r in resultados for m in r.get("opcionais", [])})
+        print(f"{modo:<10} | {fmt(coluna('import_ms'))} | {fmt(coluna('pronto_ms'))} | "
+              f"{fmt(coluna('first_paint_ms')):>10} | {fmt(coluna('first_tail_ms'))} | "
+              f"{', '.join(opcionais) or 'nenhum'}")
+
+    for modulo in ("PQD_RestarterEngine",) + (("PQD_ScheduledRestart",) if gui_importavel() else ()):
+        print(f"\nImports mais pesados de {modulo} (tempo acumulado):")
+        for micros, nome in imports_mais_pesados(modulo):
+            print(f"  {micros / 1000:>8.1f} ms  {nome}")
+
+
+if __name__ == '__main__':
+    main()
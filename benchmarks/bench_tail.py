@@ -0,0 +1,162 @@
+# ==============================================================================
+# Benchmark do tail do console.log: ChunkedLineReader (blocos de 64 KiB em bytes,
+# linha incompleta guardada até o '\n') x modo texto latin-1 com readline() (uma
+# chamada por linha) e com readlines() (implementação anterior do follower).
+# Mede linhas/s em dois cenários: drenar um log grande de uma vez e acompanhar um
+# log que cresce em lotes pequenos (o caso do servidor rodando). Depois grava o
+# arquivo em pedaços de tamanho aleatório, cortando linhas ao meio, e conta quantas
+# linhas cada leitor entrega partidas (fragmentos que podem esconder um gatilho).
+# Cada medição é a melhor de --runs execuções.
+# Uso: python benchmarks/bench_tail.py [--lines 500000] [--runs 3] [--crlf]
+# ==============================================================================
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from PQD_RestarterCore import ChunkedLineReader  # noqa: E402
+
+MODELOS = [
+    "{h} SCRIPT       : Player '{n}' connected, identity {i:08x}-4f2a",
+    "{h} NETWORK      : ### Updating connection [{i}] rtt {r} ms",
+    "{h}  SCRIPT    (W): Entity {i} has no physics component",
+    "{h} WORLD        : Game Over - ServerAdminTools_GameEnd {i}",
+]
+
+
+def gerar_linhas(quantidade, quebra):
+    aleatorio = random.Random(1)
+    linhas = []
+    for i in range(quantidade):
+        h = f"{i // 3600000 % 24:02d}:{i // 60000 % 60:02d}:{i // 1000 % 60:02d}.{i % 1000:03d}"
+        texto = aleatorio.choice(MODELOS).format(h=h, n=f"Jogador{i % 97}", i=i, r=aleatorio.randint(5, 300))
+        linhas.append(texto + quebra)
+    return "".join(linhas).encode('latin-1')
+
+
+class LeitorReadline:
+    nome = "texto + readline() por linha"
+
+    def __init__(self, caminho):
+        self.fh = open(caminho, 'r', encoding='latin-1', errors='replace')
+
+    def ler(self):
+        linhas = []
+        for linha in iter(self.fh.readline, ''):
+            linhas.append(linha)
+        return linhas
+
+
+class LeitorReadlines(LeitorReadline):
+    nome = "texto + readlines()"
+
+    def ler(self):
+        return self.fh.readlines()
+
+
+class LeitorBlocos:
+    nome = "blocos de bytes (ChunkedLineReader)"
+
+    def __init__(self, caminho):
+        self.fh = open(caminho, 'rb', buffering=0)
+        self.tail = ChunkedLineReader(self.fh)
+
+    def ler(self):
+        linhas = self.tail.read_lines()
+        while not self.tail.at_eof:
+            linhas.extend(self.tail.read_lines())
+        return linhas
+
+
+LEITORES = (LeitorReadline, LeitorReadlines, LeitorBlocos)
+
+
+def drenar(classe, caminho):
+    leitor = classe(caminho)
+    inicio = time.perf_counter()
+    total = len(leitor.ler())
+    duracao = time.perf_counter() - inicio
+    leitor.fh.close()
+    return total, duracao
+
+
+def acompanhar(classe, caminho, dados, tamanho_lote):
+    # O arquivo cresce de tamanho_lote em tamanho_lote bytes (sempre em fim de linha) e é lido após cada escrita
+    open(caminho, 'wb').close()
+    leitor = classe(caminho)
+    total = 0
+    duracao = 0.0
+    with open(caminho, 'ab', buffering=0) as escritor:
+        pos = 0
+        while pos < len(dados):
+            fim = dados.find(b'\n', pos + tamanho_lote)
+            fim = len(dados) if fim == -1 else fim + 1
+            escritor.write(dados[pos:fim])
+            pos = fim
+            inicio = time.perf_counter()
+            total += len(leitor.ler())
+            duracao += time.perf_counter() - inicio
+    leitor.fh.close()
+    return total, duracao
+
+
+def contar_fragmentos(classe, caminho, dados):
+    # Escrita em pedaços aleatórios (cortando linhas ao meio), com uma leitura depois de cada pedaço
+    esperadas = set(dados.decode('latin-1').replace('\r\n', '\n').splitlines(True))
+    aleatorio = random.Random(2)
+    open(caminho, 'wb').close()
+    leitor = classe(caminho)
+    fragmentos = 0
+    with open(caminho, 'ab', buffering=0) as escritor:
+        pos = 0
+        while pos < len(dados):
+            fim = min(len(dados), pos + aleatorio.randint(1, 400))
+            escritor.write(dados[pos:fim])
+            pos = fim
+            fragmentos += sum(1 for linha in leitor.ler() if linha not in esperadas)
+    leitor.fh.close()
+    return fragmentos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=500000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--crlf", action="store_true", help="quebras de linha \\r\\n (servidor no Windows)")
+    args = parser.parse_args()
+
+    dados = gerar_linhas(args.lines, "\r\n" if args.crlf else "\n")
+    pasta = tempfile.mkdtemp(prefix="bench_tail_")
+    try:
+        caminho = os.path.join(pasta, "console.log")
+        with open(caminho, 'wb') as fh:
+            fh.write(dados)
+        print(f"{args.lines} linhas, {len(dados) / 1024 / 1024:.1f} MiB, "
+              f"quebra {'CRLF' if args.crlf else 'LF'}\n")
+        print(f"{'leitor':<38} | {'drenar (linhas/s)':>18} | {'lotes de 4 KiB (linhas/s)':>26}")
+        print("-" * 88)
+        for classe in LEITORES:
+            duracao = duracao_inc = float("inf")
+            for _ in range(max(1, args.runs)):
+                total, tempo = drenar(classe, caminho)
+                assert total == args.lines, (classe.nome, total)
+                total_inc, tempo_inc = acompanhar(classe, os.path.join(pasta, "inc.log"), dados, 4096)
+                assert total_inc == args.lines, (classe.nome, total_inc)
+                duracao, duracao_inc = min(duracao, tempo), min(duracao_inc, tempo_inc)
+            print(f"{classe.nome:<38} | {args.lines / duracao:>18,.0f} | {args.lines / duracao_inc:>26,.0f}")
+
+        amostra = dados[:min(len(dados), 2 * 1024 * 1024)]
+        print("\nLinhas entregues partidas com escrita em pedaços aleatórios:")
+        for classe in LEITORES:
+            print(f"  {classe.nome:<38} {contar_fragmentos(classe, os.path.join(pasta, 'frag.log'), amostra):>8}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# ==============================================================================
+# Microbenchmark do motor de gatilhos (custo por linha com 1, 10 e 100 padrões).
+# Uso: python benchmarks/bench_triggers.py [--lines N]
+# ==============================================================================
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from PQD_RestarterCore import AhoCorasickAutomaton, TriggerEngine, TriggerRule  # noqa: E402
+
+CATEGORIAS = ["SCRIPT", "ENGINE", "BACKEND", "RESOURCES", "NETWORK", "WORLD", "DEFAULT"]
+PALAVRAS = ["player", "entity", "replication", "spawn", "vehicle", "loadout", "faction", "session",
+            "component", "prefab", "budget", "tick", "frame", "chunk", "stream", "queue", "slot"]
+PADROES_REAIS = [
+    "ServerAdminTools | Event serveradmintools_game_ended",
+    "Out of memory",
+    "Backend connection lost",
+    "SCRIPT    (E): Virtual Machine Exception",
+]
+
+
+def gerar_linhas(qtd, rng):
+    linhas = []
+    for i in range(qtd):
+        cat = rng.choice(CATEGORIAS)
+        texto = " ".join(rng.choice(PALAVRAS) for _ in range(rng.randint(6, 16)))
+        if i % 100 == 99:  # ~1% das linhas contém um gatilho real
+            texto += " " + rng.choice(PADROES_REAIS)
+        linhas.append(f"{i % 24:02d}:{i % 60:02d}:{i % 60:02d}.{i % 1000:03d} {cat:<12}: {texto}")
+    return linhas
+
+
+def gerar_padroes(qtd, rng):
+    padroes = list(PADROES_REAIS[:qtd])
+    while len(padroes) < qtd:
+        padroes.append(f"Event {rng.choice(PALAVRAS)}_{len(padroes):03d} {rng.choice(PALAVRAS)} finished")
+    return padroes
+
+
+def medir(func, linhas, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for linha in linhas:
+            func(linha)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor / len(linhas) * 1e9  # ns por linha
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    linhas = gerar_linhas(args.lines, rng)
+    tamanho_medio = sum(len(l) for l in linhas) / len(linhas)
+    print(f"{len(linhas)} linhas, {tamanho_medio:.0f} caracteres em média\n")
+    print(f"{'padrões':>8} | {'in (loop)':>12} | {'Aho-Corasick':>12} | {'regex único':>12} | {'TriggerEngine':>13}")
+    print("-" * 70)
+    for qtd in (1, 10, 100):
+        padroes = gerar_padroes(qtd, rng)
+
+        def loop_in(linha, padroes=padroes):
+            return [p for p in padroes if p in linha]
+
+        automato = AhoCorasickAutomaton(padroes)
+        regex_unico = re.compile("|".join(re.escape(p) for p in padroes))
+        engine = TriggerEngine([TriggerRule(p) for p in padroes])
+
+        print(f"{qtd:>8} | {medir(loop_in, linhas):>9.0f} ns | {medir(automato.find_all, linhas):>9.0f} ns | "
+              f"{medir(regex_unico.search, linhas):>9.0f} ns | {medir(engine.match, linhas):>10.0f} ns")
+
+
+if __name__ == '__main__':
+    main()
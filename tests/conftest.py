@@ -0,0 +1,7 @@
+import os
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# Os módulos do projeto ficam na raiz (sem pacote); o barramento simulado do systemd vem dos benchmarks
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
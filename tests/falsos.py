@@ -0,0 +1,75 @@
+# Relógio e reator falsos para testar os componentes que rodam sobre o LogReactor sem esperar o
+# tempo passar: o teste avança o relógio e os timers vencidos rodam na ordem, na thread do teste.
+import time
+
+
+class Relogio:
+    # Substitui o módulo time em PQD_RestarterCore (monkeypatch); mktime continua o real
+    def __init__(self):
+        self.wall = 0.0
+        self.mono = 1000.0
+        self.mktime = time.mktime
+
+    def time(self):
+        return self.wall
+
+    def monotonic(self):
+        return self.mono
+
+    def ajustar(self, inicio_local):
+        self.wall = time.mktime(inicio_local.timetuple())
+
+
+class _Timer:
+    def __init__(self, vence_em, funcao, args):
+        self.vence_em = vence_em
+        self.funcao = funcao
+        self.args = args
+        self.cancelado = False
+
+    def cancel(self):
+        self.cancelado = True
+
+
+class ReatorFalso:
+    def __init__(self, relogio):
+        self.relogio = relogio
+        self.timers = []
+        self.pendentes = []
+
+    def call_soon_threadsafe(self, funcao, *args):
+        self.pendentes.append((funcao, args))
+
+    def call_later(self, atraso, funcao, *args):
+        timer = _Timer(self.relogio.mono + atraso, funcao, args)
+        self.timers.append(timer)
+        return timer
+
+    def rodar(self):
+        # Executa os call_soon_threadsafe acumulados (inclusive os agendados por eles)
+        while self.pendentes:
+            funcao, args = self.pendentes.pop(0)
+            funcao(*args)
+
+    def timers_ativos(self):
+        self.timers = [t for t in self.timers if not t.cancelado]
+        return self.timers
+
+    def avancar(self, segundos):
+        # Relógio de parede e monotônico andam juntos; cada timer roda no instante em que vence
+        self.rodar()
+        fim = self.relogio.mono + segundos
+        while self.timers_ativos():
+            proximo = min(self.timers, key=lambda t: t.vence_em)
+            if proximo.vence_em > fim:
+                break
+            self.timers.remove(proximo)
+            self._mover(proximo.vence_em - self.relogio.mono)
+            proximo.funcao(*proximo.args)
+            self.rodar()
+        self._mover(fim - self.relogio.mono)
+
+    def _mover(self, segundos):
+        segundos = max(0.0, segundos)
+        self.relogio.wall += segundos
+        self.relogio.mono += segundos
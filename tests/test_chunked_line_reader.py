@@ -0,0 +1,108 @@
+import io
+
+from PQD_RestarterCore import ChunkedLineReader
+
+
+class ArquivoCrescente(io.RawIOBase):
+    # Arquivo em memória que só "tem" o que já foi escrito, como um console.log sendo gravado
+    def __init__(self):
+        self.dados = bytearray()
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def escrever(self, dados):
+        self.dados += dados
+
+    def read(self, n=-1):
+        fim = len(self.dados) if n < 0 else self.pos + n
+        bloco = bytes(self.dados[self.pos:fim])
+        self.pos += len(bloco)
+        return bloco
+
+
+def leitor(chunk_size=8, max_bytes=1024):
+    arquivo = ArquivoCrescente()
+    return arquivo, ChunkedLineReader(arquivo, chunk_size=chunk_size, max_bytes=max_bytes)
+
+
+def test_linha_parcial_espera_o_fim():
+    arquivo, tail = leitor()
+    arquivo.escrever(b"primeira\nGAME ")
+    assert tail.read_lines() == ["primeira\n"]
+    assert tail.pending_bytes == len(b"GAME ")
+    arquivo.escrever(b"OVER\n")
+    assert tail.read_lines() == ["GAME OVER\n"]
+    assert tail.pending_bytes == 0
+
+
+def test_crlf_dividido_entre_blocos():
+    # chunk_size=8: "abcdefg\r" termina um bloco e o "\n" começa o seguinte
+    arquivo, tail = leitor(chunk_size=8)
+    arquivo.escrever(b"abcdefg\r\nxyz\r\n")
+    assert tail.read_lines() == ["abcdefg\n", "xyz\n"]
+
+
+def test_crlf_dividido_entre_leituras():
+    arquivo, tail = leitor()
+    arquivo.escrever(b"linha\r")
+    assert tail.read_lines() == []
+    arquivo.escrever(b"\nproxima\r\n")
+    assert tail.read_lines() == ["linha\n", "proxima\n"]
+
+
+def test_linha_maior_que_o_bloco():
+    arquivo, tail = leitor(chunk_size=4)
+    arquivo.escrever(b"x" * 30 + b"\n")
+    assert tail.read_lines() == ["x" * 30 + "\n"]
+
+
+def test_limite_por_leitura_e_at_eof():
+    arquivo, tail = leitor(chunk_size=8, max_bytes=16)
+    arquivo.escrever(b"1234567\n" * 5)
+    assert tail.read_lines() == ["1234567\n"] * 2
+    assert not tail.at_eof
+    assert tail.read_lines() == ["1234567\n"] * 2
+    assert tail.read_lines() == ["1234567\n"]
+    assert tail.at_eof
+
+
+def test_flush_entrega_a_linha_incompleta():
+    arquivo, tail = leitor()
+    arquivo.escrever(b"ok\nsem quebra")
+    assert tail.read_lines() == ["ok\n"]
+    assert tail.flush() == ["sem quebra\n"]
+    assert tail.flush() == []
+
+
+def test_linha_parcial_gigante_e_entregue(monkeypatch):
+    monkeypatch.setattr(ChunkedLineReader, "MAX_PARTIAL_BYTES", 10)
+    arquivo, tail = leitor(chunk_size=8)
+    arquivo.escrever(b"y" * 12)
+    assert tail.read_lines() == ["y" * 12 + "\n"]
+    assert tail.pending_bytes == 0
+
+
+def test_latin1_e_bytes_invalidos():
+    arquivo, tail = leitor()
+    arquivo.escrever("Jogador José\n".encode("latin-1"))
+    assert tail.read_lines() == ["Jogador José\n"]
+
+    utf8 = ChunkedLineReader(io.BytesIO(b"ok \xff\n"), encoding="utf-8")
+    assert utf8.read_lines() == ["ok �\n"]
+
+
+def test_escrita_em_pedacos_aleatorios_nao_parte_linhas():
+    import random
+    aleatorio = random.Random(3)
+    esperado = [f"{i} GAME OVER {'z' * aleatorio.randint(0, 50)}\n" for i in range(500)]
+    dados = "".join(esperado).replace("\n", "\r\n").encode("latin-1")
+    arquivo, tail = leitor(chunk_size=64)
+    recebidas, pos = [], 0
+    while pos < len(dados):
+        fim = min(len(dados), pos + aleatorio.randint(1, 100))
+        arquivo.escrever(dados[pos:fim])
+        pos = fim
+        recebidas.extend(tail.read_lines())
+    assert recebidas == esperado
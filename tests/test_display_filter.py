@@ -0,0 +1,88 @@
+import pytest
+
+from PQD_RestarterCore import DisplayFilter, parse_console_line_header
+
+ERRO = "12:00:01.123 SCRIPT    (E): Falha ao carregar GameMode\n"
+AVISO = "12:00:02.000 ENGINE    (W): Textura ausente\n"
+INFO = "12:00:03.000 NETWORK      : Player 'Fulano' connected\n"
+FIM = "12:00:04.000 SCRIPT       : Game Over - fim da partida\n"
+SEM_CABECALHO = "linha solta sem cabeçalho\n"
+LINHAS = [ERRO, AVISO, INFO, FIM, SEM_CABECALHO]
+
+
+def visiveis(texto):
+    filtro = DisplayFilter(texto)
+    resultado = filtro.filter(LINHAS)
+    assert resultado == [linha for linha in LINHAS if filtro.matches(linha)]  # filter() e matches() concordam
+    return resultado
+
+
+def test_cabecalho():
+    assert parse_console_line_header(ERRO) == ("SCRIPT", "ERROR")
+    assert parse_console_line_header(INFO) == ("NETWORK", "INFO")
+    assert parse_console_line_header(SEM_CABECALHO) == (None, None)
+
+
+def test_vazio_mostra_tudo():
+    filtro = DisplayFilter("  ")
+    assert filtro.empty
+    assert filtro.filter(LINHAS) == LINHAS
+
+
+def test_termos_sem_diferenciar_maiusculas():
+    assert visiveis("game") == [ERRO, FIM]
+    assert visiveis("GAME player") == [ERRO, INFO, FIM]
+
+
+def test_frase_entre_aspas():
+    assert visiveis('"game over"') == [FIM]
+
+
+def test_exclusao():
+    assert visiveis("-script") == [AVISO, INFO, SEM_CABECALHO]
+    assert visiveis('game -"game over"') == [ERRO]
+
+
+def test_regex():
+    assert visiveis(r"re:player\s+'\w+'") == [INFO]
+    assert visiveis(r"-re:\(\w\):") == [INFO, FIM, SEM_CABECALHO]
+
+
+def test_regex_com_flags_inline():
+    assert visiveis("re:(?i)TEXTURA re:fulano") == [AVISO, INFO]
+    assert visiveis("-re:(?s)game.over") == [ERRO, AVISO, INFO, SEM_CABECALHO]
+
+
+def test_regex_com_grupos_nomeados_repetidos():
+    assert visiveis("re:(?P<n>textura) re:(?P<n>fulano)") == [AVISO, INFO]
+    assert visiveis("-re:(?P<n>textura) -re:(?P<n>fulano)") == [ERRO, FIM, SEM_CABECALHO]
+
+
+def test_regex_com_referencia():
+    # Numa alternação única o \1 apontaria para o grupo do primeiro termo
+    assert visiveis(r"re:(z)z re:(o)\1") == []
+    assert visiveis(r"re:(x)y re:(n)\1") == [INFO]
+
+
+def test_nivel():
+    assert visiveis("level:error,warning") == [ERRO, AVISO]
+    assert visiveis("level:info") == [INFO, FIM]
+
+
+def test_nivel_negado():
+    assert visiveis("-level:error") == [AVISO, INFO, FIM, SEM_CABECALHO]
+
+
+def test_categoria():
+    assert visiveis("cat:script") == [ERRO, FIM]
+    assert visiveis("-cat:script,network") == [AVISO, SEM_CABECALHO]
+
+
+def test_combinacao():
+    assert visiveis("level:info -cat:network game") == [FIM]
+
+
+@pytest.mark.parametrize("texto", ['"sem fechar', "re:(", "-re:[a-"])
+def test_filtro_invalido(texto):
+    with pytest.raises(ValueError):
+        DisplayFilter(texto)
@@ -0,0 +1,133 @@
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+import PQD_RestarterCore
+from PQD_RestarterCore import JsonFileStore, atomic_write_text
+
+
+def arquivos(pasta):
+    return sorted(os.listdir(pasta))
+
+
+def test_grava_e_substitui(tmp_path):
+    caminho = tmp_path / "config.json"
+    atomic_write_text(str(caminho), "primeiro")
+    atomic_write_text(str(caminho), "segundo\r\nlinha")
+    assert caminho.read_bytes() == b"segundo\r\nlinha"  # newline='': texto gravado como veio
+    assert arquivos(tmp_path) == ["config.json"]
+
+
+def test_mantem_permissoes_do_original(tmp_path):
+    caminho = tmp_path / "config.json"
+    caminho.write_text("antigo")
+    os.chmod(caminho, 0o640)
+    atomic_write_text(str(caminho), "novo")
+    assert stat.S_IMODE(os.stat(caminho).st_mode) == 0o640
+
+
+def test_falha_na_escrita_preserva_original_sem_temporario(tmp_path):
+    caminho = tmp_path / "config.json"
+    caminho.write_text("antigo")
+    with pytest.raises(UnicodeEncodeError):
+        atomic_write_text(str(caminho), "não cabe em ascii", encoding="ascii")
+    assert caminho.read_text() == "antigo"
+    assert arquivos(tmp_path) == ["config.json"]
+
+
+def test_falha_no_rename_preserva_original_sem_temporario(tmp_path, monkeypatch):
+    caminho = tmp_path / "config.json"
+    caminho.write_text("antigo")
+
+    def replace_falho(origem, destino):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(PQD_RestarterCore.os, "replace", replace_falho)
+    with pytest.raises(OSError):
+        atomic_write_text(str(caminho), "novo")
+    monkeypatch.undo()
+    assert caminho.read_text() == "antigo"
+    assert arquivos(tmp_path) == ["config.json"]
+
+
+def test_falha_na_serializacao_nao_toca_no_arquivo(tmp_path):
+    caminho = tmp_path / "config.json"
+    store = JsonFileStore(str(caminho))
+    store.save({"servers": []})
+    antes = caminho.read_text()
+    with pytest.raises(TypeError):
+        store.save({"servers": [object()]})
+    assert caminho.read_text() == antes
+    assert arquivos(tmp_path) == ["config.json"]
+
+
+def test_nao_regrava_conteudo_igual(tmp_path):
+    caminho = tmp_path / "config.json"
+    caminho.write_text(json.dumps({"theme": "litera"}, indent=4))
+    store = JsonFileStore(str(caminho))
+    assert store.load() == {"theme": "litera"}
+    assert not store.save({"theme": "litera"})
+    assert store.save({"theme": "darkly"})
+    assert not store.save({"theme": "darkly"})
+    os.remove(caminho)
+    assert store.save({"theme": "darkly"})  # Arquivo apagado por fora: grava de novo
+    assert json.loads(caminho.read_text()) == {"theme": "darkly"}
+
+
+def test_arquivo_corrompido(tmp_path):
+    caminho = tmp_path / "config.json"
+    caminho.write_text('{"servers": [')
+    store = JsonFileStore(str(caminho))
+    with pytest.raises(ValueError):
+        store.load()
+    assert store.preserve_copy() == str(caminho) + ".corrompido"
+    assert (tmp_path / "config.json.corrompido").read_text() == '{"servers": ['
+    store.save({"servers": []})
+    assert json.loads(caminho.read_text()) == {"servers": []}
+    assert (tmp_path / "config.json.corrompido").read_text() == '{"servers": ['
+
+
+def test_arquivo_ilegivel_ou_ausente(tmp_path):
+    (tmp_path / "binario.json").write_bytes(b"\xff\xfe{}")
+    with pytest.raises(ValueError):
+        JsonFileStore(str(tmp_path / "binario.json")).load()
+    with pytest.raises(OSError):
+        JsonFileStore(str(tmp_path / "ausente.json")).load()
+    (tmp_path / "pasta.json").mkdir()
+    with pytest.raises(OSError):
+        JsonFileStore(str(tmp_path / "pasta.json")).load()
+    assert JsonFileStore(str(tmp_path / "ausente.json")).preserve_copy() is None
+
+
+def test_gravacao_assincrona_fica_com_o_mais_recente(tmp_path):
+    caminho = tmp_path / "config.json"
+    store = JsonFileStore(str(caminho))
+    resultados = []
+    for i in range(50):
+        store.save_async({"versao": i}, lambda gravou, erro: resultados.append((gravou, erro)))
+    store.flush(5)
+    assert json.loads(caminho.read_text()) == {"versao": 49}
+    assert resultados and resultados[-1] == (True, None)
+    assert len(resultados) <= 50
+    assert arquivos(tmp_path) == ["config.json"]
+
+
+def test_gravacao_assincrona_com_erro(tmp_path):
+    caminho = tmp_path / "config.json"
+    caminho.write_text("antigo")
+    store = JsonFileStore(str(caminho))
+    feito = threading.Event()
+    resultado = []
+
+    def callback(gravou, erro):
+        resultado.append((gravou, erro))
+        feito.set()
+
+    store.save_async({"servers": {1, 2}}, callback)
+    assert feito.wait(5)
+    gravou, erro = resultado[0]
+    assert not gravou and isinstance(erro, TypeError)
+    assert caminho.read_text() == "antigo"
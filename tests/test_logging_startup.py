@@ -0,0 +1,69 @@
+# Registros emitidos antes de configure_logging (importação da GUI, leitura da configuração)
+import logging
+
+import pytest
+
+import PQD_RestarterEngine
+from PQD_RestarterEngine import buffer_startup_logging, configure_logging, stop_logging
+
+
+@pytest.fixture
+def raiz():
+    # configure_logging troca os handlers do logger raiz; devolve os do pytest no fim
+    root_logger = logging.getLogger()
+    handlers, nivel = list(root_logger.handlers), root_logger.level
+    for handler in handlers:
+        root_logger.removeHandler(handler)
+    yield root_logger
+    stop_logging()
+    PQD_RestarterEngine._startup_log_buffer = None
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+        handler.close()
+    for handler in handlers:
+        root_logger.addHandler(handler)
+    root_logger.setLevel(nivel)
+
+
+def test_registros_da_inicializacao_chegam_ao_arquivo(raiz, tmp_path):
+    arquivo = tmp_path / "app.log"
+    buffer_startup_logging()
+    logging.warning("Pillow ausente")
+    logging.error("Erro ao decodificar JSON")
+    logging.info("Usando padrões")
+    logging.debug("detalhe da leitura")
+    configure_logging({"log_level": "INFO"}, log_file=str(arquivo))
+    logging.info("Depois da configuração")
+    stop_logging()
+    linhas = arquivo.read_text(encoding="utf-8").splitlines()
+    mensagens = [linha.rsplit(" - ", 1)[-1] for linha in linhas]
+    assert mensagens == ["Pillow ausente", "Erro ao decodificar JSON", "Usando padrões", "Depois da configuração"]
+    assert "test_logging_startup.test_registros_da_inicializacao_chegam_ao_arquivo" in linhas[0]
+
+
+def test_nivel_configurado_vale_para_os_guardados(raiz, tmp_path):
+    arquivo = tmp_path / "app.log"
+    buffer_startup_logging()
+    logging.info("só informação")
+    logging.warning("aviso")
+    configure_logging({"log_level": "WARNING"}, log_file=str(arquivo))
+    stop_logging()
+    texto = arquivo.read_text(encoding="utf-8")
+    assert "WARNING" in texto and "aviso" in texto
+    assert "só informação" not in texto
+
+
+def test_sem_configuracao_avisos_vao_para_o_stderr(raiz, capsys):
+    buffer_startup_logging()
+    logging.info("informação")
+    logging.error("falha antes do log")
+    PQD_RestarterEngine._flush_startup_log_buffer_to_stderr()
+    erro = capsys.readouterr().err
+    assert "ERROR - falha antes do log" in erro
+    assert "informação" not in erro
+
+
+def test_buffer_ignorado_com_log_ja_configurado(raiz, tmp_path):
+    configure_logging(log_file=str(tmp_path / "app.log"))
+    buffer_startup_logging()
+    assert PQD_RestarterEngine._startup_log_buffer is None
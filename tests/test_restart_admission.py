@@ -0,0 +1,142 @@
+# RestartAdmissionController sobre o reator e o relógio falsos (tests/falsos.py)
+import pytest
+
+import PQD_RestarterCore
+from PQD_RestarterCore import RestartAdmissionController
+from falsos import ReatorFalso, Relogio
+
+
+class Pedido:
+    # Registra os callbacks de um pedido na fila de admissão
+    def __init__(self, controlador, nome, log, falhar=False):
+        self.nome = nome
+        self.log = log
+        self.falhar = falhar
+        self.ticket = None
+        self.posicoes = []
+        self.cancelar = False
+        self.cancelado = False
+        controlador.enqueue(nome, self._admitido, on_position=self._posicao, cancelled=lambda: self.cancelar,
+                            on_cancelled=self._cancelado)
+
+    def _admitido(self, ticket):
+        self.log.append(self.nome)
+        if self.falhar:
+            raise RuntimeError("falha ao iniciar o worker")
+        self.ticket = ticket
+
+    def _posicao(self, posicao, espera_s):
+        self.posicoes.append((posicao, espera_s))
+
+    def _cancelado(self):
+        self.cancelado = True
+
+
+@pytest.fixture
+def cenario(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(PQD_RestarterCore, "time", relogio)
+    reator = ReatorFalso(relogio)
+
+    def criar(max_concurrent=0, stagger_s=0):
+        return RestartAdmissionController(reator, max_concurrent, stagger_s, poll_interval_s=0.5), reator
+
+    return criar
+
+
+def test_sem_limite_admite_todos(cenario):
+    controlador, reator = cenario()
+    log = []
+    pedidos = [Pedido(controlador, nome, log) for nome in "ABC"]
+    reator.rodar()
+    assert log == ["A", "B", "C"]
+    assert all(p.posicoes == [] for p in pedidos)
+    assert reator.timers_ativos() == []
+
+
+def test_fila_fifo_com_limite(cenario):
+    controlador, reator = cenario(max_concurrent=2)
+    log = []
+    a, b, c, d = (Pedido(controlador, nome, log) for nome in "ABCD")
+    reator.rodar()
+    assert log == ["A", "B"]
+    assert controlador.snapshot() == {"ativos": ["A", "B"], "fila": ["C", "D"]}
+    controlador.release(b.ticket)
+    reator.rodar()
+    assert log == ["A", "B", "C"]
+    controlador.release(a.ticket)
+    reator.rodar()
+    assert log == ["A", "B", "C", "D"]
+    assert controlador.snapshot() == {"ativos": ["C", "D"], "fila": []}
+
+
+def test_posicoes_na_fila(cenario):
+    controlador, reator = cenario(max_concurrent=1)
+    log = []
+    a, b, c = (Pedido(controlador, nome, log) for nome in "ABC")
+    reator.rodar()
+    # Esperando vaga (não escalonamento): sem previsão de início
+    assert b.posicoes == [(1, None)]
+    assert c.posicoes == [(2, None)]
+    reator.avancar(5)  # Conferências periódicas não repetem posição inalterada
+    assert c.posicoes == [(2, None)]
+    controlador.release(a.ticket)
+    reator.rodar()
+    assert c.posicoes == [(2, None), (1, None)]
+    assert a.posicoes == [] and b.posicoes == [(1, None)]
+
+
+def test_escalonamento_entre_inicios(cenario):
+    controlador, reator = cenario(stagger_s=30)
+    log = []
+    _a, b, c = (Pedido(controlador, nome, log) for nome in "ABC")
+    reator.rodar()
+    assert log == ["A"]
+    assert b.posicoes == [(1, 30.0)]
+    assert c.posicoes == [(2, None)]
+    reator.avancar(29.9)
+    assert log == ["A"]
+    reator.avancar(0.1)
+    assert log == ["A", "B"]
+    assert c.posicoes[-1] == (1, 30.0)
+    reator.avancar(30)
+    assert log == ["A", "B", "C"]
+    assert reator.timers_ativos() == []
+
+
+def test_falha_ao_assumir_a_vaga_libera(cenario):
+    controlador, reator = cenario(max_concurrent=1)
+    log = []
+    Pedido(controlador, "A", log, falhar=True)
+    b = Pedido(controlador, "B", log)
+    reator.rodar()
+    assert log == ["A", "B"]
+    assert controlador.snapshot() == {"ativos": ["B"], "fila": []}
+    assert b.ticket is not None
+
+
+def test_cancelado_na_fila_sai_sem_ser_admitido(cenario):
+    controlador, reator = cenario(max_concurrent=1)
+    log = []
+    a, b, c = (Pedido(controlador, nome, log) for nome in "ABC")
+    reator.rodar()
+    b.cancelar = True
+    reator.avancar(0.5)  # Cancelamento conferido no próximo poll
+    assert b.cancelado
+    assert controlador.snapshot() == {"ativos": ["A"], "fila": ["C"]}
+    assert c.posicoes[-1] == (1, None)
+    controlador.release(a.ticket)
+    reator.rodar()
+    assert log == ["A", "C"]
+
+
+def test_release_repetido_nao_libera_outra_vaga(cenario):
+    controlador, reator = cenario(max_concurrent=1)
+    log = []
+    a, _b, _c = (Pedido(controlador, nome, log) for nome in "ABC")
+    reator.rodar()
+    controlador.release(a.ticket)
+    controlador.release(a.ticket)
+    reator.rodar()
+    assert log == ["A", "B"]
+    assert controlador.snapshot() == {"ativos": ["B"], "fila": ["C"]}
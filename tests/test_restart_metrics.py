@@ -0,0 +1,115 @@
+import json
+
+from PQD_RestarterCore import HISTOGRAM_BUCKETS_S, RestartMetrics, build_restart_record, percentile
+
+
+def registro(servidor, total, sucesso=True):
+    return {"servidor": servidor, "quando": "2026-01-05T10:00:00", "tipo": "agendado", "sucesso": sucesso,
+            "gatilho_ate_inicio": 0.0, "parada": 1.0, "inicio": 2.0, "prontidao": None,
+            "indisponibilidade": total, "total": total}
+
+
+def linhas_do_arquivo(caminho):
+    # Registros válidos do JSON Lines (linhas quebradas são ignoradas, como na recarga)
+    validas = []
+    for linha in caminho.read_text(encoding="utf-8").splitlines():
+        try:
+            validas.append(json.loads(linha))
+        except ValueError:
+            pass
+    return validas
+
+
+def test_percentil_nearest_rank():
+    valores = list(range(1, 21))
+    assert percentile(valores, 50) == 10
+    assert percentile(valores, 95) == 19
+    assert percentile(valores, 100) == 20
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) is None
+
+
+def test_registro_a_partir_dos_marcos():
+    marcos = {"gatilho": 100.0, "inicio_reinicio": 110.0, "parado": 115.5, "iniciado": 125.0, "pronto": 160.25}
+    r = build_restart_record("S1", "gatilho", True, marcos)
+    assert (r["gatilho_ate_inicio"], r["parada"], r["inicio"], r["prontidao"]) == (10.0, 5.5, 9.5, 35.25)
+    assert r["indisponibilidade"] == 50.25 and r["total"] == 60.25
+    # Sem prontidão configurada: o fim é o "iniciado"; sem gatilho, conta do início do reinício
+    r = build_restart_record("S1", "agendado", True, {"inicio_reinicio": 10.0, "parado": 12.0, "iniciado": 20.0})
+    assert r["gatilho_ate_inicio"] == 0.0 and r["prontidao"] is None and r["total"] == 10.0
+
+
+def test_resumo_percentis_histograma_e_taxa():
+    metricas = RestartMetrics()
+    for total in [0.5, 3, 3, 8, 45, 700]:
+        metricas.record(registro("S1", total))
+    metricas.record(registro("S1", 99999, sucesso=False))
+    resumo = metricas.summary("S1")
+    assert resumo["reinicios"] == 7 and resumo["sucessos"] == 6
+    assert resumo["taxa_sucesso"] == 6 / 7
+    total = resumo["metricas"]["total"]
+    assert total["amostras"] == 6  # Falhas ficam fora das durações
+    assert (total["p50"], total["p95"], total["max"]) == (3, 700, 700)
+    assert len(total["histograma"]) == len(HISTOGRAM_BUCKETS_S) + 1
+    assert total["histograma"][0] == 1 and total["histograma"][-1] == 1 and sum(total["histograma"]) == 6
+    assert resumo["metricas"]["prontidao"]["amostras"] == 0
+    assert metricas.summary("outro")["taxa_sucesso"] is None
+
+
+def test_janela_deslizante():
+    metricas = RestartMetrics(window_size=3)
+    for total in range(5):
+        metricas.record(registro("S1", total))
+    assert [r["total"] for r in metricas.records("S1")] == [2, 3, 4]
+
+
+def test_persistencia_e_recarga(tmp_path):
+    caminho = tmp_path / "metricas.jsonl"
+    metricas = RestartMetrics(str(caminho))
+    metricas.record(registro("Servidor Á", 10))
+    metricas.record(registro("S2", 20))
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write("{linha quebrada\n")
+    recarregada = RestartMetrics(str(caminho))
+    assert [r["total"] for r in recarregada.records("Servidor Á")] == [10]
+    assert [r["total"] for r in recarregada.records("S2")] == [20]
+
+
+def test_listeners():
+    metricas = RestartMetrics()
+    avisos = []
+
+    def falho(servidor):
+        raise RuntimeError("falha proposital")
+
+    metricas.add_listener(falho)
+    metricas.add_listener(avisos.append)
+    metricas.record(registro("S1", 1))
+    assert avisos == ["S1"]
+
+
+def test_renomear_persiste_no_arquivo(tmp_path):
+    caminho = tmp_path / "metricas.jsonl"
+    metricas = RestartMetrics(str(caminho))
+    metricas.record(registro("Antigo", 10))
+    metricas.record(registro("Outro", 20))
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write("{linha quebrada\n")
+    metricas.rename_server("Antigo", "Novo")
+    assert metricas.records("Antigo") == []
+    assert [r["servidor"] for r in metricas.records("Novo")] == ["Novo"]
+    assert caminho.read_text(encoding="utf-8").endswith("{linha quebrada\n")
+    assert [r["servidor"] for r in linhas_do_arquivo(caminho)] == ["Novo", "Outro"]
+    assert [r["total"] for r in RestartMetrics(str(caminho)).records("Novo")] == [10]
+    assert [p.name for p in tmp_path.iterdir()] == ["metricas.jsonl"]
+
+
+def test_renomear_para_nome_existente_nao_mistura(tmp_path):
+    caminho = tmp_path / "metricas.jsonl"
+    metricas = RestartMetrics(str(caminho))
+    metricas.record(registro("A", 1))
+    metricas.record(registro("B", 2))
+    metricas.rename_server("A", "B")
+    assert [r["total"] for r in metricas.records("A")] == [1]
+    assert [r["servidor"] for r in linhas_do_arquivo(caminho)] == ["A", "B"]
+
@@ -0,0 +1,133 @@
+# RestartScheduler com relógio e reator falsos (tests/falsos.py): o relógio de parede pode saltar
+# sem que o monotônico acompanhe.
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+import PQD_RestarterCore
+from PQD_RestarterCore import RestartScheduler, ScheduleRuleSet
+from falsos import ReatorFalso, Relogio
+
+FUSO_COM_HORARIO_DE_VERAO = "EST5EDT,M3.2.0,M11.1.0"  # 2026: começa em 08/03 e termina em 01/11, às 02:00
+
+
+@pytest.fixture
+def fuso():
+    anterior = os.environ.get("TZ")
+    os.environ["TZ"] = FUSO_COM_HORARIO_DE_VERAO
+    time.tzset()
+    yield
+    if anterior is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = anterior
+    time.tzset()
+
+
+@pytest.fixture
+def cenario(fuso, monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(PQD_RestarterCore, "time", relogio)
+
+    class DatetimeFalso(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(relogio.wall, tz)
+
+    monkeypatch.setattr(PQD_RestarterCore, "datetime", DatetimeFalso)
+
+    def criar(inicio_local, regras):
+        relogio.ajustar(inicio_local)
+        reator = ReatorFalso(relogio)
+        scheduler = RestartScheduler(reator)
+        disparos = []
+        scheduler.set_schedule("srv", ScheduleRuleSet(regras),
+                               lambda horario: disparos.append((horario, datetime.fromtimestamp(relogio.wall))))
+        reator.rodar()
+        return relogio, reator, scheduler, disparos
+
+    return criar
+
+
+def test_dispara_e_rearma(cenario):
+    _relogio, reator, scheduler, disparos = cenario(datetime(2026, 1, 5, 9, 59), ["10:00"])
+    assert scheduler.next_fire_time("srv") == datetime(2026, 1, 5, 10, 0)
+    reator.avancar(120)
+    assert disparos == [(datetime(2026, 1, 5, 10, 0), datetime(2026, 1, 5, 10, 0))]
+    assert scheduler.next_fire_time("srv") == datetime(2026, 1, 6, 10, 0)
+    reator.avancar(24 * 3600)
+    assert [horario for horario, _ in disparos] == [datetime(2026, 1, 5, 10, 0), datetime(2026, 1, 6, 10, 0)]
+
+
+def test_timer_unico_limitado_ao_intervalo_de_checagem(cenario):
+    _relogio, reator, _scheduler, _disparos = cenario(datetime(2026, 1, 5, 6, 0), ["10:00"])
+    vivos = reator.timers_ativos()
+    assert len(vivos) == 1
+    assert vivos[0].vence_em - 1000.0 == RestartScheduler.CLOCK_CHECK_INTERVAL_S
+
+
+def test_remove_cancela_disparos(cenario):
+    _relogio, reator, scheduler, disparos = cenario(datetime(2026, 1, 5, 9, 59), ["10:00"])
+    scheduler.remove("srv")
+    reator.avancar(300)
+    assert disparos == []
+    assert scheduler.next_fire_time("srv") is None
+
+
+def test_relogio_volta_nao_repete_disparo(cenario):
+    relogio, reator, scheduler, disparos = cenario(datetime(2026, 1, 5, 9, 59), ["10:00"])
+    reator.avancar(120)
+    assert len(disparos) == 1
+    relogio.wall -= 3600  # Ajuste manual para 09:01
+    reator.avancar(2 * 3600)
+    assert len(disparos) == 1
+    assert scheduler.next_fire_time("srv") == datetime(2026, 1, 6, 10, 0)
+
+
+def test_relogio_adiantado_pouco_dispara_atrasado(cenario):
+    # Salto de 2 min por cima do horário: dentro de MISSED_GRACE_S, o disparo acontece assim que percebido
+    relogio, reator, _scheduler, disparos = cenario(datetime(2026, 1, 5, 9, 59), ["10:00"])
+    reator.avancar(10)
+    relogio.wall += 120
+    reator.avancar(RestartScheduler.CLOCK_CHECK_INTERVAL_S)
+    assert [horario for horario, _ in disparos] == [datetime(2026, 1, 5, 10, 0)]
+    assert disparos[0][1] > datetime(2026, 1, 5, 10, 0)
+
+
+def test_relogio_adiantado_muito_descarta_horario_pulado(cenario):
+    relogio, reator, scheduler, disparos = cenario(datetime(2026, 1, 5, 9, 0), ["10:00,12:00"])
+    relogio.wall += 2 * 3600  # 09:00 -> 11:00
+    reator.avancar(RestartScheduler.CLOCK_CHECK_INTERVAL_S)
+    assert disparos == []
+    assert scheduler.next_fire_time("srv") == datetime(2026, 1, 5, 12, 0)
+    reator.avancar(2 * 3600)
+    assert disparos == [(datetime(2026, 1, 5, 12, 0), datetime(2026, 1, 5, 12, 0))]
+
+
+def test_horario_inexistente_no_inicio_do_horario_de_verao(cenario):
+    # 08/03/2026: 02:00 vira 03:00; 02:30 não existe e é disparado uma vez, logo depois do salto
+    _relogio, reator, _scheduler, disparos = cenario(datetime(2026, 3, 8, 1, 0), ["02:30"])
+    reator.avancar(3 * 3600)
+    assert len(disparos) == 1
+    horario, disparado_em = disparos[0]
+    assert horario == datetime(2026, 3, 8, 2, 30)
+    assert datetime(2026, 3, 8, 3, 0) <= disparado_em <= datetime(2026, 3, 8, 3, 30)
+
+
+def test_horario_repetido_no_fim_do_horario_de_verao(cenario):
+    # 01/11/2026: 02:00 volta para 01:00; 01:30 acontece duas vezes no relógio, mas dispara uma só
+    _relogio, reator, scheduler, disparos = cenario(datetime(2026, 11, 1, 0, 0), ["01:30"])
+    reator.avancar(4 * 3600)
+    assert [horario for horario, _ in disparos] == [datetime(2026, 11, 1, 1, 30)]
+    assert scheduler.next_fire_time("srv") == datetime(2026, 11, 2, 1, 30)
+
+
+def test_intervalo_atravessa_fim_do_horario_de_verao(cenario):
+    # "@every 1h" a partir da meia-noite: a hora repetida não gera disparo duplicado
+    _relogio, reator, _scheduler, disparos = cenario(datetime(2026, 11, 1, 0, 30), ["@every 1h"])
+    reator.avancar(5 * 3600)
+    horarios = [horario for horario, _ in disparos]
+    assert len(horarios) == len(set(horarios))
+    assert horarios[0] == datetime(2026, 11, 1, 1, 0)
@@ -0,0 +1,161 @@
+# Máquina de estados do reinício do ServerEngine sobre reator, pool e admissão reais; a sequência
+# de parar/iniciar o serviço é substituída por uma função controlada pelo teste.
+import threading
+import time
+import types
+
+import pytest
+
+from PQD_RestarterCore import LogReactor, RestartScheduler
+from PQD_RestarterEngine import (
+    RESTART_STATE_COOLDOWN, RESTART_STATE_IDLE, RESTART_STATE_PENDING, RESTART_STATE_QUEUED, RESTART_STATE_STOPPING,
+    ServerEngine, create_restart_admission, create_worker_pools
+)
+
+
+def aguardar(condicao, timeout=5.0):
+    fim = time.monotonic() + timeout
+    while time.monotonic() < fim:
+        if condicao():
+            return True
+        time.sleep(0.01)
+    return condicao()
+
+
+@pytest.fixture
+def host():
+    parar = threading.Event()
+    reator = LogReactor()
+    reator.start()
+    config = {"max_concurrent_restarts": 1, "restart_stagger_s": 0}
+    host = types.SimpleNamespace(log_reactor=reator, restart_scheduler=RestartScheduler(reator),
+                                 service_backend=None, service_status_cache=None, restart_metrics=None,
+                                 restart_admission=create_restart_admission(config, reator),
+                                 worker_pools=create_worker_pools(config, parar))
+    yield host
+    parar.set()
+    for pool in host.worker_pools.values():
+        pool.shutdown()
+    reator.stop()
+
+
+class SequenciaFalsa:
+    # Substitui a sequência real: registra cada execução e segura até o teste liberar
+    def __init__(self, engine):
+        self.engine = engine
+        self.execucoes = []
+        self.liberar = threading.Event()
+        self.em_execucao = threading.Event()
+
+    def __call__(self, agendado, detectado_em):
+        self.execucoes.append(agendado)
+        self.engine._advance_restart_state(RESTART_STATE_STOPPING, "falso")
+        self.em_execucao.set()
+        self.liberar.wait(5)
+        return True
+
+
+def criar_engine(host, nome="S1", cooldown_s=0):
+    estados = []
+    engine = ServerEngine(host, nome, {"service_name": "falso", "restart_cooldown_s": cooldown_s},
+                          on_restart_state=lambda estado, detalhe: estados.append(estado))
+    sequencia = SequenciaFalsa(engine)
+    engine._executar_logica_reinicio_servico_efetivamente = sequencia
+    return engine, sequencia, estados
+
+
+def test_ciclo_completo_sem_cooldown(host):
+    engine, sequencia, estados = criar_engine(host)
+    assert engine.request_restart(False)
+    assert sequencia.em_execucao.wait(5)
+    assert engine.restart_state == RESTART_STATE_STOPPING
+    sequencia.liberar.set()
+    assert aguardar(lambda: engine.restart_state == RESTART_STATE_IDLE)
+    assert estados == [RESTART_STATE_PENDING, RESTART_STATE_STOPPING, RESTART_STATE_IDLE]
+    assert sequencia.execucoes == [False]
+
+
+def test_pedidos_pendentes_sao_agrupados(host):
+    engine, sequencia, _ = criar_engine(host)
+    assert engine.request_restart(False, delay_s=30)
+    assert engine.restart_state == RESTART_STATE_PENDING
+    assert not engine.request_restart(False, delay_s=30)
+    # Agendado com prazo menor: adianta o pedido pendente e marca como agendado
+    assert not engine.request_restart(True, delay_s=0.05)
+    assert engine.coalesced_requests == 2
+    assert sequencia.em_execucao.wait(5)
+    sequencia.liberar.set()
+    assert aguardar(lambda: engine.restart_state == RESTART_STATE_IDLE)
+    assert sequencia.execucoes == [True]  # Uma única sequência
+
+
+def test_pedido_durante_execucao_e_ignorado(host):
+    engine, sequencia, _ = criar_engine(host)
+    engine.request_restart(False)
+    assert sequencia.em_execucao.wait(5)
+    assert not engine.request_restart(True)
+    sequencia.liberar.set()
+    assert aguardar(lambda: engine.restart_state == RESTART_STATE_IDLE)
+    assert len(sequencia.execucoes) == 1
+    assert engine.coalesced_requests == 1
+
+
+def test_cooldown_ignora_pedidos_e_termina(host):
+    engine, sequencia, estados = criar_engine(host, cooldown_s=1)
+    sequencia.liberar.set()
+    engine.request_restart(False)
+    assert aguardar(lambda: engine.restart_state == RESTART_STATE_COOLDOWN)
+    assert not engine.request_restart(False)
+    assert len(sequencia.execucoes) == 1
+    assert aguardar(lambda: engine.restart_state == RESTART_STATE_IDLE, timeout=3)
+    assert engine.request_restart(False)
+    assert aguardar(lambda: len(sequencia.execucoes) == 2)
+    assert RESTART_STATE_COOLDOWN in estados
+
+
+def test_pendente_cancelado_volta_a_ocioso(host):
+    engine, sequencia, _ = criar_engine(host)
+    engine.request_restart(False, delay_s=0.1)
+    engine.stop_log_monitoring()
+    assert aguardar(lambda: engine.restart_state == RESTART_STATE_IDLE)
+    assert sequencia.execucoes == []
+
+
+def test_close_cancela_pedido_pendente(host):
+    # Servidor removido: o timer do delay não pode mais disparar a sequência
+    engine, sequencia, estados = criar_engine(host)
+    engine.request_restart(False, delay_s=0.2)
+    assert engine.restart_state == RESTART_STATE_PENDING
+    engine.close()
+    assert engine.restart_state == RESTART_STATE_IDLE
+    assert engine._pending_timer is None
+    time.sleep(0.4)
+    assert sequencia.execucoes == []
+    assert estados == [RESTART_STATE_PENDING, RESTART_STATE_IDLE]
+
+
+def test_close_cancela_timer_do_cooldown(host):
+    engine, sequencia, estados = criar_engine(host, cooldown_s=0.3)
+    sequencia.liberar.set()
+    engine.request_restart(False)
+    assert aguardar(lambda: engine.restart_state == RESTART_STATE_COOLDOWN)
+    engine.close()
+    time.sleep(0.5)
+    assert estados[-1] == RESTART_STATE_COOLDOWN  # _end_cooldown não chamou mais o callback
+
+
+def test_fila_de_admissao_entre_servidores(host):
+    # max_concurrent_restarts = 1: o segundo servidor espera na fila sem ocupar worker
+    primeiro, seq1, _ = criar_engine(host, "S1")
+    segundo, seq2, estados2 = criar_engine(host, "S2")
+    primeiro.request_restart(True)
+    assert seq1.em_execucao.wait(5)
+    segundo.request_restart(True)
+    assert aguardar(lambda: segundo.restart_state == RESTART_STATE_QUEUED)
+    assert host.restart_admission.snapshot() == {"ativos": ["S1"], "fila": ["S2"]}
+    assert host.worker_pools["restart"].stats()["ocupados"] == 1
+    seq1.liberar.set()
+    assert seq2.em_execucao.wait(5)
+    seq2.liberar.set()
+    assert aguardar(lambda: segundo.restart_state == RESTART_STATE_IDLE)
+    assert estados2[:3] == [RESTART_STATE_PENDING, RESTART_STATE_QUEUED, RESTART_STATE_STOPPING]
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytest
+
+from PQD_RestarterCore import ScheduleExclusion, ScheduleRuleSet, parse_schedule_rule
+
+# 2026-01-05 é uma segunda-feira
+SEGUNDA = datetime(2026, 1, 5, 10, 0)
+
+
+def proximos(regras, depois_de=SEGUNDA, quantidade=3):
+    return ScheduleRuleSet(regras).upcoming(depois_de, quantidade)
+
+
+def test_horario_diario():
+    assert proximos(["05:30"]) == [datetime(2026, 1, 6, 5, 30), datetime(2026, 1, 7, 5, 30),
+                                   datetime(2026, 1, 8, 5, 30)]
+
+
+def test_estritamente_depois():
+    assert ScheduleRuleSet(["10:00"]).next_after(SEGUNDA) == datetime(2026, 1, 6, 10, 0)
+    assert ScheduleRuleSet(["10:01"]).next_after(SEGUNDA) == datetime(2026, 1, 5, 10, 1)
+
+
+def test_dias_da_semana_pt_e_en():
+    assert proximos(["seg,qui 05:30,17:30"]) == [datetime(2026, 1, 5, 17, 30), datetime(2026, 1, 8, 5, 30),
+                                                 datetime(2026, 1, 8, 17, 30)]
+    assert proximos(["sat-sun 12:00"], quantidade=2) == [datetime(2026, 1, 10, 12, 0), datetime(2026, 1, 11, 12, 0)]
+
+
+def test_intervalo_de_dias_que_vira_a_semana():
+    assert proximos(["sex-seg 08:00"], quantidade=4) == [
+        datetime(2026, 1, 9, 8, 0), datetime(2026, 1, 10, 8, 0), datetime(2026, 1, 11, 8, 0),
+        datetime(2026, 1, 12, 8, 0)]
+
+
+def test_every_conta_a_partir_da_meia_noite():
+    assert proximos(["@every 4h"]) == [datetime(2026, 1, 5, 12, 0), datetime(2026, 1, 5, 16, 0),
+                                       datetime(2026, 1, 5, 20, 0)]
+    # 90 min não divide o dia: recomeça em 00:00 do dia seguinte
+    assert proximos(["@every 90m"], datetime(2026, 1, 5, 22, 31), 2) == [
+        datetime(2026, 1, 6, 0, 0), datetime(2026, 1, 6, 1, 30)]
+    assert proximos(["@every 12h sab"], quantidade=2) == [datetime(2026, 1, 10, 0, 0), datetime(2026, 1, 10, 12, 0)]
+
+
+def test_cron():
+    # 30 5 * * 1,4: segundas e quintas às 05:30 (domingo = 0 ou 7)
+    assert proximos(["30 5 * * 1,4"]) == [datetime(2026, 1, 8, 5, 30), datetime(2026, 1, 12, 5, 30),
+                                          datetime(2026, 1, 15, 5, 30)]
+    assert proximos(["0 0 * * 7"], quantidade=1) == [datetime(2026, 1, 11, 0, 0)]
+    assert proximos(["*/20 10 * * *"]) == [datetime(2026, 1, 5, 10, 20), datetime(2026, 1, 5, 10, 40),
+                                           datetime(2026, 1, 6, 10, 0)]
+    assert proximos(["@monthly"], quantidade=2) == [datetime(2026, 2, 1, 0, 0), datetime(2026, 3, 1, 0, 0)]
+
+
+def test_cron_dia_do_mes_ou_dia_da_semana():
+    # Com os dois campos restritos, o cron dispara em qualquer um deles
+    assert proximos(["0 12 15 * 3"]) == [datetime(2026, 1, 7, 12, 0), datetime(2026, 1, 14, 12, 0),
+                                         datetime(2026, 1, 15, 12, 0)]
+
+
+def test_29_de_fevereiro():
+    assert ScheduleRuleSet(["0 6 29 2 *"]).next_after(SEGUNDA) == datetime(2028, 2, 29, 6, 0)
+
+
+def test_data_impossivel_nao_dispara():
+    assert ScheduleRuleSet(["0 0 31 2 *"]).next_after(SEGUNDA) is None
+    assert proximos(["0 0 30 2 *"]) == []
+
+
+def test_exclusoes():
+    regras = ["@every 1h", "!sab,dom 18:00-23:59", "!02:00-05:00"]
+    sexta = datetime(2026, 1, 9, 23, 30)
+    assert proximos(regras, sexta, 2) == [datetime(2026, 1, 10, 0, 0), datetime(2026, 1, 10, 1, 0)]
+    assert proximos(regras, datetime(2026, 1, 10, 1, 0), 1) == [datetime(2026, 1, 10, 6, 0)]
+    assert proximos(regras, datetime(2026, 1, 10, 17, 0), 1) == [datetime(2026, 1, 11, 0, 0)]
+
+
+def test_exclusao_que_atravessa_a_meia_noite():
+    exclusao = parse_schedule_rule("!22:00-02:00")
+    assert isinstance(exclusao, ScheduleExclusion)
+    assert proximos(["@every 1h", "!22:00-02:00"], datetime(2026, 1, 5, 21, 0), 2) == [
+        datetime(2026, 1, 6, 3, 0), datetime(2026, 1, 6, 4, 0)]
+
+
+def test_tudo_excluido_nao_dispara():
+    assert ScheduleRuleSet(["05:30", "!00:00-23:59"]).next_after(SEGUNDA) is None
+
+
+def test_sem_regras():
+    regras = ScheduleRuleSet(["!sab 10:00-11:00"])
+    assert not regras
+    assert regras.next_after(SEGUNDA) is None
+
+
+@pytest.mark.parametrize("texto", [
+    "", "25:00", "5:30", "xyz 05:30", "@every 0m", "@every 25h", "@every 90", "60 * * * *",
+    "0 0 0 * *", "0 0 * 13 *", "*/0 * * * *", "10-5 * * * *", "!18:00", "1 2 3 4",
+])
+def test_regras_invalidas(texto):
+    assert ScheduleRuleSet.validate(texto) is not None
+    with pytest.raises(ValueError):
+        ScheduleRuleSet([texto])
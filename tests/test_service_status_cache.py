@@ -0,0 +1,166 @@
+# ServiceStatusCache com a thread real e o relógio monotônico falso (tests/falsos.py) para o TTL.
+# O intervalo longo faz cada consulta depender de refresh_now() ou de uma inscrição.
+import threading
+import time
+
+import pytest
+
+import PQD_RestarterCore
+from PQD_RestarterCore import ServiceStatusCache
+from falsos import Relogio
+
+
+def aguardar(condicao, timeout=5.0):
+    fim = time.monotonic() + timeout
+    while time.monotonic() < fim:
+        if condicao():
+            return True
+        time.sleep(0.01)
+    return condicao()
+
+
+class Consulta:
+    # query_func falsa: devolve self.status e registra cada lote consultado
+    def __init__(self):
+        self.status = {}
+        self.lotes = []
+        self._lock = threading.Lock()
+
+    def __call__(self, servicos):
+        with self._lock:
+            self.lotes.append(list(servicos))
+        return {s: self.status.get(s, "NOT_FOUND") for s in servicos}
+
+    def total(self):
+        with self._lock:
+            return len(self.lotes)
+
+
+class Assinante:
+    def __init__(self):
+        self.recebidos = []
+
+    def __call__(self, servico, status):
+        self.recebidos.append((servico, status))
+
+
+@pytest.fixture
+def cenario(monkeypatch):
+    relogio = Relogio()
+    relogio.wall = time.time()
+    monkeypatch.setattr(PQD_RestarterCore, "time", relogio)
+    consulta = Consulta()
+    cache = ServiceStatusCache(consulta, interval_s=3600, ttl_s=15)
+    cache.start()
+    yield cache, consulta, relogio
+    cache.stop()
+
+
+def test_primeira_inscricao_consulta_e_notifica(cenario):
+    cache, consulta, _relogio = cenario
+    consulta.status["srv-a"] = "RUNNING"
+    assinante = Assinante()
+    assert cache.subscribe("aba1", "srv-a", assinante) is None
+    assert aguardar(lambda: assinante.recebidos == [("srv-a", "RUNNING")])
+    assert cache.get("srv-a") == "RUNNING"
+
+
+def test_consulta_em_lote_e_so_notifica_mudancas(cenario):
+    cache, consulta, _relogio = cenario
+    consulta.status.update({"srv-a": "RUNNING", "srv-b": "STOPPED"})
+    a, b = Assinante(), Assinante()
+    cache.subscribe("aba1", "srv-a", a)
+    cache.subscribe("aba2", "srv-b", b)
+    assert aguardar(lambda: a.recebidos and b.recebidos)
+    assert ["srv-a", "srv-b"] in consulta.lotes
+    total = consulta.total()
+    cache.refresh_now()
+    assert aguardar(lambda: consulta.total() > total)
+    consulta.status["srv-b"] = "RUNNING"
+    total = consulta.total()
+    cache.refresh_now()
+    assert aguardar(lambda: consulta.total() > total and len(b.recebidos) == 2)
+    assert a.recebidos == [("srv-a", "RUNNING")]
+    assert b.recebidos == [("srv-b", "STOPPED"), ("srv-b", "RUNNING")]
+
+
+def test_ttl_expira(cenario):
+    cache, consulta, relogio = cenario
+    consulta.status["srv-a"] = "RUNNING"
+    assinante = Assinante()
+    cache.subscribe("aba1", "srv-a", assinante)
+    assert aguardar(lambda: cache.get("srv-a") == "RUNNING")
+    relogio.mono += 15
+    assert cache.get("srv-a") == "RUNNING"
+    relogio.mono += 1
+    assert cache.get("srv-a") is None
+
+
+def test_inscricao_com_valor_valido_devolve_o_cache(cenario):
+    cache, consulta, _relogio = cenario
+    consulta.status["srv-a"] = "RUNNING"
+    cache.subscribe("aba1", "srv-a", Assinante())
+    assert aguardar(lambda: cache.get("srv-a") == "RUNNING")
+    assert cache.subscribe("aba2", "srv-a", Assinante()) == "RUNNING"
+
+
+def test_inscricao_com_valor_expirado_nao_devolve_o_antigo(cenario):
+    cache, consulta, relogio = cenario
+    consulta.status["srv-a"] = "RUNNING"
+    primeiro = Assinante()
+    cache.subscribe("aba1", "srv-a", primeiro)
+    assert aguardar(lambda: cache.get("srv-a") == "RUNNING")
+    cache.unsubscribe("aba1")
+    relogio.mono += 60
+    novo = Assinante()
+    assert cache.subscribe("aba2", "srv-a", novo) is None
+    # Mesmo status de antes: o novo assinante ainda recebe o valor atualizado
+    assert aguardar(lambda: novo.recebidos == [("srv-a", "RUNNING")])
+    assert cache.get("srv-a") == "RUNNING"
+
+
+def test_unsubscribe(cenario):
+    cache, consulta, _relogio = cenario
+    consulta.status.update({"srv-a": "RUNNING", "srv-b": "RUNNING"})
+    a, b = Assinante(), Assinante()
+    cache.subscribe("aba1", "srv-a", a)
+    cache.subscribe("aba2", "srv-b", b)
+    assert aguardar(lambda: a.recebidos and b.recebidos)
+    cache.unsubscribe("aba1")
+    cache.unsubscribe("nunca-inscrito")
+    consulta.status.update({"srv-a": "STOPPED", "srv-b": "STOPPED"})
+    total = consulta.total()
+    cache.refresh_now()
+    assert aguardar(lambda: consulta.total() > total and len(b.recebidos) == 2)
+    assert consulta.lotes[-1] == ["srv-b"]
+    assert a.recebidos == [("srv-a", "RUNNING")]
+
+
+def test_refresh_de_um_servico_renotifica_sem_mudanca(cenario):
+    cache, consulta, _relogio = cenario
+    consulta.status["srv-a"] = "RUNNING"
+    assinante = Assinante()
+    cache.subscribe("aba1", "srv-a", assinante)
+    assert aguardar(lambda: len(assinante.recebidos) == 1)
+    cache.refresh_now("srv-a")
+    assert aguardar(lambda: len(assinante.recebidos) == 2)
+
+
+def test_erro_no_callback_ou_na_consulta_nao_para_o_cache(cenario):
+    cache, consulta, _relogio = cenario
+
+    def callback_falho(servico, status):
+        raise RuntimeError("falha proposital")
+
+    consulta.status["srv-a"] = "RUNNING"
+    cache.subscribe("aba1", "srv-a", callback_falho)
+    assinante = Assinante()
+    cache.subscribe("aba2", "srv-a", assinante)
+    assert aguardar(lambda: assinante.recebidos)
+    consulta.status = None  # A próxima consulta lança TypeError
+    total = consulta.total()
+    cache.refresh_now()
+    assert aguardar(lambda: consulta.total() > total)
+    consulta.status = {"srv-a": "STOPPED"}
+    cache.refresh_now()
+    assert aguardar(lambda: assinante.recebidos[-1] == ("srv-a", "STOPPED"))
@@ -0,0 +1,87 @@
+# Backend D-Bus do systemd contra um dbus-daemon privado com o systemd simulado de
+# benchmarks/bench_service_backend.py (não precisa de systemd nem de root).
+import shutil
+
+import pytest
+
+from PQD_RestarterCore import JEEPNEY_AVAILABLE, ServiceBackendError, SystemdDBusBackend
+
+pytestmark = pytest.mark.skipif(not JEEPNEY_AVAILABLE or not shutil.which("dbus-daemon"),
+                                reason="requer jeepney e dbus-daemon")
+
+
+@pytest.fixture(scope="module")
+def barramento():
+    from bench_service_backend import iniciar_barramento
+    proc, endereco = iniciar_barramento()
+    yield endereco
+    proc.terminate()
+    proc.wait(5)
+
+
+@pytest.fixture
+def units(barramento):
+    from bench_service_backend import MockSystemd
+    unidades = {
+        "arma.service": {"LoadState": "loaded", "ActiveState": "active", "SubState": "running"},
+        "parado.service": {"LoadState": "loaded", "ActiveState": "inactive", "SubState": "dead"},
+        "falhou.service": {"LoadState": "loaded", "ActiveState": "failed", "SubState": "failed"},
+    }
+    mock = MockSystemd(barramento, unidades)
+    yield unidades
+    mock.conn.close()
+
+
+@pytest.fixture
+def backend(barramento, units):
+    backend = SystemdDBusBackend(barramento)
+    yield backend
+    backend.close()
+
+
+def test_status_de_unidades(backend):
+    assert backend.get_status("arma.service") == "RUNNING"
+    assert backend.get_status("parado.service") == "STOPPED"
+    assert backend.get_status("falhou.service") == "ERROR"
+
+
+def test_stop_start_restart(backend, units):
+    backend.unit_action("stop", "arma.service")
+    assert units["arma.service"]["ActiveState"] == "inactive"
+    assert backend.get_status("arma.service") == "STOPPED"
+
+    job = backend.unit_action("start", "arma.service")
+    assert job.startswith("/org/freedesktop/systemd1/job/")
+    assert backend.get_status("arma.service") == "RUNNING"
+
+    backend.unit_action("stop", "arma.service")
+    backend.unit_action("restart", "arma.service")
+    assert backend.get_status("arma.service") == "RUNNING"
+
+
+def test_unidade_inexistente(backend):
+    # GetUnit falha com NoSuchUnit; LoadUnit devolve a unidade com LoadState not-found
+    assert backend.get_status("inexistente.service") == "NOT_FOUND"
+    with pytest.raises(ServiceBackendError, match="NoSuchUnit"):
+        backend.unit_action("start", "inexistente.service")
+
+
+def test_acao_invalida(backend):
+    with pytest.raises(KeyError):
+        backend.unit_action("reload", "arma.service")
+
+
+def test_status_em_lote(backend):
+    assert backend.get_statuses(["arma", "parado.service", "inexistente"]) == {
+        "arma": "RUNNING", "parado.service": "STOPPED", "inexistente": "NOT_FOUND"}
+
+
+def test_reconecta_se_a_conexao_cair(backend):
+    assert backend.get_status("arma.service") == "RUNNING"
+    backend._conn.close()  # Simula a queda da conexão persistente
+    assert backend.get_status("arma.service") == "RUNNING"
+
+
+def test_endereco_invalido():
+    with pytest.raises(ServiceBackendError, match="Não foi possível conectar"):
+        SystemdDBusBackend("unix:path=/nao/existe/bus")
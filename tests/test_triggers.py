@@ -0,0 +1,78 @@
+import re
+
+from PQD_RestarterCore import (AhoCorasickAutomaton, TRIGGER_ACTION_DELAYED_RESTART, TriggerEngine,
+                               TriggerRule)
+
+
+def regra(padrao, regex=False):
+    return TriggerRule(padrao, TRIGGER_ACTION_DELAYED_RESTART, regex)
+
+
+def disparados(motor, linha):
+    return [r.pattern for r in motor.match(linha)]
+
+
+def test_aho_corasick_padroes_sobrepostos():
+    automato = AhoCorasickAutomaton(["he", "she", "his", "hers"])
+    assert automato.find_all("ushers") == {0, 1, 3}
+    assert automato.find_all("ahishe") == {0, 1, 2}
+    assert automato.find_all("nada aqui") == set()
+
+
+def test_aho_corasick_prefixo_e_sufixo_do_mesmo_padrao():
+    automato = AhoCorasickAutomaton(["aab", "ab", "b", "", "aaab"])
+    assert automato.find_all("aaab") == {0, 1, 2, 4}
+    assert automato.find_all("aa") == set()
+
+
+def test_aho_corasick_confere_com_busca_ingenua():
+    padroes = ["Game Over", "Over", "ame", "GameEnd", "e O", "Server"]
+    automato = AhoCorasickAutomaton(padroes)
+    for linha in ["WORLD: Game Over - ServerAdminTools_GameEnd", "Overture", "nenhum", "e Oe O"]:
+        assert automato.find_all(linha) == {i for i, p in enumerate(padroes) if p in linha}
+
+
+def test_motor_sem_regras():
+    assert TriggerEngine([]).match("qualquer coisa") == []
+    assert TriggerEngine([regra("")]).rules == []
+
+
+def test_literais_sobrepostos_na_ordem_configurada():
+    motor = TriggerEngine([regra("Over"), regra("Game Over"), regra("nunca")])
+    assert disparados(motor, "Game Over - fim") == ["Over", "Game Over"]
+    assert disparados(motor, "linha comum") == []
+
+
+def test_regex_misturado_com_literais():
+    motor = TriggerEngine([regra(r"crash \d+", regex=True), regra("Game Over"), regra("(?:a|b)c", regex=True)])
+    assert disparados(motor, "Game Over após crash 42") == ["Game Over", r"crash \d+"]
+    assert disparados(motor, "bc") == ["(?:a|b)c"]
+    assert disparados(motor, "crash sem número") == []
+
+
+def test_grupos_nomeados_repetidos():
+    motor = TriggerEngine([regra("(?P<n>foo)", regex=True), regra("(?P<n>bar)", regex=True), regra("lit")])
+    assert disparados(motor, "xbar") == ["(?P<n>bar)"]
+    assert disparados(motor, "foo lit") == ["lit", "(?P<n>foo)"]
+    assert disparados(motor, "nada") == []
+
+
+def test_referencias_nao_sao_renumeradas():
+    motor = TriggerEngine([regra("(a)b", regex=True), regra(r"(x)\1", regex=True)])
+    assert re.search(r"(x)\1", "xx")
+    assert disparados(motor, "xx") == [r"(x)\1"]
+    assert disparados(motor, "xy") == []
+    motor = TriggerEngine([regra("(?P<p>z)(?P=p)", regex=True), regra("zz-literal")])
+    assert disparados(motor, "azz") == ["(?P<p>z)(?P=p)"]
+
+
+def test_flags_inline_fora_do_prefiltro():
+    motor = TriggerEngine([regra("(?i)game over", regex=True), regra("Crash")])
+    assert disparados(motor, "GAME OVER") == ["(?i)game over"]
+    assert disparados(motor, "Crash e game Over") == ["Crash", "(?i)game over"]
+    assert disparados(motor, "crash") == []
+
+
+def test_validate_regex():
+    assert TriggerEngine.validate_regex(r"\d+") is None
+    assert TriggerEngine.validate_regex("(") is not None
@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+
+from PQD_RestarterCore import CancellationToken, WorkerPool
+
+
+def aguardar(condicao, timeout=5.0):
+    fim = time.monotonic() + timeout
+    while time.monotonic() < fim:
+        if condicao():
+            return True
+        time.sleep(0.01)
+    return condicao()
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool("Teste", 1, idle_timeout_s=5)
+    yield pool
+    pool.shutdown()
+
+
+def ocupar(pool):
+    # Prende o único worker até o teste liberar, para que as próximas tarefas fiquem na fila
+    liberar, rodando = threading.Event(), threading.Event()
+
+    def bloqueia():
+        rodando.set()
+        liberar.wait(5)
+
+    assert pool.submit(bloqueia, name="Bloqueio")
+    assert rodando.wait(5)
+    return liberar
+
+
+def test_token():
+    evento_aba, evento_app = threading.Event(), threading.Event()
+    token = CancellationToken(evento_aba, None)
+    combinado = token.combined(evento_app)
+    assert not token() and not combinado.is_set()
+    evento_app.set()
+    assert combinado.is_set() and not token.is_set()
+    assert combinado.wait(1)
+    assert not token.wait(0.05)
+    assert not CancellationToken().wait(0.01)
+
+
+def test_executa_com_nome_da_tarefa(pool):
+    nomes = []
+    assert pool.submit(lambda: nomes.append(threading.current_thread().name), name="TriggerRestart-S1")
+    assert aguardar(lambda: nomes)
+    assert nomes == ["TriggerRestart-S1"]
+
+
+def test_cancelado_antes_do_submit(pool):
+    cancelar = threading.Event()
+    cancelar.set()
+    rodou, descartes = [], []
+    assert pool.submit(rodou.append, 1, token=CancellationToken(cancelar), on_discard=lambda: descartes.append(1))
+    assert aguardar(lambda: descartes)
+    assert rodou == []
+
+
+def test_cancelado_depois_do_submit(pool):
+    liberar = ocupar(pool)
+    cancelar = threading.Event()
+    rodou, descartes = [], []
+    assert pool.submit(rodou.append, 1, token=CancellationToken(cancelar), on_discard=lambda: descartes.append(1))
+    assert pool.stats()["fila"] == 1
+    cancelar.set()
+    liberar.set()
+    assert aguardar(lambda: descartes)
+    assert rodou == []
+    assert aguardar(lambda: pool.stats()["concluidas"] == 2)
+
+
+def test_cancelamento_durante_execucao_fica_com_a_tarefa(pool):
+    cancelar = threading.Event()
+    token = CancellationToken(cancelar)
+    resultado, iniciou = [], threading.Event()
+
+    def tarefa():
+        iniciou.set()
+        resultado.append(token.wait(5))
+
+    assert pool.submit(tarefa, token=token)
+    assert iniciou.wait(5)
+    cancelar.set()
+    assert aguardar(lambda: resultado)
+    assert resultado == [True]
+
+
+def test_shutdown_com_tarefas_na_fila(pool):
+    liberar = ocupar(pool)
+    rodou, descartes = [], []
+    for i in range(3):
+        assert pool.submit(rodou.append, i, on_discard=lambda i=i: descartes.append(i))
+    pool.shutdown()
+    assert sorted(descartes) == [0, 1, 2]
+    assert pool.stats()["fila"] == 0
+    assert not pool.submit(rodou.append, 9)
+    liberar.set()
+    assert aguardar(lambda: pool.stats()["workers"] == 0)
+    assert rodou == []
+
+
+def test_evento_de_parada_externo_descarta_a_fila():
+    parar = threading.Event()
+    pool = WorkerPool("Teste", 1, stop_event=parar)
+    liberar = ocupar(pool)
+    descartes = []
+    assert pool.submit(lambda: None, on_discard=lambda: descartes.append(1))
+    parar.set()
+    liberar.set()
+    assert aguardar(lambda: descartes == [1])
+    assert aguardar(lambda: pool.stats()["workers"] == 0)
+
+
+def test_excecao_nao_derruba_o_pool(pool):
+    def falha():
+        raise RuntimeError("falha proposital")
+
+    resultados = []
+    assert pool.submit(falha)
+    assert pool.submit(resultados.append, "depois")
+    assert aguardar(lambda: resultados == ["depois"])
+    assert aguardar(lambda: pool.stats()["concluidas"] == 2)
+    assert pool.stats()["ocupados"] == 0
+
+
+def test_fila_cheia_recusa():
+    pool = WorkerPool("Teste", 1, max_queue=1)
+    try:
+        liberar = ocupar(pool)
+        assert pool.submit(lambda: None)
+        assert not pool.submit(lambda: None)
+        assert pool.stats()["recusadas"] == 1
+        liberar.set()
+    finally:
+        pool.shutdown()
+
+
+def test_workers_sob_demanda_ate_o_limite():
+    pool = WorkerPool("Teste", 3)
+    try:
+        liberar = threading.Event()
+        for _ in range(5):
+            assert pool.submit(liberar.wait, 5)
+        assert aguardar(lambda: pool.stats()["ocupados"] == 3)
+        assert pool.stats()["workers"] == 3
+        assert pool.stats()["fila"] == 2
+        liberar.set()
+        assert aguardar(lambda: pool.stats()["concluidas"] == 5)
+    finally:
+        pool.shutdown()